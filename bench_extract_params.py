@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for extract_params.py.
+
+Times the JSON fragment scanner against the original per-character loop
+on synthetic corpora and on any real captures passed on the command line,
+and prints MB/s for both. A second table times the key walker against the
+original recursive one on deep and string-heavy documents.
+
+    python3 bench_extract_params.py [--size-mb 16] [--repeat 3] [capture ...]
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+
+import extract_params
+
+
+def legacy_extract_json_fragments(content):
+    """extract_json_fragments() as it was before the regex scanner, for comparison."""
+    json_fragments = []
+    stack = []
+    current_fragment = []
+    open_chars = {'{': '}', '[': ']'}
+    close_chars = {'}': '{', ']': '['}
+
+    for char in content:
+        if char in open_chars:
+            if not stack:
+                current_fragment = []
+            stack.append(char)
+            current_fragment.append(char)
+        elif char in close_chars:
+            if stack and stack[-1] == close_chars[char]:
+                stack.pop()
+                current_fragment.append(char)
+                if not stack:
+                    json_fragments.append(''.join(current_fragment))
+            elif stack:
+                stack.pop()
+        elif stack:
+            current_fragment.append(char)
+
+    return json_fragments
+
+
+def legacy_extract_individual_keys(json_obj):
+    """extract_individual_keys() as it was before the iterative walker, for comparison."""
+    keys = set()
+    if isinstance(json_obj, dict):
+        for key, value in json_obj.items():
+            keys.add(key)
+            keys.update(legacy_extract_individual_keys(value))
+    elif isinstance(json_obj, list):
+        for item in json_obj:
+            keys.update(legacy_extract_individual_keys(item))
+    elif isinstance(json_obj, str):
+        try:
+            parsed = json.loads(json_obj)
+            keys.update(legacy_extract_individual_keys(parsed))
+        except (json.JSONDecodeError, TypeError):
+            pass
+    return keys
+
+
+def random_word(rng, low=3, high=12):
+    return ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz_') for _ in range(rng.randint(low, high)))
+
+
+def random_json(rng, depth=0):
+    if depth > 3 or rng.random() < 0.3:
+        return rng.choice([rng.randint(0, 10 ** 6), random_word(rng, 5, 40), True, None])
+    if rng.random() < 0.7:
+        return {random_word(rng): random_json(rng, depth + 1) for _ in range(rng.randint(1, 6))}
+    return [random_json(rng, depth + 1) for _ in range(rng.randint(1, 5))]
+
+
+def minified_json(rng, size):
+    parts, total = [], 0
+    while total < size:
+        part = json.dumps(random_json(rng), separators=(',', ':'))
+        parts.append(part)
+        total += len(part) + 1
+    return '[' + ','.join(parts) + ']'
+
+
+def http_log(rng, size):
+    """Request/response pairs with JSON bodies, the shape of a proxy history dump."""
+    parts, total = [], 0
+    while total < size:
+        body = json.dumps(random_json(rng))
+        part = (f"POST /api/{random_word(rng)}?{random_word(rng)}=1&{random_word(rng)}=2 HTTP/1.1\n"
+                f"Host: example.com\nCookie: session={random_word(rng, 20, 30)}\n"
+                f"Content-Type: application/json\n\n{body}\n\n"
+                f"HTTP/1.1 200 OK\nContent-Type: text/html\n\n"
+                f"<html><script>function f(){{ return {{a: '{random_word(rng)}'}}; }}</script></html>\n")
+        parts.append(part)
+        total += len(part)
+    return ''.join(parts)
+
+
+def text_heavy(rng, size):
+    """Long string values, the case where skipping literals matters most."""
+    parts, total = [], 0
+    while total < size:
+        part = json.dumps({random_word(rng): ' '.join(random_word(rng) for _ in range(200)),
+                           "template": "{{" + random_word(rng) + "}} [x] {y}"})
+        parts.append(part + '\n')
+        total += len(part) + 1
+    return ''.join(parts)
+
+
+def deep_folders(rng, size, depth=400):
+    """Postman-style folders nested `depth` levels, repeated until `size`."""
+    items, total = [], 0
+    while total < size:
+        node = {"name": random_word(rng), "request": {"url": {"raw": "https://example.com/" + random_word(rng)}}}
+        for _ in range(depth):
+            node = {"name": random_word(rng), "item": [node], "description": random_word(rng, 20, 60)}
+        part = json.dumps(node)
+        items.append(node)
+        total += len(part)
+    return {"info": {"name": "deep"}, "item": items}
+
+
+def string_heavy(rng, size):
+    """Mostly plain strings, a few of them raw JSON bodies as Postman stores them."""
+    items, total = [], 0
+    while total < size:
+        body = json.dumps(random_json(rng)) if rng.random() < 0.1 else ' '.join(
+            random_word(rng) for _ in range(rng.randint(1, 30)))
+        item = {"name": random_word(rng), "body": {"mode": "raw", "raw": body},
+                "headers": [{"key": random_word(rng), "value": random_word(rng, 10, 40)} for _ in range(5)]}
+        items.append(item)
+        total += len(json.dumps(item))
+    return {"item": items}
+
+
+SYNTHETIC_DOCUMENTS = {
+    "deep-folders": deep_folders,
+    "string-heavy": string_heavy,
+}
+
+
+SYNTHETIC = {
+    "minified-json": minified_json,
+    "http-log": http_log,
+    "text-heavy": text_heavy,
+}
+
+
+def best_time(func, content, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(content)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench(name, content, repeat):
+    megabytes = len(content.encode('utf-8')) / (1024 * 1024)
+    legacy_time, legacy_fragments = best_time(legacy_extract_json_fragments, content, repeat)
+    new_time, new_fragments = best_time(extract_params.extract_json_fragments, content, repeat)
+    print(f"{name:<24} {megabytes:>8.1f} {megabytes / legacy_time:>12.1f} {megabytes / new_time:>12.1f} "
+          f"{legacy_time / new_time:>8.1f}x {len(legacy_fragments):>10} {len(new_fragments):>10}")
+
+
+def bench_keys(name, document, repeat):
+    megabytes = len(json.dumps(document).encode('utf-8')) / (1024 * 1024)
+    try:
+        legacy_time, legacy_keys = best_time(legacy_extract_individual_keys, document, repeat)
+        legacy_rate = f"{megabytes / legacy_time:>12.1f}"
+    except RecursionError:
+        legacy_time, legacy_keys, legacy_rate = None, None, f"{'recursion':>12}"
+    new_time, new_keys = best_time(extract_params.extract_individual_keys, document, repeat)
+    speedup = f"{legacy_time / new_time:>8.1f}x" if legacy_time else f"{'-':>9}"
+    same = "-" if legacy_keys is None else ("yes" if legacy_keys == new_keys else "NO")
+    print(f"{name:<24} {megabytes:>8.1f} {legacy_rate} {megabytes / new_time:>12.1f} "
+          f"{speedup} {len(new_keys):>10} {same:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extract_params.py's JSON fragment scanner and key walker.")
+    parser.add_argument("captures", nargs="*", help="Real capture files to include.")
+    parser.add_argument("--size-mb", type=float, default=16, help="Size of each synthetic corpus (default: 16).")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement; the best is kept (default: 3).")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the synthetic corpora (default: 1).")
+    args = parser.parse_args()
+
+    size = int(args.size_mb * 1024 * 1024)
+    print(f"{'Corpus':<24} {'MB':>8} {'legacy MB/s':>12} {'new MB/s':>12} {'speedup':>9} "
+          f"{'legacy frag':>10} {'new frag':>10}")
+    print("-" * 92)
+    for name, generate in SYNTHETIC.items():
+        bench(name, generate(random.Random(args.seed), size), args.repeat)
+    for path in args.captures:
+        with open(path, 'r', encoding='utf-8', errors='replace') as fh:
+            bench(os.path.basename(path)[:24], fh.read(), args.repeat)
+
+    print(f"\n{'Document':<24} {'MB':>8} {'legacy MB/s':>12} {'new MB/s':>12} {'speedup':>9} "
+          f"{'keys':>10} {'same keys':>10}")
+    print("-" * 92)
+    for name, generate in SYNTHETIC_DOCUMENTS.items():
+        bench_keys(name, generate(random.Random(args.seed), size), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for extract_params.py.
+
+Generates reproducible synthetic corpora (Postman collections, HAR files,
+Burp XML exports, minified JSON blobs and form-heavy request logs) at the
+requested sizes, times each extraction stage and the complete extraction
+in a fresh child process, and records MB/s and peak RSS. Results can be
+stored as a baseline and later runs compared against it:
+
+    python3 bench_extract_suite.py --sizes 1M,64M --save-baseline bench-baseline.json
+    python3 bench_extract_suite.py --sizes 1M,64M --baseline bench-baseline.json
+
+Corpora are written once to --corpus-dir and reused, so multi-GB sizes
+only pay for generation the first time. The exit status is 1 when any
+measurement regressed by more than --tolerance.
+"""
+
+import argparse
+import base64
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import extract_params
+from bench_extract_params import random_json, random_word
+
+DEFAULT_SIZES = "1M,16M"
+DEFAULT_CORPUS_DIR = "bench-corpus"
+BASELINE_VERSION = 1
+# Timings shorter than this are mostly noise and never flagged as regressions.
+MIN_SECONDS = 0.05
+
+UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_size(text):
+    text = text.strip().upper().rstrip("B")
+    if text and text[-1] in UNITS:
+        return int(float(text[:-1]) * UNITS[text[-1]])
+    return int(text)
+
+
+def format_size(size):
+    for unit in ("G", "M", "K"):
+        if size >= UNITS[unit] and size % UNITS[unit] == 0:
+            return f"{size // UNITS[unit]}{unit}"
+    return str(size)
+
+
+# -- corpus generators ------------------------------------------------------
+# Each writes pieces to `out` until about `size` bytes have been written.
+
+def random_path(rng):
+    return "/" + "/".join(random_word(rng, 3, 8) for _ in range(rng.randint(1, 3)))
+
+
+def write_json_array(out, size, items, prefix='', suffix=''):
+    """Write prefix + '[' + items joined by commas + ']' + suffix, stopping at size."""
+    out.write(prefix + '[')
+    written, first = len(prefix) + 1, True
+    while written < size:
+        item = json.dumps(next(items), separators=(',', ':'))
+        out.write(item if first else ',' + item)
+        written += len(item) + 1
+        first = False
+    out.write(']' + suffix)
+
+
+def postman_items(rng):
+    while True:
+        requests = []
+        for _ in range(rng.randint(1, 8)):
+            path = random_path(rng)
+            request = {
+                "method": rng.choice(["GET", "POST", "PUT"]),
+                "header": [{"key": random_word(rng), "value": random_word(rng)} for _ in range(3)],
+                "url": {"raw": "{{baseUrl}}" + path + f"?{random_word(rng)}=1",
+                        "host": ["{{baseUrl}}"], "path": path.strip("/").split("/"),
+                        "query": [{"key": random_word(rng), "value": "1"}]},
+                "body": {"mode": "raw", "raw": json.dumps(random_json(rng))},
+            }
+            requests.append({"name": random_word(rng), "request": request,
+                             "response": [{"name": "ok", "originalRequest": request, "code": 200,
+                                           "body": json.dumps(random_json(rng))}]})
+        yield {"name": random_word(rng), "item": requests}
+
+
+def postman(rng, out, size):
+    write_json_array(out, size, postman_items(rng),
+                     prefix='{"info":{"_postman_id":"00000000-0000-0000-0000-000000000000","name":"bench",'
+                            '"schema":"https://schema.getpostman.com/json/collection/v2.1.0/collection.json"},'
+                            '"item":',
+                     suffix='}')
+
+
+def har_entries(rng):
+    while True:
+        body = json.dumps(random_json(rng))
+        yield {
+            "startedDateTime": "2024-01-01T00:00:00.000Z",
+            "request": {"method": "POST", "url": f"https://example.com{random_path(rng)}?{random_word(rng)}=1",
+                        "headers": [{"name": random_word(rng), "value": random_word(rng)} for _ in range(6)],
+                        "queryString": [], "cookies": [{"name": random_word(rng), "value": "x"}],
+                        "postData": {"mimeType": "application/json", "text": body}},
+            "response": {"status": 200, "cookies": [],
+                         "content": {"mimeType": "application/json", "text": json.dumps(random_json(rng))}},
+        }
+
+
+def har(rng, out, size):
+    write_json_array(out, size, har_entries(rng), prefix='{"log":{"version":"1.2","entries":', suffix='}}')
+
+
+def burp(rng, out, size):
+    out.write('<?xml version="1.0"?>\n<items burpVersion="2024.1" exportTime="Mon Jan 01 00:00:00 UTC 2024">\n')
+    written = 0
+    while written < size:
+        path = random_path(rng)
+        body = json.dumps(random_json(rng)).encode()
+        request = (f"POST {path}?{random_word(rng)}=1 HTTP/1.1\r\nHost: example.com\r\n"
+                   f"Cookie: {random_word(rng)}=1\r\nContent-Type: application/json\r\n"
+                   f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+        response = b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n" + json.dumps(random_json(rng)).encode()
+        item = (f"  <item>\n    <url><![CDATA[https://example.com{path}]]></url>\n"
+                f"    <request base64=\"true\"><![CDATA[{base64.b64encode(request).decode()}]]></request>\n"
+                f"    <response base64=\"true\"><![CDATA[{base64.b64encode(response).decode()}]]></response>\n"
+                f"  </item>\n")
+        out.write(item)
+        written += len(item)
+    out.write('</items>\n')
+
+
+def json_values(rng):
+    while True:
+        yield random_json(rng)
+
+
+def minified_json(rng, out, size):
+    write_json_array(out, size, json_values(rng))
+
+
+def form_log(rng, out, size):
+    written = 0
+    while written < size:
+        form = "&".join(f"{random_word(rng)}={random_word(rng)}" for _ in range(rng.randint(2, 12)))
+        entry = (f"POST {random_path(rng)}?{random_word(rng)}=1 HTTP/1.1\nHost: example.com\n"
+                 f"Cookie: {random_word(rng)}={random_word(rng, 16, 32)}\n"
+                 f"Content-Type: application/x-www-form-urlencoded\n\n{form}\n\n"
+                 f"HTTP/1.1 302 Found\nLocation: /next?{random_word(rng)}=2\n\n")
+        out.write(entry)
+        written += len(entry)
+
+
+# name -> (generator, file extension, extract_params format)
+CORPORA = {
+    "postman": (postman, "postman.json", "postman"),
+    "har": (har, "har", "har"),
+    "burp": (burp, "xml", "burp"),
+    "minified-json": (minified_json, "json", "text"),
+    "form-log": (form_log, "log", "text"),
+}
+
+
+def corpus_path(corpus_dir, name, size, seed):
+    generate, extension, _ = CORPORA[name]
+    path = os.path.join(corpus_dir, f"{name}-{format_size(size)}-{seed}.{extension}")
+    if not os.path.exists(path):
+        os.makedirs(corpus_dir, exist_ok=True)
+        partial = path + ".tmp"
+        with open(partial, 'w', encoding='utf-8', buffering=1024 * 1024) as out:
+            generate(random.Random(seed), out, size)
+        os.replace(partial, path)
+    return path
+
+
+# -- measurements (run in a child process) ---------------------------------
+
+def consume(iterable):
+    count = 0
+    for _ in iterable:
+        count += 1
+    return count
+
+
+def text_stages(path):
+    """Stage by stage version of collect_unique_parameters()."""
+    timings = {}
+    start = time.perf_counter()
+    with open(path, 'r', encoding='utf-8') as file:
+        content = file.read()
+    timings["read"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fragments = list(extract_params.FragmentScanner().feed(content))
+    timings["fragments"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    keys = set()
+    for fragment in fragments:
+        extract_params.update_from_fragment(keys, fragment)
+    timings["decode"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    extract_params.extract_kv_pairs(content)
+    timings["kv"] = time.perf_counter() - start
+    return timings
+
+
+def walk_stage(path, capture):
+    with open(path, 'r', encoding='utf-8') as file:
+        consume(extract_params.JSONStream(file).walk(capture))
+
+
+STAGES = {
+    "postman": lambda path: {"walk": timed(walk_stage, path, extract_params.postman_capture)},
+    "har": lambda path: {"walk": timed(walk_stage, path, lambda p: p == ('log', 'entries', extract_params.ITEM))},
+    "burp": lambda path: {"iterparse": timed(lambda p: consume(extract_params.iter_burp_items(p)), path)},
+    "text": text_stages,
+}
+
+# Complete extractions per format: mode -> callable(path)
+TOTALS = {
+    "text": {
+        "collect": extract_params.collect_unique_parameters,
+        "stream": extract_params.stream_unique_parameters,
+    },
+    "postman": {"total": extract_params.postman_unique_parameters},
+    "har": {"total": extract_params.har_unique_parameters},
+    "burp": {"total": extract_params.burp_unique_parameters},
+}
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def child(mode, file_format, path):
+    if mode == "stages":
+        result = STAGES[file_format](path)
+    else:
+        result = {mode: timed(TOTALS[file_format][mode], path)}
+    print(json.dumps(result))
+
+
+def run_child(mode, file_format, path):
+    """Run one measurement in a fresh interpreter; return (timings, peak RSS in bytes)."""
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--child", mode, file_format, path],
+                            stdout=subprocess.PIPE)
+    output = proc.stdout.read()
+    proc.stdout.close()
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{mode} on {path} failed with exit status {proc.returncode}")
+    # ru_maxrss is in kilobytes on Linux.
+    return json.loads(output), usage.ru_maxrss * 1024
+
+
+# -- suite ------------------------------------------------------------------
+
+def run_suite(corpora, sizes, seed, corpus_dir):
+    results = {}
+    for name in corpora:
+        file_format = CORPORA[name][2]
+        for size in sizes:
+            path = corpus_path(corpus_dir, name, size, seed)
+            megabytes = os.path.getsize(path) / (1024 * 1024)
+            runs = [("stages", run_child("stages", file_format, path))]
+            runs += [(mode, run_child(mode, file_format, path)) for mode in TOTALS[file_format]]
+            for mode, (timings, rss) in runs:
+                for stage, seconds in timings.items():
+                    key = f"{name}/{format_size(size)}/{stage}"
+                    results[key] = {
+                        "mb": megabytes,
+                        "seconds": seconds,
+                        "mb_per_s": megabytes / seconds if seconds else 0.0,
+                        "peak_rss_mb": rss / (1024 * 1024),
+                    }
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Flag measurements that got slower or hungrier than the baseline by more than tolerance."""
+    flags = {}
+    for key, row in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        notes = []
+        if max(row["seconds"], old["seconds"]) >= MIN_SECONDS and \
+                row["mb_per_s"] < old["mb_per_s"] * (1 - tolerance):
+            notes.append(f"MB/s {old['mb_per_s']:.1f} -> {row['mb_per_s']:.1f}")
+        # Stages share their child's RSS; only the complete runs are judged on memory.
+        if not key.endswith(("/read", "/fragments", "/decode", "/kv", "/walk", "/iterparse")) and \
+                row["peak_rss_mb"] > old["peak_rss_mb"] * (1 + tolerance):
+            notes.append(f"RSS {old['peak_rss_mb']:.0f} -> {row['peak_rss_mb']:.0f} MB")
+        if notes:
+            flags[key] = "; ".join(notes)
+    return flags
+
+
+def print_results(results, flags):
+    print(f"{'Measurement':<36} {'MB':>9} {'Seconds':>9} {'MB/s':>9} {'Peak RSS':>10}  Regression")
+    print("-" * 100)
+    for key, row in results.items():
+        print(f"{key:<36} {row['mb']:>9.1f} {row['seconds']:>9.3f} {row['mb_per_s']:>9.1f} "
+              f"{row['peak_rss_mb']:>8.0f}MB  {flags.get(key, '')}")
+
+
+def main():
+    if len(sys.argv) == 5 and sys.argv[1] == "--child":
+        child(*sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(description="Benchmark suite for extract_params.py on synthetic corpora.")
+    parser.add_argument("--corpora", default=",".join(CORPORA),
+                        help=f"Comma separated corpora to run (default: {','.join(CORPORA)}).")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"Comma separated corpus sizes such as 1M,256M,4G (default: {DEFAULT_SIZES}).")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the synthetic corpora (default: 1).")
+    parser.add_argument("--corpus-dir", default=DEFAULT_CORPUS_DIR,
+                        help=f"Where generated corpora are kept and reused (default: {DEFAULT_CORPUS_DIR}).")
+    parser.add_argument("--baseline", help="Compare against this stored baseline.")
+    parser.add_argument("--save-baseline", metavar="FILE", help="Store this run's results as a baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Allowed relative slowdown or RSS growth before flagging (default: 0.10).")
+    args = parser.parse_args()
+
+    corpora = [name.strip() for name in args.corpora.split(",") if name.strip()]
+    unknown = [name for name in corpora if name not in CORPORA]
+    if unknown:
+        parser.error(f"unknown corpora: {', '.join(unknown)}")
+    sizes = [parse_size(size) for size in args.sizes.split(",") if size.strip()]
+
+    results = run_suite(corpora, sizes, args.seed, args.corpus_dir)
+
+    flags = {}
+    if args.baseline:
+        with open(args.baseline) as fh:
+            stored = json.load(fh)
+        if stored.get("version") != BASELINE_VERSION:
+            sys.exit(f"Baseline '{args.baseline}' has version {stored.get('version')}, expected {BASELINE_VERSION}.")
+        flags = compare(results, stored["results"], args.tolerance)
+    print_results(results, flags)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as fh:
+            json.dump({"version": BASELINE_VERSION, "created": time.time(), "python": sys.version.split()[0],
+                       "seed": args.seed, "results": results}, fh, indent=2)
+    if flags:
+        print(f"\n{len(flags)} regression(s) against {args.baseline}.", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
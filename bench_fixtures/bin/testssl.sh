@@ -0,0 +1,19 @@
+#!/bin/sh
+# Stand-in for testssl.sh -S / -P: replays a recorded run after
+# FAKE_TESTSSL_DELAY seconds. Targets starting with "refused" cannot
+# connect, those starting with "filtered" time out.
+fixtures="${FAKE_FIXTURES:-$(dirname "$0")/..}"
+for arg; do target=$arg; done
+sleep "${FAKE_TESTSSL_DELAY:-0.2}"
+case "$target" in
+  refused*) echo "Can't connect to '$target': Connection refused"; exit 0;;
+  filtered*) echo "Can't connect to '$target': Connection timed out"; exit 0;;
+esac
+for arg; do
+  case "$arg" in
+    -S) cat "$fixtures/testssl-S.txt"; exit 0;;
+    -P) cat "$fixtures/testssl-P.txt"; exit 0;;
+  esac
+done
+echo "fake testssl.sh: only -S and -P are recorded" >&2
+exit 1
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark gen_string.py against the shell generators it replaces.
+
+gen_sring.sh makes one string per run, so it is timed over --shell-count
+runs and its rate extrapolated. The best the shell can do in bulk (tr |
+fold | head over /dev/urandom) is timed at the full count, as are
+gen_string.py's default and --unique modes, all writing to /dev/null.
+
+    python3 bench_gen_string.py [--length 16] [--count 1000000] [--shell-count 200]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def timed(cmd, shell=False):
+    start = time.perf_counter()
+    subprocess.run(cmd, shell=shell, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def per_string_shell(length, runs):
+    script = os.path.join(HERE, 'gen_sring.sh')
+    start = time.perf_counter()
+    for _ in range(runs):
+        subprocess.run(['bash', script, str(length)], check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark gen_string.py against gen_sring.sh.")
+    parser.add_argument('--length', type=int, default=16, help="String length (default: 16)")
+    parser.add_argument('--count', type=int, default=1000000, help="Strings per bulk run (default: 1000000)")
+    parser.add_argument('--unique-count', type=int, default=200000,
+                        help="Strings for the --unique run (default: 200000)")
+    parser.add_argument('--shell-count', type=int, default=200,
+                        help="gen_sring.sh invocations to time (default: 200)")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help="Workers for the --unique run (default: CPU count)")
+    args = parser.parse_args()
+
+    length, count = args.length, args.count
+    generator = [sys.executable, os.path.join(HERE, 'gen_string.py'), str(length), '-o', os.devnull]
+    runs = [
+        ("gen_sring.sh (one per run)", args.shell_count, per_string_shell(length, args.shell_count)),
+        ("tr | fold | head", count,
+         timed(f"tr -dc 'A-Za-z0-9' < /dev/urandom | fold -w {length} | head -n {count}", shell=True)),
+        ("gen_string.py", count, timed(generator + ['-n', str(count)])),
+        (f"gen_string.py --unique -j{args.jobs}", args.unique_count,
+         timed(generator + ['-n', str(args.unique_count), '--unique', '-j', str(args.jobs)])),
+    ]
+
+    baseline = runs[0][1] / runs[0][2]
+    print(f"{'Method':<30} {'Strings':>10} {'Time':>9} {'Strings/s':>12} {'MB/s':>8} {'vs .sh':>9}")
+    print("-" * 83)
+    for name, strings, elapsed in runs:
+        rate = strings / elapsed
+        print(f"{name:<30} {strings:>10} {elapsed:>8.2f}s {rate:>12.0f} "
+              f"{rate * (length + 1) / 1e6:>8.1f} {rate / baseline:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark gitrepos.py's in-process metadata reads against the git CLI.
+
+Builds a tree of synthetic repositories with git fast-import (linear
+history, lightweight and annotated tags, an upstream tracking ref, packed
+or loose objects), then times `git describe --tags` / `git rev-parse` per
+repository against GitRepo, and checks both give the same answers.
+
+    python3 bench_git_metadata.py [--repos 300] [--commits 200] [--tree DIR]
+"""
+
+import argparse
+import os
+import random
+import subprocess
+import tempfile
+import time
+
+import gitrepos
+
+
+def fast_import_stream(rng, commits):
+    lines = []
+    for i in range(1, commits + 1):
+        message = f"commit {i}\n"
+        data = f"{rng.random()}\n" * rng.randint(1, 20)
+        lines.append(f"commit refs/heads/main\nmark :{i}\n"
+                     f"committer Bench <bench@example.com> {1500000000 + i * 60} +0000\n"
+                     f"data {len(message)}\n{message}")
+        if i > 1:
+            lines.append(f"from :{i - 1}\n")
+        lines.append(f"M 644 inline src/file{rng.randint(0, 40)}.py\ndata {len(data)}\n{data}\n")
+    for i in range(max(1, commits // 50), commits, max(1, commits // 5)):
+        if rng.random() < 0.5:
+            lines.append(f"reset refs/tags/v{i}\nfrom :{i}\n\n")
+        else:
+            lines.append(f"tag v{i}\nfrom :{i}\ntagger Bench <bench@example.com> {1500000000 + i * 60} +0000\n"
+                         f"data 8\nrelease\n\n")
+    lines.append(f"reset refs/remotes/origin/main\nfrom :{commits}\n\n")
+    return ''.join(lines).encode()
+
+
+def build_tree(tree, repos, commits, seed):
+    rng = random.Random(seed)
+    for n in range(repos):
+        path = os.path.join(tree, f"group{n % 10}", f"tool{n}")
+        if os.path.isdir(os.path.join(path, ".git")):
+            continue
+        subprocess.run(["git", "init", "-q", "-b", "main", path], check=True)
+        subprocess.run(["git", "fast-import", "--quiet"], cwd=path, check=True,
+                       input=fast_import_stream(rng, rng.randint(commits // 2, commits)))
+        subprocess.run(["git", "config", "branch.main.remote", "origin"], cwd=path, check=True)
+        subprocess.run(["git", "config", "branch.main.merge", "refs/heads/main"], cwd=path, check=True)
+        subprocess.run(["git", "config", "remote.origin.url", "/nonexistent"], cwd=path, check=True)
+        subprocess.run(["git", "config", "remote.origin.fetch", "+refs/heads/*:refs/remotes/origin/*"],
+                       cwd=path, check=True)
+        # Keep a mix of pack layouts: fully repacked, pack plus loose refs, as imported.
+        if n % 3 == 0:
+            subprocess.run(["git", "gc", "-q"], cwd=path, check=True)
+        elif n % 3 == 1:
+            subprocess.run(["git", "pack-refs", "--all"], cwd=path, check=True)
+        subprocess.run(["git", "reset", "-q", "--hard", f"HEAD~{rng.randint(0, 3)}"], cwd=path, check=True,
+                       stdout=subprocess.DEVNULL)
+
+
+def git_output(args, cwd):
+    result = subprocess.run(["git"] + args, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def cli_metadata(repo):
+    return (git_output(["describe", "--tags"], repo),
+            git_output(["rev-parse", "HEAD"], repo),
+            git_output(["rev-parse", "@{u}"], repo))
+
+
+def in_process_metadata(repo):
+    try:
+        description = gitrepos.describe_tags(repo)
+    except gitrepos.MetadataUnavailable:
+        description = git_output(["describe", "--tags"], repo)
+    git = gitrepos.GitRepo(repo)
+    upstream = git.upstream()
+    return description, git.head(), upstream[2] if upstream else None
+
+
+def best_time(func, repos, repeat):
+    best, results = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [func(repo) for repo in repos]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark in-process git metadata reads against the git CLI.")
+    parser.add_argument("--repos", type=int, default=300, help="Repositories in the synthetic tree (default: 300).")
+    parser.add_argument("--commits", type=int, default=200, help="Maximum commits per repository (default: 200).")
+    parser.add_argument("--tree", help="Where to build (and reuse) the tree (default: a temporary directory).")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement; the best is kept (default: 3).")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the synthetic repositories (default: 1).")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        tree = args.tree or scratch
+        print(f"Building {args.repos} repositories under {tree} ...")
+        build_tree(tree, args.repos, args.commits, args.seed)
+        repos = gitrepos.find_git_repos(tree)
+
+        cli_time, cli_results = best_time(cli_metadata, repos, args.repeat)
+        own_time, own_results = best_time(in_process_metadata, repos, args.repeat)
+        mismatches = [repo for repo, a, b in zip(repos, cli_results, own_results) if a != b]
+
+        print(f"{'Method':<14} {'Total':>10} {'Per repo':>10} {'Repos/s':>10}")
+        print("-" * 47)
+        for name, elapsed in (("git CLI", cli_time), ("in-process", own_time)):
+            print(f"{name:<14} {elapsed:>9.3f}s {elapsed / len(repos) * 1000:>8.2f}ms {len(repos) / elapsed:>10.1f}")
+        print(f"\nSpeedup: {cli_time / own_time:.1f}x; results identical for "
+              f"{len(repos) - len(mismatches)}/{len(repos)} repositories.")
+        for repo in mismatches:
+            print(f"  mismatch: {repo}")
+
+
+if __name__ == "__main__":
+    main()
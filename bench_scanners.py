@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput benchmark for the bulk scanning scripts, with no
+real targets or network.
+
+Fake nmap and testssl.sh (bench_fixtures/bin) replay recorded output
+after a configurable delay, and a local HTTP server stands in for the
+IANA registry and ciphersuite.info, built from the recordings in
+bench_fixtures/. ciphers-new.py is pointed at it through
+CIPHERS_IANA_URL and CIPHERS_CIPHERSUITE_URL. Each tool runs against
+generated target lists (a share of them refusing connections). For each
+run the benchmark reports targets/second, per-target latency percentiles
+and peak RSS.
+
+    python3 bench_scanners.py [--sizes 10,100,1000] [--tools bulk-CA-check,ciphers-new]
+                              [--nmap-delay 0.05] [--testssl-delay 0.2] [--json results.json]
+
+ciphers-new.py takes one target per run, so it is timed over at most
+--max-runs invocations per size. Its rate is per invocation either way.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from scanstats import percentile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURES = os.path.join(HERE, "bench_fixtures")
+IANA_PATH = "/assignments/tls-parameters/tls-parameters.xml"
+TOOLS = ["bulk-cert-nmap-check", "bulk-cert-validity", "bulk-CA-check", "ciphers-new"]
+CIPHER_PAGE = re.compile(r"^/cs/([A-Za-z0-9_]+)/?$")
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serves the recorded IANA registry and renders ciphersuite.info pages from ciphersuite.json."""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+        time.sleep(server.delay)
+        url = urlsplit(self.path)
+        match = CIPHER_PAGE.match(url.path)
+        if url.path == IANA_PATH:
+            self.reply(server.iana, "application/xml")
+        elif url.path.rstrip("/") == "/cs" and url.query:
+            security = parse_qs(url.query).get("security", [""])[0]
+            items = "".join(f'<li><a href="/cs/{name}/"><span class="break-all">{name}</span></a></li>'
+                            for name, page in server.ciphers.items() if page["level"].lower() == security)
+            self.reply(f'<html><body><ul class="prettylist">{items}</ul></body></html>'.encode())
+        elif match and match.group(1) in server.ciphers:
+            self.reply(cipher_page(match.group(1), server.ciphers[match.group(1)]).encode())
+        else:
+            self.send_error(404)
+
+    def reply(self, body, content_type="text/html; charset=utf-8"):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def cipher_page(name, page):
+    alerts = "".join(f'<div class="alert alert-{category.lower()}"><strong>{escape(title)}:</strong>'
+                     f'<p>{escape(description)}</p></div>' for category, title, description in page["alerts"])
+    return (f'<html><body><h1><span class="break-all">{name}</span></h1>'
+            f'<span class="badge">{escape(page["level"])}</span>{alerts}</body></html>')
+
+
+def start_fixture_server(delay):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.lock = threading.Lock()
+    server.requests = 0
+    with open(os.path.join(FIXTURES, "tls-parameters.xml"), "rb") as fh:
+        server.iana = fh.read()
+    with open(os.path.join(FIXTURES, "ciphersuite.json")) as fh:
+        server.ciphers = json.load(fh)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def write_targets(path, count, error_rate, seed):
+    rng = random.Random(seed)
+    targets = []
+    for i in range(count):
+        if rng.random() < error_rate:
+            targets.append(f"refused-{i}")
+        else:
+            targets.append(f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}")
+    with open(path, "w") as fh:
+        fh.write("\n".join(targets) + "\n")
+    return targets
+
+
+def run_measured(cmd, env, marker=None):
+    """Run cmd; return (seconds, peak RSS in KB, arrival times of output lines containing marker, exit code)."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    arrivals = []
+    for line in proc.stdout:
+        if marker is not None and marker in line:
+            arrivals.append(time.perf_counter())
+    proc.stdout.close()
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    elapsed = time.perf_counter() - start
+    return elapsed, usage.ru_maxrss, [t - start for t in arrivals], proc.returncode
+
+
+def trace_latencies(path):
+    with open(path) as fh:
+        trace = json.load(fh)
+    return [record["seconds"] for record in trace["records"] if record["stage"] == "total"]
+
+
+def gaps(arrivals):
+    """Per-target latency of a sequential tool from the times its result lines appeared."""
+    return [b - a for a, b in zip([0.0] + arrivals, arrivals)]
+
+
+def bench_tool(tool, targets, targets_file, workdir, env, args):
+    script = os.path.join(HERE, f"{tool}.py")
+    trace = os.path.join(workdir, f"{tool}.trace.json")
+    if tool == "bulk-cert-nmap-check":
+        elapsed, peak, _, code = run_measured([sys.executable, script, "--trace", trace, targets_file], env)
+        return len(targets), elapsed, trace_latencies(trace), peak, code
+    if tool == "bulk-cert-validity":
+        elapsed, peak, arrivals, code = run_measured([sys.executable, script, targets_file], env, marker=" -> ")
+        return len(targets), elapsed, gaps(arrivals), peak, code
+    if tool == "bulk-CA-check":
+        cmd = [sys.executable, script, "--testssl", os.path.join(workdir, "bin", "testssl.sh"),
+               "-j", str(args.jobs), "--trace", trace, targets_file]
+        elapsed, peak, _, code = run_measured(cmd, env)
+        return len(targets), elapsed, trace_latencies(trace), peak, code
+    # ciphers-new.py: one invocation per target.
+    sample = targets[:args.max_runs]
+    latencies, peak, code = [], 0, 0
+    for target in sample:
+        seconds, rss, _, status = run_measured([sys.executable, script, "-t", f"{target}:443", "--light"], env)
+        latencies.append(seconds)
+        peak, code = max(peak, rss), code or status
+    return len(sample), sum(latencies), latencies, peak, code
+
+
+def prepare_workdir(workdir, server):
+    """Fake tools outside any git checkout (ciphers-new.py runs git pull in testssl.sh's directory) and a HOME."""
+    bin_dir = os.path.join(workdir, "bin")
+    os.makedirs(bin_dir, exist_ok=True)
+    for name in ("nmap", "testssl.sh"):
+        shutil.copy2(os.path.join(FIXTURES, "bin", name), bin_dir)
+    home = os.path.join(workdir, "home")
+    os.makedirs(home, exist_ok=True)
+    with open(os.path.join(home, ".ciphers"), "w") as fh:
+        fh.write(bin_dir)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    env = dict(os.environ)
+    env.update({
+        "PATH": bin_dir + os.pathsep + env.get("PATH", ""),
+        "HOME": home,
+        "FAKE_FIXTURES": FIXTURES,
+        "CIPHERS_IANA_URL": base + IANA_PATH,
+        "CIPHERS_CIPHERSUITE_URL": base,
+        "NO_PROXY": "127.0.0.1,localhost",
+        "GIT_DIR": os.path.join(workdir, "no-such-repo"),
+    })
+    return env
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bulk scanners against local stand-ins.")
+    parser.add_argument("--sizes", default="10,100,1000", help="Comma-separated target counts (default: 10,100,1000)")
+    parser.add_argument("--tools", default=",".join(TOOLS), help=f"Comma-separated tools (default: {','.join(TOOLS)})")
+    parser.add_argument("--nmap-delay", type=float, default=0.05, help="Seconds per fake nmap run (default: 0.05)")
+    parser.add_argument("--testssl-delay", type=float, default=0.2, help="Seconds per fake testssl.sh run (default: 0.2)")
+    parser.add_argument("--http-delay", type=float, default=0.01,
+                        help="Seconds per request to the fixture server (default: 0.01)")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="Share of refusing targets (default: 0.05)")
+    parser.add_argument("-j", "--jobs", type=int, default=4, help="bulk-CA-check.py -j (default: 4)")
+    parser.add_argument("--max-runs", type=int, default=50,
+                        help="Most ciphers-new.py invocations per size (default: 50)")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the target lists (default: 1)")
+    parser.add_argument("--json", metavar="FILE", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    tools = [tool.strip() for tool in args.tools.split(",") if tool.strip()]
+    unknown = set(tools) - set(TOOLS)
+    if unknown:
+        parser.error(f"unknown tool(s): {', '.join(sorted(unknown))}")
+    if "ciphers-new" in tools and not all(importlib.util.find_spec(m) for m in ("requests", "bs4")):
+        print("Skipping ciphers-new: requests and beautifulsoup4 are needed", file=sys.stderr)
+        tools.remove("ciphers-new")
+
+    server = start_fixture_server(args.http_delay)
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        env = prepare_workdir(workdir, server)
+        env["FAKE_NMAP_DELAY"] = str(args.nmap_delay)
+        env["FAKE_TESTSSL_DELAY"] = str(args.testssl_delay)
+
+        print(f"{'Tool':<22} {'Targets':>8} {'Wall':>9} {'Targets/s':>10} {'p50':>8} {'p95':>8} {'p99':>8} "
+              f"{'Peak RSS':>9} {'Exit':>5}")
+        print("-" * 95)
+        for size in sizes:
+            targets_file = os.path.join(workdir, f"targets-{size}.txt")
+            targets = write_targets(targets_file, size, args.error_rate, args.seed)
+            for tool in tools:
+                requests_before = server.requests
+                measured, elapsed, latencies, peak, code = bench_tool(tool, targets, targets_file, workdir, env, args)
+                latencies.sort()
+                row = {
+                    "tool": tool, "targets": measured, "seconds": elapsed,
+                    "rate": measured / elapsed if elapsed else 0.0,
+                    "p50": percentile(latencies, 50), "p95": percentile(latencies, 95),
+                    "p99": percentile(latencies, 99), "peak_rss_mb": peak / 1024, "exit": code,
+                    "http_requests": server.requests - requests_before,
+                }
+                results.append(row)
+                print(f"{tool:<22} {measured:>8} {elapsed:>8.2f}s {row['rate']:>10.1f} {row['p50'] * 1000:>6.0f}ms "
+                      f"{row['p95'] * 1000:>6.0f}ms {row['p99'] * 1000:>6.0f}ms {row['peak_rss_mb']:>7.1f}MB {code:>5}")
+    server.shutdown()
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump({"sizes": sizes, "delays": {"nmap": args.nmap_delay, "testssl": args.testssl_delay,
+                                                  "http": args.http_delay}, "results": results}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,17 +3,194 @@
 import sys
 import subprocess
 import re
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from scanstats import ScanStats
+import checkpoint
+import tlschain
+from chaincache import ChainCache, DEFAULT_CACHE_PATH
+import procgroup
+import profiling
+
+stats = ScanStats("bulk-CA-check")
+
+TESTSSL_PATH = '/opt/OWASP/wstg/testssl.sh/testssl.sh'
+
+def run_testssl(cmd, timeout):
+    """
+    Run testssl.sh and return its output, or None if it exceeded `timeout`
+    seconds, in which case its whole process group (testssl.sh forks
+    openssl and friends) is killed.
+    """
+    result = procgroup.run(cmd, timeout, stderr=subprocess.STDOUT)  # Capture both stdout and stderr
+    return None if result is None else result[1]
 
 def strip_ansi_codes(text):
     ansi_escape = re.compile(r'\x1b\[[0-9;]*m')
     return ansi_escape.sub('', text)
 
+def parse_server_defaults(lines):
+    chain_of_trust = "Not found"
+    certificate_validity = "Not found"
+    issuer = "Not found"
+
+    for i in range(len(lines)):
+        line = lines[i].strip()
+        if line.startswith('Chain of trust'):
+            chain_of_trust = line[len('Chain of trust'):].strip()
+        elif line.startswith('Certificate Validity'):
+            certificate_validity = line[len('Certificate Validity'):].strip()
+            # Check for additional validity info on the next lines
+            j = i + 1
+            while j < len(lines):
+                next_line = lines[j].strip()
+                if next_line.startswith('(') or next_line.startswith('>='):
+                    certificate_validity += ' ' + next_line
+                    j += 1
+                else:
+                    break
+        elif line.startswith('Issuer'):
+            issuer = line[len('Issuer'):].strip()
+
+    return chain_of_trust, certificate_validity, issuer
+
+def check_target(target, testssl=TESTSSL_PATH, timeout=None):
+    """
+    Run testssl.sh -S against one target and return its result dict:
+    {"error": ...} for connection failures and timeouts, {"failed": ...}
+    when testssl.sh itself could not be run, otherwise the three
+    certificate fields.
+    """
+    cmd = [
+        testssl,
+        '--quiet',
+        '--color', '0',
+        '-S',
+        target
+    ]
+    try:
+        with stats.stage("testssl", target):
+            output = run_testssl(cmd, timeout)
+    except Exception as e:
+        stats.error("testssl.sh failed to run")
+        return {"failed": f"Error running testssl.sh on {target}: {e}"}
+
+    if output is None:
+        stats.error("testssl.sh timed out")
+        return {"error": f"testssl.sh timed out after {timeout}s."}
+
+    output = strip_ansi_codes(output)
+    lines = output.split('\n')
+
+    # For debugging: Uncomment the following line to see the raw output
+    # print(f"Output for {target}:\n{output}\n{'-'*60}")
+
+    # Check for connection errors
+    connection_refused = any(
+        "Connection refused" in line or "Can't connect" in line for line in lines
+    )
+    connection_timed_out = any(
+        "Connection timed out" in line or "Can't connect" in line for line in lines
+    )
+
+    if connection_refused:
+        stats.error("Connection refused")
+        return {"error": "Connection refused."}
+    elif connection_timed_out:
+        stats.error("Connection timed out")
+        return {"error": "Connection timed out."}
+
+    with stats.stage("parse", target):
+        chain_of_trust, certificate_validity, issuer = parse_server_defaults(lines)
+
+    return {
+        "chain_of_trust": chain_of_trust,
+        "certificate_validity": certificate_validity,
+        "issuer": issuer,
+    }
+
+def fast_check(target, testssl=TESTSSL_PATH, timeout=None, cafile=None, connect_timeout=10, cache=None):
+    """
+    Verify the chain in-process and only run testssl.sh for targets the
+    handshake could not decide (odd verify errors, protocol failures).
+    """
+    with stats.stage("handshake", target):
+        result = tlschain.check_chain(target, cafile=cafile, timeout=connect_timeout, cache=cache)
+    if result is None:
+        stats.count("fallback to testssl.sh")
+        return check_target(target, testssl, timeout)
+    stats.count("decided in-process")
+    if "error" in result:
+        stats.error(result["error"].rstrip("."))
+    return result
+
+def print_result(target, result):
+    if "failed" in result:
+        print(result["failed"])
+        return
+    print(f"Target: {target}")
+    if "error" in result:
+        print(f"Error: {result['error']}")
+    else:
+        print(f"Chain of trust: {result['chain_of_trust']}")
+        print(f"Certificate Validity: {result['certificate_validity']}")
+        print(f"Issuer: {result['issuer']}")
+    print('-' * 40)
+
+def summary_row(target, result):
+    if "failed" in result:
+        return target, "Not checked", "", ""
+    if "error" in result:
+        return target, f"Error: {result['error']}", "", ""
+    return target, result['chain_of_trust'], result['certificate_validity'], result['issuer']
+
+def print_summary(targets, results):
+    rows = [("Target", "Chain of trust", "Certificate Validity", "Issuer")]
+    rows += [summary_row(target, results[target]) for target in dict.fromkeys(targets) if target in results]
+    widths = [max(len(row[col]) for row in rows) for col in range(4)]
+
+    print("\nSummary:")
+    for n, row in enumerate(rows):
+        print(f"{row[0]:<{widths[0]}}  {row[1]:<{widths[1]}}  {row[2]:<{widths[2]}}  {row[3]}".rstrip())
+        if n == 0:
+            print("-" * (sum(widths) + 6))
+
+    errors = sum(1 for target in results if "error" in results[target] or "failed" in results[target])
+    print(f"\nTotal targets checked: {len(results)}")
+    print(f"Total targets with errors: {errors}")
+
 def main():
-    if len(sys.argv) != 2:
-        print(f"Usage: {sys.argv[0]} target_file")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description='Bulk certificate chain of trust check using testssl.sh.')
+    parser.add_argument('target_file', help='File containing targets, one per line')
+    parser.add_argument('--stats', action='store_true',
+                        help='Print per-stage timing and error counts to stderr when done')
+    parser.add_argument('--trace', metavar='FILE',
+                        help='Write a JSON timing trace to FILE')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='Number of targets checked in parallel (default: 4, or 32 with --fast)')
+    parser.add_argument('--timeout', type=int, default=600,
+                        help='Seconds before a hung testssl.sh run is killed (default: 600)')
+    parser.add_argument('--testssl', default=TESTSSL_PATH,
+                        help=f'Path to testssl.sh (default: {TESTSSL_PATH})')
+    parser.add_argument('--fast', action='store_true',
+                        help='Verify chains in-process and only fall back to testssl.sh when undecided')
+    parser.add_argument('--ca-bundle', metavar='FILE',
+                        help='Verify against this PEM bundle instead of the system trust store (with --fast)')
+    parser.add_argument('--connect-timeout', type=int, default=10,
+                        help='Seconds per TLS handshake in --fast mode (default: 10)')
+    parser.add_argument('--chain-cache', metavar='FILE', default=DEFAULT_CACHE_PATH,
+                        help=f'Where --fast keeps verified intermediate paths (default: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--no-chain-cache', action='store_true',
+                        help='Fully verify every chain in --fast mode')
+    checkpoint.add_arguments(parser, 'target_file')
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.start(args)
+    if args.jobs is None:
+        args.jobs = 32 if args.fast else 4
+    stats.enabled = args.stats or bool(args.trace)
 
-    target_file = sys.argv[1]
+    target_file = args.target_file
 
     try:
         with open(target_file, 'r') as f:
@@ -22,78 +199,54 @@ def main():
         print(f"File '{target_file}' not found.")
         sys.exit(1)
 
-    for target in targets:
-        cmd = [
-            '/opt/OWASP/wstg/testssl.sh/testssl.sh',
-            '--quiet',
-            '--color', '0',
-            '-S',
-            target
-        ]
+    journal = checkpoint.journal_for(args, target_file, "bulk-CA-check")
+    done = journal.load() if args.resume else {}
+
+    cache = None
+    if args.fast and not args.no_chain_cache:
+        cache = ChainCache(args.chain_cache, cafile=args.ca_bundle)
+
+    def timed_check(target):
+        with stats.target(target):
+            if args.fast:
+                return fast_check(target, args.testssl, args.timeout, args.ca_bundle,
+                                  args.connect_timeout, cache)
+            return check_target(target, args.testssl, args.timeout)
+
+    results = {}
+    with journal.open(resume=args.resume, restart=args.restart):
+        for target in targets:
+            if target in done and target not in results:
+                stats.count("resumed from journal")
+                results[target] = done[target]
+                print_result(target, done[target])
+
+        pending = list(dict.fromkeys(t for t in targets if t not in results))
+        pool = ThreadPoolExecutor(max_workers=max(1, args.jobs))
         try:
-            result = subprocess.run(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,  # Capture both stdout and stderr
-                text=True
-            )
-        except Exception as e:
-            print(f"Error running testssl.sh on {target}: {e}")
-            continue
-
-        output = result.stdout
-        output = strip_ansi_codes(output)
-        lines = output.split('\n')
-
-        # For debugging: Uncomment the following line to see the raw output
-        # print(f"Output for {target}:\n{output}\n{'-'*60}")
-
-        # Check for connection errors
-        connection_refused = any(
-            "Connection refused" in line or "Can't connect" in line for line in lines
-        )
-        connection_timed_out = any(
-            "Connection timed out" in line or "Can't connect" in line for line in lines
-        )
-
-        if connection_refused:
-            print(f"Target: {target}")
-            print("Error: Connection refused.")
-            print('-' * 40)
-            continue
-        elif connection_timed_out:
-            print(f"Target: {target}")
-            print("Error: Connection timed out.")
-            print('-' * 40)
-            continue
-
-        chain_of_trust = "Not found"
-        certificate_validity = "Not found"
-        issuer = "Not found"
-
-        for i in range(len(lines)):
-            line = lines[i].strip()
-            if line.startswith('Chain of trust'):
-                chain_of_trust = line[len('Chain of trust'):].strip()
-            elif line.startswith('Certificate Validity'):
-                certificate_validity = line[len('Certificate Validity'):].strip()
-                # Check for additional validity info on the next lines
-                j = i + 1
-                while j < len(lines):
-                    next_line = lines[j].strip()
-                    if next_line.startswith('(') or next_line.startswith('>='):
-                        certificate_validity += ' ' + next_line
-                        j += 1
-                    else:
-                        break
-            elif line.startswith('Issuer'):
-                issuer = line[len('Issuer'):].strip()
-
-        print(f"Target: {target}")
-        print(f"Chain of trust: {chain_of_trust}")
-        print(f"Certificate Validity: {certificate_validity}")
-        print(f"Issuer: {issuer}")
-        print('-' * 40)
+            futures = {pool.submit(timed_check, target): target for target in pending}
+            # Blocks are printed as runs finish; the summary restores input order.
+            for future in as_completed(futures):
+                target = futures[future]
+                result = future.result()
+                if "failed" not in result:
+                    # Local failures are retried on resume rather than replayed.
+                    journal.record(target, result)
+                results[target] = result
+                print_result(target, result)
+        except KeyboardInterrupt:
+            procgroup.interrupt(pool)
+            raise
+        pool.shutdown()
+
+    if cache is not None:
+        stats.hit("chain cache", cache.hits)
+        stats.miss("chain cache", cache.misses)
+        cache.save()
+
+    print_summary(targets, results)
+    stats.finish(args.trace)
+
 
 if __name__ == "__main__":
     main()
@@ -2,6 +2,11 @@
 import subprocess
 from datetime import datetime
 import argparse
+from scanstats import ScanStats
+import checkpoint
+import profiling
+
+stats = ScanStats("bulk-cert-nmap-check")
 
 # ANSI helpers
 def red(text):   return f"\033[31m{text}\033[0m"
@@ -29,30 +34,61 @@ def parse_cert_output(stdout):
 def split_dn(dn):
     return dn.split('/') if dn else []
 
+def validity_status(not_after):
+    """(status text, expired) for an nmap style 'Not valid after' timestamp."""
+    na_dt = datetime.strptime(not_after, "%Y-%m-%dT%H:%M:%S")
+    days = (na_dt - datetime.now()).days
+    if days < 0:
+        return f"Expired {abs(days)} days ago", True
+    return f"{days} days until expiry", False
+
+def result_lines(info, wanted=None):
+    out_lines = []
+    if "error" in info:
+        out_lines.append(f"Error     : {info['error']}")
+    else:
+        if wanted is None or 'status' in wanted:
+            st = red(info['status_text']) if info['expired'] else green(info['status_text'])
+            out_lines.append(f"Status    : {st} ({info['not_before']} -> {info['not_after']})")
+        if wanted is None or 'subject' in wanted:
+            if info['subject']:
+                out_lines.append(f"Subject   : {' | '.join(info['subject'])}")
+        if wanted is None or 'san' in wanted:
+            if info['san']:
+                out_lines.append(f"SAN       : {info['san']}")
+        if wanted is None or 'issuer' in wanted:
+            if info['issuer']:
+                out_lines.append(f"Issuer    : {' | '.join(info['issuer'])}")
+    return out_lines
+
+def print_block(lbl, max_lbl, out_lines):
+    pad = ' ' * (max_lbl - len(lbl) + 1)
+    print(f"{lbl}{pad}{out_lines[0]}")
+    indent = ' ' * (max_lbl + 1)
+    for extra in out_lines[1:]:
+        print(f"{indent}{extra}")
+
 def check_cert(ip, port):
+    target = f"{ip}:{port}"
     cmd = ["nmap","-Pn","--script","ssl-cert",f"-p{port}",ip]
-    out, _ = subprocess.Popen(cmd, stdout=subprocess.PIPE,
-                              stderr=subprocess.PIPE,
-                              text=True).communicate()
+    with stats.stage("spawn", target):
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE,
+                                text=True)
+    with stats.stage("scan", target):
+        out, _ = proc.communicate()
 
     if "filtered" in out:            return {"error":"Connection timeout"}
     if "closed" in out:              return {"error":"Connection refused"}
     if "open" in out and "ssl-cert:" not in out:
         return {"error":"Certificate not found"}
 
-    subject, san, issuer, nb, na = parse_cert_output(out)
+    with stats.stage("parse", target):
+        subject, san, issuer, nb, na = parse_cert_output(out)
     if not nb or not na:
         return {"error":"Certificate information not found"}
 
-    na_dt = datetime.strptime(na, "%Y-%m-%dT%H:%M:%S")
-    days = (na_dt - datetime.now()).days
-    if days < 0:
-        status_text = f"Expired {abs(days)} days ago"
-        expired = True
-    else:
-        status_text = f"{days} days until expiry"
-        expired = False
-
+    status_text, expired = validity_status(na)
     return {
         "subject"    : split_dn(subject),
         "san"        : san,
@@ -69,8 +105,18 @@ def main():
                    help='Comma-separated fields: status,subject,san,issuer')
     p.add_argument('-p','--ports', default='443',
                    help='Comma-separated default ports (default: 443)')
+    p.add_argument('--stats', action='store_true',
+                   help='Print per-stage timing and error counts to stderr when done')
+    p.add_argument('--trace', metavar='FILE',
+                   help='Write a JSON timing trace to FILE')
     p.add_argument('file', help='IP list, one per line, optionally with :port')
+    checkpoint.add_arguments(p, 'file')
+    profiling.add_arguments(p)
     args = p.parse_args()
+    profiling.start(args)
+    stats.enabled = args.stats or bool(args.trace)
+    journal = checkpoint.journal_for(args, args.file, "bulk-cert-nmap-check")
+    done = journal.load() if args.resume else {}
 
     if args.fields:
         wanted = {f.strip().lower() for f in args.fields.split(',')}
@@ -92,31 +138,22 @@ def main():
     labels_colon = [f"{ip}:{port} ->" for ip,port in targets]
     max_lbl = max(len(lbl) for lbl in labels_colon)
 
-    for (ip,port), lbl in zip(targets, labels_colon):
-        info = check_cert(ip, port)
-
-        out_lines = []
-        if "error" in info:
-            out_lines.append(f"Error     : {info['error']}")
-        else:
-            if wanted is None or 'status' in wanted:
-                st = red(info['status_text']) if info['expired'] else green(info['status_text'])
-                out_lines.append(f"Status    : {st} ({info['not_before']} -> {info['not_after']})")
-            if wanted is None or 'subject' in wanted:
-                if info['subject']:
-                    out_lines.append(f"Subject   : {' | '.join(info['subject'])}")
-            if wanted is None or 'san' in wanted:
-                if info['san']:
-                    out_lines.append(f"SAN       : {info['san']}")
-            if wanted is None or 'issuer' in wanted:
-                if info['issuer']:
-                    out_lines.append(f"Issuer    : {' | '.join(info['issuer'])}")
-
-        pad = ' ' * (max_lbl - len(lbl) + 1)
-        print(f"{lbl}{pad}{out_lines[0]}")
-        indent = ' ' * (max_lbl + 1)
-        for extra in out_lines[1:]:
-            print(f"{indent}{extra}")
+    with journal.open(resume=args.resume, restart=args.restart):
+        for (ip,port), lbl in zip(targets, labels_colon):
+            key = f"{ip}:{port}"
+            if key in done:
+                stats.count("resumed from journal")
+                info = done[key]
+            else:
+                with stats.target(key):
+                    info = check_cert(ip, port)
+                if "error" in info:
+                    stats.error(info['error'])
+                journal.record(key, info)
+
+            print_block(lbl, max_lbl, result_lines(info, wanted))
+
+    stats.finish(args.trace)
 
 if __name__ == "__main__":
     main()
@@ -2,6 +2,7 @@ import subprocess
 import sys
 from datetime import datetime, timedelta
 import argparse
+import profiling
 
 
 def check_cert(ip, port):  # Updated this line
@@ -48,7 +49,9 @@ def main():
         'file', help='File containing IP addresses, one per line, optionally followed by :port.')
     parser.add_argument('-p', '--ports', default='443',
                         help='Comma-separated list of ports to check. Default is 443.')
+    profiling.add_arguments(parser)
     args = parser.parse_args()
+    profiling.start(args)
 
     # Remove duplicates by converting to a set and back to a list
     default_ports = list(set(args.ports.split(',')))
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Chain verification cache for bulk-CA-check.py --fast.
+
+Across a fleet the same few intermediate-to-root paths are presented over
+and over. ChainCache memoizes the verdict for a path under the SHA-256
+fingerprints of the presented intermediates (plus the trust store in
+use), in an in-memory LRU backed by a JSON file. On a hit only the leaf
+step is redone for the host, and OpenSSL does it: context() trusts the
+first intermediate of every cached path as a partial-chain anchor, so a
+handshake with it checks the leaf's signature, validity period and
+serverAuth purpose against that intermediate. lookup() then only has to
+confirm the handshake anchored on the intermediate the host presented.
+A verdict is only stored after the same check has passed for the host
+that earned it, so a bad leaf never leaves its verdict on a shared path.
+"""
+
+import hashlib
+import json
+import os
+import ssl
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+DEFAULT_CACHE_PATH = os.path.expanduser("~/.cache/bulk-CA-check/chains.json")
+DEFAULT_CACHE_SIZE = 4096
+
+# Only verdicts that depend on the intermediates alone are worth caching.
+CACHEABLE_VERDICTS = {
+    "Ok",
+    "NOT ok (chain incomplete)",
+    "NOT ok (self signed CA in chain)",
+}
+
+
+def trust_store_id(cafile=None):
+    """Identify the trust anchors in use so a changed store invalidates old verdicts."""
+    paths = [cafile] if cafile else [ssl.get_default_verify_paths().cafile, ssl.get_default_verify_paths().capath]
+    parts = []
+    for path in paths:
+        if path and os.path.exists(path):
+            info = os.stat(path)
+            parts.append(f"{os.path.abspath(path)}:{info.st_size}:{int(info.st_mtime)}")
+    return "|".join(parts) or "system"
+
+
+def anchor_context(*anchors):
+    """
+    Verifying client context that trusts the given certificates (PEM or
+    DER) as partial-chain anchors and nothing else, hostnames aside.
+    """
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.check_hostname = False
+    context.verify_flags |= ssl.VERIFY_X509_PARTIAL_CHAIN
+    for anchor in anchors:
+        context.load_verify_locations(cadata=anchor)
+    return context
+
+
+class ChainCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, size=DEFAULT_CACHE_SIZE, cafile=None):
+        self.path = path
+        self.size = size
+        self.trust = trust_store_id(cafile)
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._context = None
+        self.load()
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as fh:
+                stored = json.load(fh)
+        except (OSError, json.JSONDecodeError):
+            return
+        now = time.time()
+        for key, entry in stored.items():
+            # Entries without an anchor predate the OpenSSL leaf step.
+            if entry.get("expires", 0) > now and entry.get("anchor"):
+                self.entries[key] = entry
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with self.lock:
+            with open(tmp_path, 'w') as fh:
+                json.dump(self.entries, fh)
+        os.replace(tmp_path, self.path)
+
+    def key(self, chain_der):
+        digest = hashlib.sha256(self.trust.encode())
+        for der in chain_der[1:]:
+            digest.update(hashlib.sha256(der).digest())
+        return digest.hexdigest()
+
+    def context(self):
+        """
+        Verifying client context whose only trust anchors are the cached
+        first intermediates, or None while the cache is empty. Verdicts
+        stored later are added to it as they come in.
+        """
+        with self.lock:
+            if self._context is None and self.entries:
+                context = anchor_context()
+                for key, entry in list(self.entries.items()):
+                    try:
+                        context.load_verify_locations(cadata=entry["anchor"])
+                    except (ssl.SSLError, TypeError):
+                        del self.entries[key]
+                self._context = context
+            return self._context
+
+    def lookup(self, chain_der, verified_der):
+        """
+        Chain of trust verdict for a presented chain, or None on a miss.
+        verified_der is the chain a handshake with context() verified; it
+        must run from the leaf to the presented first intermediate, so the
+        leaf step passed against the intermediate the cached path starts
+        with. Pass an empty one when that handshake failed.
+        """
+        key = None
+        if len(chain_der) >= 2 and verified_der[:2] == chain_der[:2]:
+            key = self.key(chain_der)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry["expires"] <= time.time():
+                del self.entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return entry["verdict"]
+
+    def wants(self, chain_der, verdict):
+        """True if store() would add or change an entry for this chain and verdict."""
+        if len(chain_der) < 2 or verdict not in CACHEABLE_VERDICTS:
+            return False
+        with self.lock:
+            entry = self.entries.get(self.key(chain_der))
+        return entry is None or entry["verdict"] != verdict
+
+    def store(self, chain_der, intermediate_infos, verdict):
+        """
+        Remember a full verification's verdict for the intermediates. The
+        caller must have checked that the leaf verifies with the first
+        intermediate as its anchor (anchor_context()); otherwise a failing
+        verdict could be down to the leaf and would wrongly stick to a
+        path other hosts share.
+        """
+        if not self.wants(chain_der, verdict):
+            return
+        try:
+            expires = min(ssl.cert_time_to_seconds(info["notAfter"]) for info in intermediate_infos)
+        except (KeyError, ValueError):
+            return
+        anchor = ssl.DER_cert_to_PEM_cert(chain_der[1])
+        try:
+            anchor_context(anchor)
+        except ssl.SSLError:
+            return
+        entry = {
+            "verdict": verdict,
+            "expires": expires,
+            "anchor": anchor,
+            "stored": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        key = self.key(chain_der)
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+            if self._context is not None:
+                self._context.load_verify_locations(cadata=anchor)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Append-only checkpoint journal for resumable bulk runs.
+
+Every run journals to <input>.journal unless told otherwise, and every
+finished target is written as one JSON line holding its result, so a run
+that dies part way can be restarted with --resume: targets already in the
+journal are skipped and their stored results replayed into the report.
+Writes are flushed immediately but fsync()ed in batches to keep the
+per-target cost low; a torn last line from a crash is ignored on load.
+The default journal is removed once a run completes, and a leftover one is
+never overwritten without --restart.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+JOURNAL_VERSION = 1
+
+
+class Journal:
+    def __init__(self, path, tool, keep=True, sync_every=25, sync_interval=5.0):
+        self.path = path
+        self.tool = tool
+        self.keep = keep
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.fh = None
+        self.valid_size = None
+        self.pending = 0
+        self.last_sync = time.monotonic()
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    def load(self):
+        """Return {target: result} for everything recorded so far."""
+        done = {}
+        if not self.enabled or not os.path.exists(self.path):
+            return done
+        offset = 0
+        with open(self.path, 'rb') as fh:
+            for line in fh:
+                if not line.endswith(b'\n'):
+                    # Torn write from an interrupted run.
+                    break
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                offset += len(line)
+                if "journal" in entry:
+                    if entry["journal"] != self.tool:
+                        sys.exit(f"Journal '{self.path}' was written by {entry['journal']}, not {self.tool}.")
+                    continue
+                done[entry["target"]] = entry["result"]
+        self.valid_size = offset
+        return done
+
+    def open(self, resume=False, restart=False):
+        """Start a fresh journal, or append to the existing one when resuming.
+
+        Existing results are only discarded when restart is set.
+        """
+        if not self.enabled:
+            return self
+        exists = os.path.exists(self.path) and os.path.getsize(self.path) > 0
+        if exists and not resume and not restart:
+            sys.exit(f"Journal '{self.path}' already holds results; "
+                     f"pass --resume to continue that run or --restart to discard it.")
+        fresh = not resume or not exists
+        if not fresh and self.valid_size is not None:
+            # Drop a torn tail so new records start on a clean line.
+            os.truncate(self.path, self.valid_size)
+        self.fh = open(self.path, 'w' if fresh else 'a')
+        if fresh:
+            self.write({"journal": self.tool, "version": JOURNAL_VERSION, "started": time.time()})
+            self.sync()
+        return self
+
+    def write(self, entry):
+        self.fh.write(json.dumps(entry) + '\n')
+        self.fh.flush()
+
+    def record(self, target, result):
+        if self.fh is None:
+            return
+        with self.lock:
+            self.write({"target": target, "result": result})
+            self.pending += 1
+            if self.pending >= self.sync_every or time.monotonic() - self.last_sync >= self.sync_interval:
+                self.sync()
+
+    def sync(self):
+        os.fsync(self.fh.fileno())
+        self.pending = 0
+        self.last_sync = time.monotonic()
+
+    def close(self):
+        if self.fh is None:
+            return
+        with self.lock:
+            self.sync()
+            self.fh.close()
+            self.fh = None
+
+    def finish(self):
+        """Close the journal after a completed run, removing it unless it is kept."""
+        self.close()
+        if self.enabled and not self.keep:
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.finish()
+        else:
+            self.close()
+
+
+def add_arguments(parser, input_name):
+    parser.add_argument('--journal', metavar='FILE',
+                        help=f'Record every finished target in FILE and keep it afterwards '
+                             f'(default: <{input_name}>.journal, removed when the run completes)')
+    parser.add_argument('--no-journal', action='store_true',
+                        help='Do not record finished targets; the run cannot be resumed')
+    parser.add_argument('--resume', action='store_true',
+                        help='Skip targets already in the journal and replay their results')
+    parser.add_argument('--restart', action='store_true',
+                        help='Discard an unfinished journal instead of refusing to start')
+
+
+def journal_for(args, input_file, tool):
+    """--journal FILE is kept after the run; otherwise <input>.journal is used and cleaned up."""
+    if args.no_journal:
+        return Journal(None, tool)
+    if args.journal:
+        return Journal(args.journal, tool)
+    return Journal(f"{input_file}.journal", tool, keep=False)
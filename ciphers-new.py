@@ -6,8 +6,18 @@ import json
 import subprocess
 import os
 import argparse
+import atexit
 from bs4 import BeautifulSoup
 import xml.etree.ElementTree as ET
+from scanstats import ScanStats
+import profiling
+
+stats = ScanStats("ciphers-new")
+
+# Overridable so the tool can be pointed at a mirror or local fixtures (see bench_scanners.py).
+IANA_TLS_PARAMETERS_URL = os.environ.get(
+    'CIPHERS_IANA_URL', 'https://www.iana.org/assignments/tls-parameters/tls-parameters.xml')
+CIPHERSUITE_INFO_URL = os.environ.get('CIPHERS_CIPHERSUITE_URL', 'https://ciphersuite.info').rstrip('/')
 
 # ANSI color codes
 color_warning = "\033[38;5;208m"  # Similar to #f9a009
@@ -37,8 +47,9 @@ def get_ciphers_from_url(tls_version):
             version_url = 'xtls13'
         else:
             raise ValueError("Unsupported TLS version")
-        url = f'https://ciphersuite.info/cs/?security={security_level}&tls={version_url}'
-        response = requests.get(url)
+        url = f'{CIPHERSUITE_INFO_URL}/cs/?security={security_level}&tls={version_url}'
+        with stats.stage("http", security_level):
+            response = requests.get(url)
         if response.status_code == 200:
             soup = BeautifulSoup(response.content, 'html.parser')
             cipher_elements = soup.select('ul.prettylist li a span.break-all')
@@ -57,8 +68,9 @@ def check_for_updates(testssl_path):
         os.chdir(testssl_path)
 
         # Check for updates
-        result = subprocess.run(
-            ["git", "pull"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        with stats.stage("git pull"):
+            result = subprocess.run(
+                ["git", "pull"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
         if "Already up to date." not in result.stdout:
             print("Updating testssl.sh...")
             print(result.stdout)
@@ -69,21 +81,26 @@ def check_for_updates(testssl_path):
         print(f"Failed to check for updates to testssl.sh: {str(e)}")
 
 def fetch_iana_tls_parameters():
-    url = 'https://www.iana.org/assignments/tls-parameters/tls-parameters.xml'
+    url = IANA_TLS_PARAMETERS_URL
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        xml_content = response.content
-        root = ET.fromstring(xml_content)
-        root = remove_namespace(root)
+        with stats.stage("iana fetch"):
+            response = requests.get(url)
+            response.raise_for_status()
+        with stats.stage("iana parse"):
+            xml_content = response.content
+            root = ET.fromstring(xml_content)
+            root = remove_namespace(root)
         return root
     except requests.exceptions.RequestException as e:
+        stats.error("IANA fetch failed")
         print(f"Error fetching IANA TLS parameters: {str(e)}")
         return None
     except ET.ParseError as e:
+        stats.error("IANA XML parse failed")
         print(f"Error parsing IANA TLS parameters XML: {str(e)}")
         return None
     except Exception as e:
+        stats.error("IANA unexpected error")
         print(f"An unexpected error occurred: {str(e)}")
         return None
 
@@ -146,8 +163,10 @@ def get_security_level(cipher, iana_cipher_mapping):
 
     # Attempt to fetch from ciphersuite.info
     try:
-        url = f'https://ciphersuite.info/cs/{cipher}/'
-        response = requests.get(url, timeout=5)
+        url = f'{CIPHERSUITE_INFO_URL}/cs/{cipher}/'
+        with stats.stage("http", cipher):
+            response = requests.get(url, timeout=5)
+        stats.count(f"ciphersuite.info HTTP {response.status_code}")
         if response.status_code == 200:
             ciphersuite_available = True
             soup = BeautifulSoup(response.content, 'html.parser')
@@ -173,6 +192,7 @@ def get_security_level(cipher, iana_cipher_mapping):
                     description = p_tag.text.strip()
                     ciphersuite_alerts.setdefault(category, []).append((name, description))
     except Exception:
+        stats.error("ciphersuite.info lookup failed")
         ciphersuite_level = 'Not Found'
         ciphersuite_available = False
 
@@ -277,6 +297,22 @@ def find_testssl():
 
 
 def run_testssl(target, testssl_path, iana_cipher_mapping, light_mode=False, noinfo=False):
+    testssl_script = os.path.join(testssl_path, "testssl.sh")
+    try:
+        with stats.stage("testssl", target):
+            result = subprocess.run([testssl_script, "--warnings", "off", "-P", target],
+                                    stdout=subprocess.PIPE,
+                                    stderr=subprocess.PIPE,
+                                    text=True)
+        # Extract and check ciphers
+        print_ciphers(result.stdout.splitlines(), iana_cipher_mapping, light_mode, noinfo)
+    except Exception as e:
+        stats.error("testssl.sh failed to run")
+        print(f"Failed to run testssl.sh: {str(e)}")
+
+
+def print_ciphers(lines, iana_cipher_mapping, light_mode=False, noinfo=False):
+    """Print the protocol lines of a testssl.sh -P run with every cipher classified."""
     color_warning = "\033[38;5;208m"  # Similar to #f9a009
     color_danger = "\033[31m"  # Red, similar to #ff0000
     color_info = "\033[32m"  # Green, similar to the Info color
@@ -288,93 +324,88 @@ def run_testssl(target, testssl_path, iana_cipher_mapping, light_mode=False, noi
                    'recommended': color_info,
                    'unknown': color_reset, 'not found': color_reset}
 
-    testssl_script = os.path.join(testssl_path, "testssl.sh")
-    try:
-        result = subprocess.run([testssl_script, "--warnings", "off", "-P", target],
-                                stdout=subprocess.PIPE,
-                                stderr=subprocess.PIPE,
-                                text=True)
-        # Extract and check ciphers
-        lines = result.stdout.splitlines()
-
-        # Step 1: Extract cipher names and determine the maximum length
-        cipher_names = [line.split()[-1] for line in lines if "TLS_" in line]
-        if cipher_names:
-            max_cipher_name_length = max(len(cipher_name) for cipher_name in cipher_names)
-        else:
-            max_cipher_name_length = 0
-
-        # Set column widths
-        cipher_col_width = max_cipher_name_length
-        dtls_col_width = 8
-        rec_col_width = 12
-        sec_level_col_width = 15
-
-        header_format = f"{{:<{cipher_col_width}}}  {{:<{dtls_col_width}}}  {{:<{rec_col_width}}}  {{:<{sec_level_col_width}}}  {{}}"
-        data_format = f"{{:<{cipher_col_width}}}  {{:<{dtls_col_width}}}  {{:<{rec_col_width}}}  {{:<{sec_level_col_width}}}  {{}}"
-
-        if light_mode:
-            # Print header
-            header_line1 = header_format.format('Cipher', 'DTLS-OK', 'Recommended', 'Security Level', 'Alerts')
-            header_line2 = header_format.format(' ' * cipher_col_width, '(IANA)', '(IANA)', '', '')
-            print(header_line1)
-            print(header_line2)
-            print('-' * len(header_line1))
-
-        for line in lines:
-            if "SSLv" in line or "TLSv1" in line:
-                print(line)
-            elif "TLS_" in line:
-                parts = line.split()
-                cipher = parts[-1]
+    # Step 1: Extract cipher names and determine the maximum length
+    cipher_names = [line.split()[-1] for line in lines if "TLS_" in line]
+    if cipher_names:
+        max_cipher_name_length = max(len(cipher_name) for cipher_name in cipher_names)
+    else:
+        max_cipher_name_length = 0
+
+    # Set column widths
+    cipher_col_width = max_cipher_name_length
+    dtls_col_width = 8
+    rec_col_width = 12
+    sec_level_col_width = 15
+
+    header_format = f"{{:<{cipher_col_width}}}  {{:<{dtls_col_width}}}  {{:<{rec_col_width}}}  {{:<{sec_level_col_width}}}  {{}}"
+    data_format = f"{{:<{cipher_col_width}}}  {{:<{dtls_col_width}}}  {{:<{rec_col_width}}}  {{:<{sec_level_col_width}}}  {{}}"
+
+    if light_mode:
+        # Print header
+        header_line1 = header_format.format('Cipher', 'DTLS-OK', 'Recommended', 'Security Level', 'Alerts')
+        header_line2 = header_format.format(' ' * cipher_col_width, '(IANA)', '(IANA)', '', '')
+        print(header_line1)
+        print(header_line2)
+        print('-' * len(header_line1))
+
+    for line in lines:
+        if "SSLv" in line or "TLSv1" in line:
+            print(line)
+        elif "TLS_" in line:
+            parts = line.split()
+            cipher = parts[-1]
+            stats.count("ciphers classified")
+            with stats.stage("classify", cipher):
                 security_level, alert_categories, dtls_value, rec_value = get_security_level(cipher, iana_cipher_mapping)
 
-                if security_level == 'Not Found':
-                    print(f"{line}\tCipher not found on ciphersuite.info")
-                    continue
-
-                # Group and color alert names only
-                colored_alerts = []
-                for category in ['Danger', 'Warning', 'Info']:
-                    if noinfo and category == 'Info':
-                        continue  # Skip "Info" category
-                    color_code = color_info if category == 'Info' else color_warning if category == 'Warning' else color_danger
-                    alert_names = [alert[0] for alert in alert_categories[category]]
-                    colored_alerts.extend([f"{color_code}{name}{color_reset}" for name in alert_names])
-
-                # Color the security level
-                level_color_code = color_codes.get(security_level.lower(), color_reset)
-                colored_level = f"{level_color_code}{security_level}{color_reset}"
-
-                # Check if there are any alerts to display
-                if colored_alerts:
-                    alert_info = f"[{'; '.join(colored_alerts)}]"
-                else:
-                    alert_info = ""
-
-                if light_mode:
-                    print(data_format.format(cipher, dtls_value, rec_value, colored_level, alert_info))
-                else:
-                    # For full mode, you can adjust the output as needed
-                    print(f"{line}\tIANA DTLS-OK: {dtls_value}\tIANA Recommended: {rec_value}\t{colored_level}\t{alert_info}")
-    except Exception as e:
-        print(f"Failed to run testssl.sh: {str(e)}")
+            if security_level == 'Not Found':
+                print(f"{line}\tCipher not found on ciphersuite.info")
+                continue
+
+            # Group and color alert names only
+            colored_alerts = []
+            for category in ['Danger', 'Warning', 'Info']:
+                if noinfo and category == 'Info':
+                    continue  # Skip "Info" category
+                color_code = color_info if category == 'Info' else color_warning if category == 'Warning' else color_danger
+                alert_names = [alert[0] for alert in alert_categories[category]]
+                colored_alerts.extend([f"{color_code}{name}{color_reset}" for name in alert_names])
+
+            # Color the security level
+            level_color_code = color_codes.get(security_level.lower(), color_reset)
+            colored_level = f"{level_color_code}{security_level}{color_reset}"
+
+            # Check if there are any alerts to display
+            if colored_alerts:
+                alert_info = f"[{'; '.join(colored_alerts)}]"
+            else:
+                alert_info = ""
+
+            if light_mode:
+                print(data_format.format(cipher, dtls_value, rec_value, colored_level, alert_info))
+            else:
+                # For full mode, you can adjust the output as needed
+                print(f"{line}\tIANA DTLS-OK: {dtls_value}\tIANA Recommended: {rec_value}\t{colored_level}\t{alert_info}")
+
+
+def load_testssl_path():
+    """testssl.sh's directory from ~/.ciphers, searching (and remembering it) when unset or stale."""
+    config_file_path = os.path.expanduser("~/.ciphers")
+    testssl_path = None
+
+    if os.path.exists(config_file_path):
+        with open(config_file_path, 'r') as file:
+            testssl_path = file.read().strip()
+            if not os.path.exists(testssl_path):
+                testssl_path = None
+
+    if testssl_path is None:
+        testssl_path = find_testssl()
+        with open(config_file_path, 'w') as file:
+            file.write(testssl_path)
+    return testssl_path
 
 
-config_file_path = os.path.expanduser("~/.ciphers")
-testssl_path = None
-
-if os.path.exists(config_file_path):
-    with open(config_file_path, 'r') as file:
-        testssl_path = file.read().strip()
-        if not os.path.exists(testssl_path):
-            testssl_path = None
-
-if testssl_path is None:
-    testssl_path = find_testssl()
-    with open(config_file_path, 'w') as file:
-        file.write(testssl_path)
-
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(
         description='A script to assess the security level of SSL/TLS ciphers used by a target system or a specific cipher.')
@@ -390,9 +421,17 @@ if __name__ == '__main__':
         '--noinfo', action='store_true', help='Do not include "Info" category in the alert output', default=None)
     parser.add_argument(
         '--list-iana-recommended', action='store_true', help='List all ciphers that are recommended according to IANA', default=None)
+    parser.add_argument(
+        '--stats', action='store_true', help='Print per-stage timing and error counts to stderr when done', default=None)
+    parser.add_argument(
+        '--trace', metavar='FILE', help='Write a JSON timing trace to FILE', default=None)
 
+    profiling.add_arguments(parser)
     args = parser.parse_args()
+    profiling.start(args)
     light_mode = args.light
+    stats.enabled = bool(args.stats or args.trace)
+    atexit.register(stats.finish, args.trace)
 
     # Fetch and parse IANA TLS parameters upfront if needed
     if args.tls_version == 'IANA' or args.cipher or args.target:
@@ -448,24 +487,12 @@ if __name__ == '__main__':
                 colored_name = f"{color_code}{name}{color_reset}"
                 print(f"{colored_name}\nDescription: {description}\n")
     elif args.target:
-        # Ensure testssl_path is set
-        config_file_path = os.path.expanduser("~/.ciphers")
-        testssl_path = None
-
-        if os.path.exists(config_file_path):
-            with open(config_file_path, 'r') as file:
-                testssl_path = file.read().strip()
-                if not os.path.exists(testssl_path):
-                    testssl_path = None
-
-        if testssl_path is None:
-            testssl_path = find_testssl()
-            with open(config_file_path, 'w') as file:
-                file.write(testssl_path)
+        testssl_path = load_testssl_path()
 
         # Check for updates and run testssl.sh
         check_for_updates(testssl_path)
-        run_testssl(args.target, testssl_path, iana_cipher_mapping, light_mode=args.light, noinfo=args.noinfo)
+        with stats.target(args.target):
+            run_testssl(args.target, testssl_path, iana_cipher_mapping, light_mode=args.light, noinfo=args.noinfo)
     elif args.tls_version:
         tls_version = args.tls_version.replace('TLS', 'tls')  # Convert TLS1.2 or TLS1.3 to tls12 or tls13
         ciphers = get_ciphers_from_url(tls_version)
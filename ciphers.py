@@ -8,6 +8,7 @@ import os
 import argparse
 from bs4 import BeautifulSoup
 import xml.etree.ElementTree as ET
+import profiling
 
 # ANSI color codes
 color_warning = "\033[38;5;208m"  # Similar to #f9a009
@@ -314,7 +315,9 @@ if __name__ == '__main__':
     parser.add_argument(
         '--noinfo', action='store_true', help='Do not include "Info" category in the alert output', default=None)
 
+    profiling.add_arguments(parser)
     args = parser.parse_args()
+    profiling.start(args)
     light_mode = args.light
 
     # Fetch and parse IANA TLS parameters
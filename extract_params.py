@@ -1,32 +1,45 @@
 import argparse
+import base64
+import codecs
+import glob
 import json
+import os
 import re
+import sys
+import zlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import xml.etree.ElementTree as ET
+from urllib.parse import parse_qsl, urlsplit
 
-def extract_unique_parameters(file_path):
-    try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            content = file.read()
+from paramindex import ParamIndex
+import profiling
 
-        unique_keys = set()
+# Streaming mode reads this many characters at a time.
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+# A brace fragment that grows past this many characters is dropped in
+# streaming mode; scanning restarts after it so inner objects still count.
+DEFAULT_MAX_FRAGMENT = 64 * 1024 * 1024
+# In multi-file mode, text captures larger than this are split into byte
+# ranges that are scanned by different workers.
+DEFAULT_SPLIT_SIZE = 256 * 1024 * 1024
+# How far past a split offset to look for a line that starts a new record.
+SPLIT_LOOKAHEAD = 1024 * 1024
 
-        # Try to parse the whole file as JSON (Postman collection etc.)
-        try:
-            parsed = json.loads(content)
-            unique_keys.update(extract_individual_keys(parsed))
-        except json.JSONDecodeError:
-            pass
+KV_PATTERN = re.compile(r'(?<!\w)([\w\[\]\.]+)(?==)')
+KEY_CHARS = re.compile(r'[\w\[\]\.]*\Z')
+# String values worth a nested json.loads: a container, or JSON encoded twice.
+NESTED_JSON = re.compile(r'[ \t\n\r]*[\[{"]')
+DOCUMENT_STRING = re.compile(r'[ \t\n\r]*"')
 
-        # Fallback: extract brace-based JSON fragments
-        json_fragments = extract_json_fragments(content)
-        for fragment in json_fragments:
-            try:
-                data = json.loads(fragment)
-                unique_keys.update(extract_individual_keys(data))
-            except json.JSONDecodeError:
-                pass
+MULTIPART_NAME = re.compile(rb'Content-Disposition:[^\r\n]*?\bname="([^"]*)"', re.IGNORECASE)
+# Bodies of these types are never scanned for parameters.
+BINARY_TYPES = ('image/', 'audio/', 'video/', 'font/', 'application/octet-stream',
+                'application/pdf', 'application/zip')
 
-        # Extract query/form/cookie parameter keys
-        unique_keys.update(extract_kv_pairs(content))
+def extract_unique_parameters(file_path, stream=False, chunk_size=DEFAULT_CHUNK_SIZE, file_format='auto'):
+    try:
+        unique_keys = file_unique_parameters(file_path, stream, chunk_size, file_format)
 
         # Print sorted unique keys
         for key in sorted(unique_keys):
@@ -37,67 +50,996 @@ def extract_unique_parameters(file_path):
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
 
+def iter_text_params(file_path, chunk_size=DEFAULT_CHUNK_SIZE, max_fragment=DEFAULT_MAX_FRAGMENT):
+    """
+    (endpoint, location, name) for a plain text capture, scanned the way
+    stream_unique_parameters() does it. Text has no reliable request
+    boundaries, so the endpoint is empty; names from brace fragments are
+    'json' and key=value names are 'text'.
+    """
+    scanner = FragmentScanner(max_fragment)
+    kv_scanner = KVScanner()
+    document = DocumentScanner(max_fragment)
+    with open(file_path, 'r', encoding='utf-8') as file:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            document.feed(chunk)
+            for fragment in scanner.feed(chunk):
+                for name in fragment_keys(fragment):
+                    yield '', 'json', name
+            for name in kv_scanner.feed(chunk):
+                yield '', 'text', name
+    for name in kv_scanner.close():
+        yield '', 'text', name
+    for name in document.close():
+        yield '', 'json', name
+
+def parameter_counts(file_path, chunk_size=DEFAULT_CHUNK_SIZE, file_format='auto'):
+    """
+    Return (format, Counter) where the Counter maps (endpoint, location,
+    name) to the number of messages, fragments or key=value pairs the
+    name was seen in. This is what the parameter index stores per file.
+    """
+    if file_format == 'auto':
+        file_format = sniff_format(file_path)
+    if file_format == 'burp':
+        records = iter_burp_params(file_path)
+    elif file_format == 'har':
+        records = iter_har_params(file_path, chunk_size)
+    elif file_format == 'postman':
+        records = iter_postman_params(file_path, chunk_size)
+    else:
+        records = iter_text_params(file_path, chunk_size)
+    return file_format, Counter(records)
+
+def file_unique_parameters(file_path, stream=False, chunk_size=DEFAULT_CHUNK_SIZE, file_format='auto'):
+    """Return the parameter names in one file, read the way its format needs."""
+    if file_format == 'auto':
+        file_format = sniff_format(file_path)
+
+    if file_format == 'burp':
+        return burp_unique_parameters(file_path)
+    if file_format == 'har':
+        return har_unique_parameters(file_path, chunk_size)
+    if file_format == 'postman':
+        return postman_unique_parameters(file_path, chunk_size)
+    if stream:
+        return stream_unique_parameters(file_path, chunk_size)
+    return collect_unique_parameters(file_path)
+
+def collect_unique_parameters(file_path):
+    """
+    Read the whole file and return the set of parameter names in it.
+
+    Each piece of JSON is decoded once. A file that is one JSON object or
+    array is also exactly one brace fragment, so the fragment scan covers
+    it and the whole document is only decoded separately when it is a
+    top-level JSON string (an encoded body), which the scan cannot see.
+    """
+    with open(file_path, 'r', encoding='utf-8') as file:
+        content = file.read()
+
+    unique_keys = set()
+
+    # A whole-file JSON string, e.g. a raw body saved on its own.
+    if DOCUMENT_STRING.match(content):
+        try:
+            extract_individual_keys(json.loads(content), unique_keys)
+        except json.JSONDecodeError:
+            pass
+
+    # JSON documents and brace-based fragments embedded in text
+    for fragment in FragmentScanner().feed(content):
+        update_from_fragment(unique_keys, fragment)
+
+    # Extract query/form/cookie parameter keys
+    unique_keys.update(extract_kv_pairs(content))
+
+    return unique_keys
+
+def stream_unique_parameters(file_path, chunk_size=DEFAULT_CHUNK_SIZE, max_fragment=DEFAULT_MAX_FRAGMENT):
+    """
+    Same extraction as collect_unique_parameters() but over fixed-size
+    chunks, so peak memory is one chunk plus the largest open fragment
+    instead of several copies of the whole file. The fragment scanner and
+    the key=value matcher both carry their state across chunk boundaries.
+    A whole-file JSON string is subject to the same max_fragment limit as
+    a brace fragment; past it, its keys are skipped.
+    """
+    unique_keys = set()
+    scanner = FragmentScanner(max_fragment)
+    kv_scanner = KVScanner()
+    document = DocumentScanner(max_fragment)
+
+    with open(file_path, 'r', encoding='utf-8') as file:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            document.feed(chunk)
+            for fragment in scanner.feed(chunk):
+                update_from_fragment(unique_keys, fragment)
+            unique_keys.update(kv_scanner.feed(chunk))
+    unique_keys.update(kv_scanner.close())
+    unique_keys.update(document.close())
+
+    return unique_keys
+
+def expand_inputs(paths):
+    """
+    Turn the command line paths into a list of files. Directories are
+    walked recursively and glob patterns expanded (** included); files
+    found that way are skipped when they look binary, while files named
+    explicitly are always scanned.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            found = []
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                found.extend(os.path.join(root, name) for name in sorted(names))
+        elif glob.has_magic(path):
+            found = sorted(name for name in glob.glob(path, recursive=True) if os.path.isfile(name))
+        else:
+            files.append(path)
+            continue
+        files.extend(name for name in found if not is_binary(name))
+    # The same file reached through two arguments is only scanned once.
+    return list(dict.fromkeys(files))
+
+def is_binary(file_path):
+    try:
+        with open(file_path, 'rb') as file:
+            return b'\0' in file.read(4096)
+    except OSError:
+        return False
+
+def split_points(file_path, size, split_size):
+    """
+    Byte offsets that cut a text capture into ranges of about split_size.
+    Each cut is placed at the start of a line beginning with a letter
+    (a request line, header or log record) so it rarely falls inside a
+    JSON body; a plain line start is used when none is close by.
+    """
+    points = [0]
+    with open(file_path, 'rb') as file:
+        offset = split_size
+        while offset < size:
+            file.seek(offset)
+            window = file.read(SPLIT_LOOKAHEAD)
+            match = re.search(rb'\n[A-Za-z]', window) or re.search(rb'\n', window)
+            if match is None:
+                offset += split_size
+                continue
+            cut = offset + match.start() + 1
+            if cut >= size:
+                break
+            points.append(cut)
+            offset = cut + split_size
+    points.append(size)
+    return points
+
+def scan_range(file_path, start, ends, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Scan a text capture from byte `start` with fresh scanner state up to
+    the first offset in `ends` at which no fragment is open (or the last
+    one). Returns (keys, stop, clean); clean means the range that follows
+    `stop` may also be scanned from a fresh state. Ranges start on a line
+    boundary, so key=value runs never straddle two ranges.
+    """
+    unique_keys = set()
+    scanner = FragmentScanner(DEFAULT_MAX_FRAGMENT)
+    kv_scanner = KVScanner()
+    decoder = codecs.getincrementaldecoder('utf-8')()
+
+    with open(file_path, 'rb') as file:
+        file.seek(start)
+        position = start
+        for stop in ends:
+            while position < stop:
+                data = file.read(min(chunk_size, stop - position))
+                if not data:
+                    break
+                position += len(data)
+                chunk = decoder.decode(data)
+                for fragment in scanner.feed(chunk):
+                    update_from_fragment(unique_keys, fragment)
+                unique_keys.update(kv_scanner.feed(chunk))
+            if not scanner.stack:
+                break
+        # Raises on a truncated UTF-8 sequence, like reading in text mode.
+        decoder.decode(b'', final=True)
+    unique_keys.update(kv_scanner.close())
+
+    return unique_keys, stop, not scanner.stack
+
+def parallel_unique_parameters(files, jobs=None, stream=False, chunk_size=DEFAULT_CHUNK_SIZE,
+                               file_format='auto', split_size=DEFAULT_SPLIT_SIZE):
+    """
+    Scan several files on a process pool and return the merged key set.
+
+    Text captures bigger than split_size are cut into ranges scanned by
+    different workers, each from a fresh state. A range is only trusted
+    when the one before it ended outside any fragment; otherwise the scan
+    carries on from the open range until it reaches a clean boundary, so
+    the result is the same as a --stream run over the whole file. Errors
+    are reported per file on stderr.
+    """
+    unique_keys = set()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        whole = {}
+        ranges = {}
+        for file_path in files:
+            try:
+                kind = sniff_format(file_path) if file_format == 'auto' else file_format
+                size = os.path.getsize(file_path)
+            except OSError as e:
+                report_file_error(file_path, e)
+                continue
+            if kind == 'text' and split_size and size > split_size:
+                points = split_points(file_path, size, split_size)
+                ranges[file_path] = (points, [pool.submit(scan_range, file_path, start, [end], chunk_size)
+                                              for start, end in zip(points, points[1:])])
+            else:
+                whole[file_path] = pool.submit(file_unique_parameters, file_path, stream, chunk_size, kind)
+
+        for file_path, future in whole.items():
+            try:
+                unique_keys.update(future.result())
+            except Exception as e:
+                report_file_error(file_path, e)
+
+        for file_path, (points, futures) in ranges.items():
+            try:
+                unique_keys.update(merge_ranges(file_path, points, futures, chunk_size))
+            except Exception as e:
+                report_file_error(file_path, e)
+
+    return unique_keys
+
+def merge_ranges(file_path, points, futures, chunk_size):
+    """Combine scan_range() results, rescanning from any range that ended inside a fragment."""
+    unique_keys = set()
+    resume = 0
+    for index, future in enumerate(futures):
+        keys, stop, clean = future.result()
+        if points[index] < resume:
+            # Started inside a fragment; covered by the rescan below.
+            continue
+        unique_keys.update(keys)
+        if not clean and index + 2 < len(points):
+            keys, resume, _ = scan_range(file_path, points[index], points[index + 2:], chunk_size)
+            unique_keys.update(keys)
+    return unique_keys
+
+def indexed_unique_parameters(files, index_path, jobs=None, chunk_size=DEFAULT_CHUNK_SIZE, file_format='auto'):
+    """
+    Bring the parameter index up to date for `files` and return their
+    names from it. Files whose size and mtime match the index are not
+    read at all; the rest are scanned on a process pool and replaced in
+    the index one file per transaction. Indexed files that no longer
+    exist are dropped first.
+    """
+    with ParamIndex(index_path) as index:
+        index.prune()
+        indexed, stale = [], {}
+        for file_path in files:
+            try:
+                st = os.stat(file_path)
+                if not index.is_current(file_path):
+                    stale[file_path] = st
+                indexed.append(file_path)
+            except OSError as e:
+                report_file_error(file_path, e)
+
+        if stale:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                futures = {pool.submit(parameter_counts, file_path, chunk_size, file_format): file_path
+                           for file_path in stale}
+                for future, file_path in futures.items():
+                    try:
+                        kind, counts = future.result()
+                    except Exception as e:
+                        report_file_error(file_path, e)
+                        index.forget(file_path)
+                        continue
+                    # The size and mtime from before the scan, so a file that grew meanwhile is redone.
+                    index.replace_file(file_path, kind, counts, stale[file_path])
+
+        return index.names(indexed)
+
+def report_file_error(file_path, error):
+    if isinstance(error, FileNotFoundError):
+        print(f"Error: File '{file_path}' not found.", file=sys.stderr)
+    else:
+        print(f"An unexpected error occurred in '{file_path}': {error}", file=sys.stderr)
+
+def sniff_format(file_path):
+    """Guess the capture format from the first few KB of the file."""
+    with open(file_path, 'rb') as file:
+        head = file.read(4096)
+    if head.lstrip().startswith(b'<?xml') and b'<items burpVersion' in head:
+        return 'burp'
+    if head.lstrip().startswith(b'{'):
+        if b'getpostman.com' in head or b'"_postman_id"' in head:
+            return 'postman'
+        if re.match(rb'\s*\{\s*"log"\s*:', head):
+            return 'har'
+    return 'text'
+
+def iter_burp_items(file_path):
+    """
+    Yield (url, request, response) for each <item> of a Burp "Save items"
+    export, with base64 bodies decoded to bytes. Items are parsed one at
+    a time with iterparse and cleared afterwards, so memory stays constant
+    however many items the export holds.
+    """
+    root = None
+    for event, elem in ET.iterparse(file_path, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            continue
+        if elem.tag != 'item':
+            continue
+        yield (elem.findtext('url') or '',
+               burp_field(elem.find('request')),
+               burp_field(elem.find('response')))
+        elem.clear()
+        root.clear()
+
+def burp_field(elem):
+    if elem is None or not elem.text:
+        return b''
+    if elem.get('base64') == 'true':
+        return base64.b64decode(elem.text)
+    return elem.text.encode('utf-8')
+
+def burp_unique_parameters(file_path):
+    return {name for _, _, name in iter_burp_params(file_path)}
+
+def iter_burp_params(file_path):
+    """(endpoint, location, name) for every parameter of a Burp export."""
+    for url, request, response in iter_burp_items(file_path):
+        endpoint = burp_endpoint(url, request)
+        for location, name in burp_item_params(url, request, response):
+            yield endpoint, location, name
+
+def burp_endpoint(url, request):
+    if url:
+        return urlsplit(url).path
+    parts = split_http_message(request)[0].split(' ') if request else []
+    return urlsplit(parts[1]).path if len(parts) >= 2 else ''
+
+def burp_item_params(url, request, response):
+    """(location, name) pairs for one Burp item's request and response."""
+    if request:
+        yield from http_message_params(request, is_request=True)
+    elif url:
+        yield from query_params(urlsplit(url).query)
+    if response:
+        yield from http_message_params(response, is_request=False)
+
+def split_http_message(raw):
+    """Split a raw HTTP message into (start line, [(name, value)], body)."""
+    head, sep, body = raw.partition(b'\r\n\r\n')
+    if not sep:
+        head, sep, body = raw.partition(b'\n\n')
+    lines = head.decode('iso-8859-1').splitlines()
+    headers = []
+    for line in lines[1:]:
+        name, colon, value = line.partition(':')
+        if colon:
+            headers.append((name.strip().lower(), value.strip()))
+    return (lines[0] if lines else ''), headers, body
+
+def dechunk(body):
+    decoded = []
+    while body:
+        size_line, _, rest = body.partition(b'\r\n')
+        try:
+            size = int(size_line.split(b';')[0], 16)
+        except ValueError:
+            return b''.join(decoded) + body
+        if size == 0:
+            break
+        decoded.append(rest[:size])
+        body = rest[size + 2:]
+    return b''.join(decoded)
+
+def decode_body(headers, body):
+    """Undo chunked transfer encoding and gzip/deflate content encoding."""
+    header_map = dict(headers)
+    if 'chunked' in header_map.get('transfer-encoding', '').lower():
+        body = dechunk(body)
+    encoding = header_map.get('content-encoding', '').lower()
+    try:
+        if encoding in ('gzip', 'x-gzip'):
+            body = zlib.decompress(body, 16 + zlib.MAX_WBITS)
+        elif encoding == 'deflate':
+            body = zlib.decompress(body)
+    except zlib.error:
+        return b''
+    return body
+
+def query_params(query):
+    for name, _ in parse_qsl(query, keep_blank_values=True):
+        if name:
+            yield 'query', name
+
+def cookie_params(header, value):
+    if header == 'set-cookie':
+        value = value.split(';', 1)[0]
+    for pair in value.split(';'):
+        name = pair.split('=', 1)[0].strip()
+        if name:
+            yield 'cookie', name
+
+def http_message_params(raw, is_request):
+    """
+    (location, name) pairs from one raw HTTP message: the request line's
+    query, cookies, key=value pairs in other header values, and the body
+    according to its Content-Type.
+    """
+    start_line, headers, body = split_http_message(raw)
+    if is_request:
+        parts = start_line.split(' ')
+        if len(parts) >= 2:
+            yield from query_params(urlsplit(parts[1]).query)
+
+    for name, value in headers:
+        if name in ('cookie', 'set-cookie'):
+            yield from cookie_params(name, value)
+        else:
+            for key in KV_PATTERN.findall(value):
+                yield 'header', key
+
+    if body:
+        yield from body_params(dict(headers).get('content-type', '').lower(), decode_body(headers, body))
+
+def body_params(content_type, body):
+    if not body or content_type.startswith(BINARY_TYPES):
+        return
+    if 'multipart/form-data' in content_type:
+        for name in MULTIPART_NAME.findall(body):
+            yield 'body', name.decode('utf-8', 'replace')
+        return
+
+    text = body.decode('utf-8', 'replace')
+    if 'application/x-www-form-urlencoded' in content_type:
+        for _, name in query_params(text):
+            yield 'body', name
+        return
+    if 'json' in content_type or text.lstrip()[:1] in ('{', '['):
+        try:
+            for key in extract_individual_keys(json.loads(text)):
+                yield 'json', key
+            return
+        except json.JSONDecodeError:
+            pass
+
+    # HTML, scripts and anything else: the same scan plain text files get.
+    for fragment in extract_json_fragments(text):
+        try:
+            for key in extract_individual_keys(json.loads(fragment)):
+                yield 'json', key
+        except json.JSONDecodeError:
+            pass
+    for key in KV_PATTERN.findall(text):
+        yield 'body', key
+
+# Path component standing for "any element" of a JSON array.
+ITEM = '*'
+
+JSON_TOKEN = re.compile(r'[\s,:]*(?:([{\[])|([}\]])|("[^"\\]*(?:\\.[^"\\]*)*")|(-?[0-9][0-9.eE+-]*|true|false|null))')
+
+class JSONStream:
+    """
+    Incremental JSON reader over a file read in chunks.
+
+    walk(capture) moves through the document keeping only the path of
+    keys (and ITEM for array elements) down to the current value. Values
+    whose path satisfies capture() are yielded already decoded; containers
+    are cut out of the stream raw with a FragmentScanner and handed to
+    json.loads, so the bulk of a HAR or Postman file is decoded at C
+    speed while only one entry is ever held in memory. Everything else is
+    tokenized and dropped.
+    """
+    def __init__(self, file, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        if self.eof:
+            return False
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Match the next token without consuming it, reading more input as needed."""
+        while True:
+            match = JSON_TOKEN.match(self.buf, self.pos)
+            # A token touching the end of the buffer may be cut short (numbers, literals).
+            if match and (match.end() < len(self.buf) or self.eof):
+                return match
+            if not self.fill():
+                return match
+
+    def raw_container(self, start):
+        """Return the raw text of the object/array starting at buf[start]."""
+        scanner = FragmentScanner()
+        piece, offset = self.buf, start
+        while True:
+            for fragment in scanner.feed(piece, offset):
+                self.buf, self.pos = piece, scanner.end
+                return fragment
+            piece, offset = self.file.read(self.chunk_size), 0
+            if not piece:
+                self.eof = True
+                self.buf, self.pos = '', 0
+                return None
+
+    def walk(self, capture):
+        path = []       # keys leading to the innermost open container
+        kinds = []      # '{' or '[' per open container
+        keys = []       # current key per open container
+        expect_key = False
+
+        while True:
+            if expect_key:
+                match = self.peek()
+                if match is None:
+                    return
+                self.pos = match.end()
+                if match.group(2):
+                    expect_key = self.close(path, kinds, keys)
+                elif match.group(3):
+                    keys[-1] = json.loads(match.group(3))
+                    expect_key = False
+                continue
+
+            if not kinds:
+                value_path = ()
+            elif kinds[-1] == '[':
+                value_path = tuple(path) + (ITEM,)
+            else:
+                value_path = tuple(path) + (keys[-1],)
+
+            match = self.peek()
+            if match is None:
+                return
+            if match.group(2):
+                self.pos = match.end()
+                expect_key = self.close(path, kinds, keys)
+                continue
+
+            if match.group(1):
+                if capture(value_path):
+                    raw = self.raw_container(match.start(1))
+                    if raw is None:
+                        return
+                    try:
+                        yield value_path, json.loads(raw)
+                    except json.JSONDecodeError:
+                        pass
+                    expect_key = bool(kinds) and kinds[-1] == '{'
+                    continue
+                self.pos = match.end()
+                if kinds:
+                    path.append(value_path[-1])
+                kinds.append(match.group(1))
+                keys.append(None)
+                expect_key = match.group(1) == '{'
+                continue
+
+            self.pos = match.end()
+            if capture(value_path):
+                yield value_path, json.loads(match.group(3) or match.group(4))
+            expect_key = bool(kinds) and kinds[-1] == '{'
+
+    @staticmethod
+    def close(path, kinds, keys):
+        """Pop the innermost container; return whether the parent expects a key next."""
+        kinds.pop()
+        keys.pop()
+        if kinds:
+            path.pop()
+        return bool(kinds) and kinds[-1] == '{'
+
+def looks_like_json(text):
+    return isinstance(text, str) and text.lstrip()[:1] in ('{', '[')
+
+def json_text_params(text, location='json'):
+    """Keys of a JSON body held in a string, but only if it looks like JSON."""
+    if not looks_like_json(text):
+        return
+    try:
+        for key in extract_individual_keys(json.loads(text)):
+            yield location, key
+    except json.JSONDecodeError:
+        pass
+
+def named(items, field='name'):
+    """The names out of a HAR/Postman list of {name: ..., value: ...} records."""
+    for item in items or ():
+        if isinstance(item, dict) and item.get(field):
+            yield item[field]
+
+def har_entry_params(entry):
+    request = entry.get('request') or {}
+    response = entry.get('response') or {}
+
+    yield from query_params(urlsplit(request.get('url', '')).query)
+    for name in named(request.get('queryString')):
+        yield 'query', name
+    for name in named(request.get('headers')):
+        if not name.startswith(':') and name.lower() != 'cookie':
+            yield 'header', name
+    for name in named(request.get('cookies')):
+        yield 'cookie', name
+    for name in named(response.get('cookies')):
+        yield 'cookie', name
+
+    post_data = request.get('postData') or {}
+    for name in named(post_data.get('params')):
+        yield 'body', name
+    mime_type = (post_data.get('mimeType') or '').lower()
+    text = post_data.get('text') or ''
+    if 'application/x-www-form-urlencoded' in mime_type:
+        for _, name in query_params(text):
+            yield 'body', name
+    else:
+        yield from json_text_params(text)
+
+    content = response.get('content') or {}
+    text = content.get('text') or ''
+    if content.get('encoding') == 'base64':
+        try:
+            text = base64.b64decode(text).decode('utf-8', 'replace')
+        except ValueError:
+            text = ''
+    yield from json_text_params(text)
+
+def har_unique_parameters(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    return {name for _, _, name in iter_har_params(file_path, chunk_size)}
+
+def iter_har_params(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """(endpoint, location, name) for every parameter of a HAR file."""
+    with open(file_path, 'r', encoding='utf-8') as file:
+        for _, entry in JSONStream(file, chunk_size).walk(lambda path: path == ('log', 'entries', ITEM)):
+            if isinstance(entry, dict):
+                request = entry.get('request') or {}
+                endpoint = urlsplit(request.get('url') or '').path if isinstance(request, dict) else ''
+                for location, name in har_entry_params(entry):
+                    yield endpoint, location, name
+
+def postman_request_params(request):
+    if isinstance(request, str):
+        yield from query_params(urlsplit(request).query)
+        return
+    if not isinstance(request, dict):
+        return
+
+    url = request.get('url')
+    if isinstance(url, str):
+        yield from query_params(urlsplit(url).query)
+    elif isinstance(url, dict):
+        yield from query_params(urlsplit(url.get('raw', '')).query)
+        for name in named(url.get('query'), 'key'):
+            yield 'query', name
+        for name in named(url.get('variable'), 'key'):
+            yield 'path', name
+
+    for name in named(request.get('header'), 'key'):
+        if name.lower() == 'cookie':
+            continue
+        yield 'header', name
+
+    body = request.get('body') or {}
+    for mode in ('urlencoded', 'formdata'):
+        for name in named(body.get(mode), 'key'):
+            yield 'body', name
+    yield from json_text_params(body.get('raw'))
+    graphql = body.get('graphql') or {}
+    yield from json_text_params(graphql.get('variables'))
+
+def postman_response_params(response):
+    if not isinstance(response, dict):
+        return
+    yield from postman_request_params(response.get('originalRequest'))
+    for name in named(response.get('cookie')):
+        yield 'cookie', name
+    yield from json_text_params(response.get('body'))
+
+def postman_capture(path):
+    # Requests and saved responses of items at any folder depth.
+    if len(path) >= 3 and path[-1] == 'request' and path[-2] == ITEM and path[-3] == 'item':
+        return True
+    return len(path) >= 4 and path[-1] == ITEM and path[-2] == 'response' and path[-3] == ITEM
+
+def postman_unique_parameters(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    return {name for _, _, name in iter_postman_params(file_path, chunk_size)}
+
+def iter_postman_params(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """(endpoint, location, name) for every parameter of a Postman collection."""
+    with open(file_path, 'r', encoding='utf-8') as file:
+        for path, value in JSONStream(file, chunk_size).walk(postman_capture):
+            if path[-1] == 'request':
+                endpoint, params = postman_endpoint(value), postman_request_params(value)
+            else:
+                request = value.get('originalRequest') if isinstance(value, dict) else None
+                endpoint, params = postman_endpoint(request), postman_response_params(value)
+            for location, name in params:
+                yield endpoint, location, name
+
+def postman_endpoint(request):
+    """URL path of a Postman request, with a leading {{baseUrl}} style variable dropped."""
+    url = request.get('url') if isinstance(request, dict) else request
+    if isinstance(url, dict):
+        if isinstance(url.get('path'), list):
+            return '/' + '/'.join(part if isinstance(part, str) else str((part or {}).get('value', ''))
+                                  for part in url['path'] if isinstance(part, (str, dict)))
+        url = url.get('raw')
+    if not isinstance(url, str):
+        return ''
+    if '://' not in url and url.startswith('{{'):
+        url = '/' + url.partition('/')[2]
+    return urlsplit(url).path
+
+def fragment_keys(fragment):
+    try:
+        return extract_individual_keys(json.loads(fragment))
+    except json.JSONDecodeError:
+        return ()
+
+def update_from_fragment(unique_keys, fragment):
+    try:
+        data = json.loads(fragment)
+        extract_individual_keys(data, unique_keys)
+    except json.JSONDecodeError:
+        pass
+
 def extract_json_fragments(content):
     """
     Extract JSON objects or arrays from content using brace/bracket matching.
+    Braces inside JSON string literals do not count.
+    """
+    return list(FragmentScanner().feed(content))
+
+# Outside a fragment only an opening brace/bracket matters.
+FRAGMENT_START = re.compile(r'[\[{]')
+# Inside a fragment: skip plain text and complete one-line string literals,
+# then capture the next brace/bracket. A captured quote is a literal that
+# does not close on this line or within this chunk.
+FRAGMENT_TOKEN = re.compile(r'[^"\[\]{}]*(?:"[^"\\\n]*(?:\\.[^"\\\n]*)*"[^"\[\]{}]*)*([\[\]{}"])')
+# Resuming inside a string literal carried over from the previous chunk.
+STRING_REST = re.compile(r'[^"\\\n]*(?:\\.[^"\\\n]*)*')
+
+class FragmentScanner:
+    """
+    Brace/bracket matcher that can be fed content piece by piece; the
+    stack, the string/escape state and the open fragment survive between
+    feed() calls.
+
+    The regexes above let re jump from one delimiter to the next (whole
+    string literals are skipped in a single match), so Python code only
+    runs per brace rather than per character. JSON strings cannot contain
+    a raw newline, so a literal still open at a newline means the fragment
+    is not JSON: it is dropped and scanning restarts after the newline.
     """
-    json_fragments = []
-    stack = []
-    current_fragment = []
     open_chars = {'{': '}', '[': ']'}
     close_chars = {'}': '{', ']': '['}
 
-    for char in content:
-        if char in open_chars:
+    def __init__(self, max_fragment=None):
+        self.max_fragment = max_fragment
+        self.stack = []
+        self.pieces = []
+        self.size = 0
+        self.in_string = False
+        self.escape = False
+        self.end = 0
+
+    def reset(self):
+        self.stack.clear()
+        self.pieces = []
+        self.size = 0
+        self.in_string = False
+        self.escape = False
+
+    def feed(self, content, pos=0):
+        close_chars = self.close_chars
+        stack = self.stack
+        end = len(content)
+        start = pos
+
+        while pos < end:
             if not stack:
-                current_fragment = []
-            stack.append(char)
-            current_fragment.append(char)
-        elif char in close_chars:
-            if stack and stack[-1] == close_chars[char]:
-                stack.pop()
-                current_fragment.append(char)
-                if not stack:
-                    fragment = ''.join(current_fragment)
-                    json_fragments.append(fragment)
-            elif stack:
-                stack.pop()
-        elif stack:
-            current_fragment.append(char)
-
-    return json_fragments
-
-def extract_individual_keys(json_obj):
-    """
-    Recursively extract all individual keys from a JSON object.
-    Also attempts to parse JSON strings (e.g. Postman raw bodies).
-    """
-    keys = set()
-    if isinstance(json_obj, dict):
-        for key, value in json_obj.items():
-            keys.add(key)
-            keys.update(extract_individual_keys(value))
-    elif isinstance(json_obj, list):
-        for item in json_obj:
-            keys.update(extract_individual_keys(item))
-    elif isinstance(json_obj, str):
+                match = FRAGMENT_START.search(content, pos)
+                if match is None:
+                    return
+                start = match.start()
+                stack.append(match.group())
+                self.pieces = []
+                self.size = 0
+                pos = match.end()
+                continue
+
+            if self.in_string:
+                if self.escape:
+                    pos += 1
+                    self.escape = False
+                    continue
+                pos = STRING_REST.match(content, pos).end()
+                if pos == end:
+                    break
+                char = content[pos]
+                if char == '"':
+                    self.in_string = False
+                    pos += 1
+                elif char == '\\':
+                    # Escape split from its character by the chunk boundary.
+                    self.escape = True
+                    pos += 1
+                else:
+                    self.reset()
+                    pos += 1
+                continue
+
+            match = FRAGMENT_TOKEN.match(content, pos)
+            if match is None:
+                break
+            token = match.group(1)
+            pos = match.end()
+            if token == '"':
+                self.in_string = True
+            elif token in close_chars:
+                opener = stack.pop()
+                if opener == close_chars[token] and not stack:
+                    # Where the fragment ended in `content`, for callers that resume there.
+                    self.end = pos
+                    yield ''.join(self.pieces) + content[start:pos]
+                    self.pieces = []
+                    self.size = 0
+            else:
+                stack.append(token)
+
+        if stack:
+            self.pieces.append(content[start:])
+            self.size += end - start
+            if self.max_fragment and self.size > self.max_fragment:
+                # Give up on an oversized fragment rather than buffer the file.
+                self.reset()
+
+class KVScanner:
+    """
+    Chunked version of extract_kv_pairs(). A run of key characters at the
+    end of a chunk may continue in the next one, so it is held back and
+    prepended to the next chunk instead of being matched early.
+    """
+    def __init__(self):
+        self.carry = ''
+
+    def feed(self, chunk):
+        content = self.carry + chunk
+        cut = KEY_CHARS.search(content).start()
+        self.carry = content[cut:]
+        return KV_PATTERN.findall(content, 0, cut)
+
+    def close(self):
+        content, self.carry = self.carry, ''
+        return KV_PATTERN.findall(content)
+
+class DocumentScanner:
+    """
+    Chunked version of the whole-file JSON string pass in
+    collect_unique_parameters(). Chunks are only kept while the file can
+    still be one JSON string (its first non-blank character is a quote)
+    of at most max_size characters; close() decodes them.
+    """
+    def __init__(self, max_size=DEFAULT_MAX_FRAGMENT):
+        self.max_size = max_size
+        self.chunks = []
+        self.size = 0
+        self.opened = False
+        self.possible = True
+
+    def feed(self, chunk):
+        if not self.possible:
+            return
+        if not self.opened and chunk.strip(' \t\n\r'):
+            self.opened = True
+            self.possible = DOCUMENT_STRING.match(chunk) is not None
+        self.size += len(chunk)
+        if not self.possible or (self.max_size and self.size > self.max_size):
+            self.possible = False
+            self.chunks = []
+            return
+        self.chunks.append(chunk)
+
+    def close(self):
+        content, self.chunks = ''.join(self.chunks), []
+        if not self.opened or not self.possible:
+            return set()
         try:
-            parsed = json.loads(json_obj)
-            keys.update(extract_individual_keys(parsed))
-        except (json.JSONDecodeError, TypeError):
-            pass
+            return extract_individual_keys(json.loads(content))
+        except json.JSONDecodeError:
+            return set()
+
+def extract_individual_keys(json_obj, keys=None):
+    """
+    Extract all individual keys from a JSON object into `keys` (a new set
+    by default) and return it. Also parses JSON strings (e.g. Postman raw
+    bodies), but only strings that can start a JSON container or a
+    re-encoded JSON string; anything else would just fail to decode.
+    The walk uses an explicit stack, so nesting depth is not bounded by
+    the recursion limit.
+    """
+    if keys is None:
+        keys = set()
+    pending = [json_obj]
+    while pending:
+        value = pending.pop()
+        if isinstance(value, dict):
+            keys.update(value)
+            pending.extend(value.values())
+        elif isinstance(value, list):
+            pending.extend(value)
+        elif isinstance(value, str) and NESTED_JSON.match(value):
+            try:
+                pending.append(json.loads(value))
+            except (json.JSONDecodeError, RecursionError):
+                pass
     return keys
 
 def extract_kv_pairs(content):
     """
     Extract parameter keys from query strings, form data, cookies, headers, and key-value like content.
     """
-    pattern = re.compile(r'(?<!\w)([\w\[\]\.]+)(?==)')
-    return set(pattern.findall(content))
+    return set(KV_PATTERN.findall(content))
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Extract unique JSON and query parameter names from a file.")
-    parser.add_argument("file", help="Path to the file to scan for parameters.")
+    parser.add_argument("paths", nargs="+", metavar="path",
+                        help="Files, directories (scanned recursively) or glob patterns to scan for parameters.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Process the file in bounded chunks so memory stays flat on multi-GB captures.")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"Characters per chunk in --stream mode (default: {DEFAULT_CHUNK_SIZE}).")
+    parser.add_argument("--format", choices=["auto", "text", "burp", "har", "postman"], default="auto",
+                        help="Input format; burp, har and postman are read entry by entry (default: auto-detect).")
+    parser.add_argument("-j", "--jobs", type=int,
+                        help="Worker processes for several files or a split file (default: one per CPU).")
+    parser.add_argument("--split-size", type=int, default=DEFAULT_SPLIT_SIZE,
+                        help=f"With several inputs or --jobs, text files larger than this many bytes are "
+                             f"split across workers; 0 disables splitting (default: {DEFAULT_SPLIT_SIZE}).")
+    parser.add_argument("--index", metavar="DB",
+                        help="Record names, endpoints, locations and counts in this SQLite index and only "
+                             "re-scan files whose size or mtime changed; query it with paramindex.py.")
+    profiling.add_arguments(parser)
     args = parser.parse_args()
+    profiling.start(args)
 
-    extract_unique_parameters(args.file)
+    if args.index:
+        files = expand_inputs(args.paths)
+        for key in sorted(indexed_unique_parameters(files, args.index, args.jobs, args.chunk_size, args.format)):
+            print(key)
+    elif len(args.paths) == 1 and not os.path.isdir(args.paths[0]) and not glob.has_magic(args.paths[0]) \
+            and args.jobs is None:
+        extract_unique_parameters(args.paths[0], stream=args.stream, chunk_size=args.chunk_size,
+                                  file_format=args.format)
+    else:
+        files = expand_inputs(args.paths)
+        for key in sorted(parallel_unique_parameters(files, args.jobs, args.stream, args.chunk_size,
+                                                     args.format, args.split_size)):
+            print(key)
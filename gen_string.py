@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Generate random strings in bulk; the Python replacement for gen_sring.sh.
+
+    python3 gen_string.py 16                      # one string, A-Za-z0-9
+    python3 gen_string.py 12 -l -n 1000000 > ids.txt
+    python3 gen_string.py 8 --charset 'a-f0-9' -n 5000000 --unique -o tokens.txt
+
+Characters come from large os.urandom() reads. Bytes that would bias the
+charset (those at or past the largest multiple of its size) are rejected,
+and the rest are mapped onto it with bytes.translate, a whole batch at a
+time. Output is written in blocks as it is produced, so memory stays flat
+whatever the count.
+
+--unique guarantees no string is repeated without remembering any of
+them: it walks a keyed random permutation of every possible string. That
+is slower than the default mode (-j spreads it over processes), and it
+fails up front when more strings are asked for than the charset and
+length allow.
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import profiling
+
+LETTERS = 'A-Za-z'
+DIGITS = '0-9'
+DEFAULT_CHARSET = 'A-Za-z0-9'
+# Bytes of urandom read per batch.
+DEFAULT_BATCH = 1024 * 1024
+# Feistel rounds of the permutation behind --unique.
+ROUNDS = 4
+# Largest blake2b digest, in bytes.
+BLOCK_BYTES = 64
+
+
+def expand_charset(spec):
+    """'A-Za-z0-9' style spec (as taken by tr) -> bytes of distinct characters, in order."""
+    chars = []
+    i = 0
+    while i < len(spec):
+        if i + 2 < len(spec) and spec[i + 1] == '-':
+            first, last = ord(spec[i]), ord(spec[i + 2])
+            if first > last:
+                raise ValueError(f"bad range '{spec[i:i + 3]}' in charset")
+            chars.extend(range(first, last + 1))
+            i += 3
+        else:
+            chars.append(ord(spec[i]))
+            i += 1
+    if any(c > 127 for c in chars):
+        raise ValueError("charset must be ASCII")
+    charset = bytes(dict.fromkeys(chars))
+    if len(charset) < 2:
+        raise ValueError("charset needs at least two distinct characters")
+    return charset
+
+
+def random_chars(charset, batch=DEFAULT_BATCH):
+    """Endless stream of byte chunks drawn uniformly from charset."""
+    size = len(charset)
+    limit = 256 - 256 % size
+    table = bytes(charset[b % size] for b in range(256))
+    rejected = bytes(range(limit, 256))
+    while True:
+        yield os.urandom(batch).translate(table, rejected)
+
+
+def random_strings(length, count, charset, batch=DEFAULT_BATCH):
+    """Yield blocks of newline-terminated random strings, count strings in total."""
+    chars = random_chars(charset, batch)
+    per_block = max(1, batch // (length + 1))
+    pending = bytearray()
+    while count > 0:
+        lines = min(per_block, count)
+        need = lines * length
+        while len(pending) < need:
+            pending += next(chars)
+        block = bytes(pending[:need])
+        del pending[:need]
+        yield b'\n'.join([block[i:i + length] for i in range(0, need, length)]) + b'\n'
+        count -= lines
+
+
+class Permutation:
+    """
+    Keyed pseudo-random bijection of range(domain): a balanced Feistel
+    network over the smallest even bit width covering it, with cycle
+    walking to stay inside the domain.
+    """
+
+    def __init__(self, domain, key=None):
+        self.domain = domain
+        self.half = max(1, ((domain - 1).bit_length() + 1) // 2)
+        self.mask = (1 << self.half) - 1
+        self.half_bytes = (self.half + 7) // 8
+        key = key or os.urandom(16)
+        # One keyed hash state per round and output block, copied rather
+        # than re-keyed for every call. blake2b digests stop at 64 bytes,
+        # so wider halves are built from counter-numbered blocks.
+        blocks = range(-(-self.half_bytes // BLOCK_BYTES))
+        self.rounds = [[hashlib.blake2b(bytes((i,)) + j.to_bytes(4, 'big'), key=key,
+                                        digest_size=min(BLOCK_BYTES, self.half_bytes - j * BLOCK_BYTES))
+                        for j in blocks] for i in range(ROUNDS)]
+
+    def __call__(self, value):
+        half, mask, width = self.half, self.mask, self.half_bytes
+        while True:
+            left, right = value >> half, value & mask
+            for states in self.rounds:
+                data = right.to_bytes(width, 'big')
+                digest = b''
+                for state in states:
+                    h = state.copy()
+                    h.update(data)
+                    digest += h.digest()
+                left, right = right, left ^ (int.from_bytes(digest, 'big') & mask)
+            value = (left << half) | right
+            if value < self.domain:
+                return value
+
+
+def unique_strings(length, count, charset, batch=DEFAULT_BATCH, jobs=1):
+    """Like random_strings, but no string is ever repeated."""
+    domain = len(charset) ** length
+    if count > domain:
+        raise ValueError(f"only {domain} distinct strings of length {length} exist over this charset")
+    key = os.urandom(16)
+    per_block = max(1, batch // (length + 1))
+    ranges = [(start, min(start + per_block, count)) for start in range(0, count, per_block)]
+    if jobs <= 1 or len(ranges) <= 1:
+        for start, stop in ranges:
+            yield unique_block(length, charset, key, start, stop)
+        return
+    # Every worker walks the same permutation; a bounded window of blocks
+    # in flight keeps the output in order and memory flat.
+    with ProcessPoolExecutor(jobs) as executor:
+        pending = deque()
+        for start, stop in ranges:
+            pending.append(executor.submit(unique_block, length, charset, key, start, stop))
+            if len(pending) >= jobs * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def unique_block(length, charset, key, start, stop):
+    """Newline-terminated strings for positions start..stop-1 of the permutation keyed by key."""
+    size = len(charset)
+    permute = Permutation(size ** length, key)
+    # Encode two characters per divmod; an odd length gets one leading character.
+    pairs = [bytes((a, b)) for a in charset for b in charset]
+    base, odd = size * size, length % 2
+    lines = []
+    for n in range(start, stop):
+        value = permute(n)
+        chunks = []
+        for _ in range(length // 2):
+            value, digit = divmod(value, base)
+            chunks.append(pairs[digit])
+        if odd:
+            chunks.append(charset[value:value + 1])
+        chunks.reverse()
+        lines.append(b''.join(chunks))
+    return b'\n'.join(lines) + b'\n'
+
+
+def write_strings(out, length, count, charset, unique=False, batch=DEFAULT_BATCH, jobs=1):
+    if unique:
+        blocks = unique_strings(length, count, charset, batch, jobs)
+    else:
+        blocks = random_strings(length, count, charset, batch)
+    for block in blocks:
+        out.write(block)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate random strings, one per line.")
+    parser.add_argument('length', type=int, help="Length of each string")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('-l', '--letters', action='store_true', help="Only letters (A-Za-z)")
+    group.add_argument('-d', '--digits', action='store_true', help="Only digits (0-9)")
+    group.add_argument('--charset', help=f"Characters to draw from, tr style (default: {DEFAULT_CHARSET})")
+    parser.add_argument('-n', '--count', type=int, default=1, help="Number of strings (default: 1)")
+    parser.add_argument('--unique', action='store_true', help="Never repeat a string")
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help="Worker processes for --unique (default: 1)")
+    parser.add_argument('-o', '--output', help="Write to this file instead of stdout")
+    parser.add_argument('--batch', type=int, default=DEFAULT_BATCH,
+                        help=f"Bytes of randomness read at a time (default: {DEFAULT_BATCH})")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.start(args)
+
+    if args.length < 1 or args.count < 0:
+        parser.error("length must be positive and count non-negative")
+    spec = LETTERS if args.letters else DIGITS if args.digits else args.charset or DEFAULT_CHARSET
+    try:
+        charset = expand_charset(spec)
+    except ValueError as e:
+        parser.error(str(e))
+
+    options = (args.length, args.count, charset, args.unique, max(256, args.batch), args.jobs)
+    try:
+        if args.output:
+            with open(args.output, 'wb') as out:
+                write_strings(out, *options)
+        else:
+            write_strings(sys.stdout.buffer, *options)
+            sys.stdout.flush()
+    except ValueError as e:
+        parser.error(str(e))
+    except BrokenPipeError:
+        # Piped into head and friends: stop quietly.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+
+
+if __name__ == "__main__":
+    main()
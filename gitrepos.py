@@ -0,0 +1,717 @@
+#!/usr/bin/env python3
+"""
+Repository discovery shared by update-stuff.py and update-stuff1.py.
+
+find_git_repos() walks the tree but never descends into a repository it
+has found (so no .git objects or working trees are listed), nor into
+dependency folders such as node_modules or virtualenvs. With a RepoCache
+every directory's mtime and listing are remembered: on the next run a
+directory whose mtime is unchanged costs one stat() instead of a listing,
+and only directories that actually changed are read again.
+"""
+
+import json
+import mmap
+import os
+import re
+import stat
+import struct
+import subprocess
+import threading
+import zlib
+
+import procgroup
+
+DEFAULT_CACHE_PATH = os.path.expanduser("~/.cache/update-stuff/repos.json")
+CACHE_VERSION = 1
+
+# Directories that never hold tool checkouts of their own.
+SKIP_DIRS = {
+    ".git", "node_modules", "__pycache__", ".venv", "venv", ".tox", ".nox",
+    ".mypy_cache", ".pytest_cache", "site-packages", "dist-packages",
+}
+
+
+class RepoCache:
+    """
+    {directory: [mtime_ns, is_repo, subdirectories]} for every directory
+    visited, persisted as JSON. Adding, removing or renaming an entry
+    changes the parent's mtime, which is what invalidates an entry.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self.dirs = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as fh:
+                stored = json.load(fh)
+        except (OSError, json.JSONDecodeError):
+            return
+        if stored.get("version") == CACHE_VERSION:
+            self.dirs = stored.get("dirs", {})
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with self.lock:
+            with open(tmp_path, 'w') as fh:
+                json.dump({"version": CACHE_VERSION, "dirs": self.dirs}, fh)
+        os.replace(tmp_path, self.path)
+
+    def forget_under(self, root, keep):
+        """Drop entries below root that the last walk no longer reached."""
+        prefix = root.rstrip(os.sep) + os.sep
+        with self.lock:
+            for path in [p for p in self.dirs if (p == root or p.startswith(prefix)) and p not in keep]:
+                del self.dirs[path]
+
+
+def list_directory(path):
+    """(is_repo, sorted subdirectories worth descending into) for one directory."""
+    subdirs = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                if not entry.is_dir(follow_symlinks=False):
+                    continue
+            except OSError:
+                continue
+            if entry.name == ".git":
+                return True, []
+            if entry.name not in SKIP_DIRS:
+                subdirs.append(entry.name)
+    return False, sorted(subdirs)
+
+
+def find_git_repos(root, cache=None):
+    """
+    Return the repositories under `root` (a directory holding a .git
+    directory), top-down and sorted. Repositories nested inside another
+    repository's tree are not looked for.
+    """
+    given, root = root, os.path.abspath(root)
+    repos = []
+    visited = set()
+    pending = [root]
+    while pending:
+        path = pending.pop()
+        try:
+            st = os.stat(path, follow_symlinks=path == root)
+        except OSError:
+            continue
+        if not stat.S_ISDIR(st.st_mode):
+            continue
+        visited.add(path)
+
+        entry = cache.dirs.get(path) if cache is not None else None
+        if entry is not None and entry[0] == st.st_mtime_ns:
+            cache.hits += 1
+            _, is_repo, subdirs = entry
+        else:
+            try:
+                is_repo, subdirs = list_directory(path)
+            except OSError:
+                continue
+            if cache is not None:
+                cache.misses += 1
+                with cache.lock:
+                    cache.dirs[path] = [st.st_mtime_ns, is_repo, subdirs]
+
+        if is_repo:
+            repos.append(path)
+        else:
+            # Reversed so the stack pops them in sorted order.
+            pending.extend(os.path.join(path, name) for name in reversed(subdirs))
+
+    if cache is not None:
+        cache.forget_under(root, visited)
+    if given != root:
+        # Report paths the way the caller spelled the root.
+        repos = [os.path.normpath(os.path.join(given, os.path.relpath(repo, root))) for repo in repos]
+    return repos
+
+
+def discover(root, cache_path=DEFAULT_CACHE_PATH):
+    """find_git_repos() with the on-disk cache loaded and saved around it; None disables the cache."""
+    cache = RepoCache(cache_path) if cache_path else None
+    repos = find_git_repos(root, cache)
+    if cache is not None:
+        try:
+            cache.save()
+        except OSError as e:
+            print(f"Could not save repository cache: {e}")
+    return repos
+
+
+# -- running git -------------------------------------------------------------
+
+# Never stop to ask for credentials; a repo that needs them just fails.
+GIT_ENV = dict(os.environ, GIT_TERMINAL_PROMPT="0", GIT_ASKPASS="echo", SSH_ASKPASS="echo")
+
+
+def run_git(args, repo_path, timeout=None):
+    """
+    Run git in `repo_path` and return (returncode, stdout, stderr), or None
+    if it ran past `timeout` seconds, in which case git and its ssh/remote
+    helpers are killed with its process group.
+    """
+    return procgroup.run(["git"] + args, timeout, cwd=repo_path, stdin=subprocess.DEVNULL, env=GIT_ENV)
+
+
+def remote_unchanged(repo_path, timeout=None):
+    """
+    True when the upstream branch on the remote still points where the
+    local tracking ref and HEAD do, i.e. a pull would do nothing. Costs
+    one `git ls-remote` for that single ref. False when the tip moved and
+    None when it cannot be told (no upstream, unreachable remote, ...),
+    in which case the caller should just pull.
+    """
+    try:
+        repo = GitRepo(repo_path)
+        upstream = repo.upstream()
+        head = repo.head()
+    except (MetadataUnavailable, OSError, ValueError):
+        return None
+    if upstream is None or upstream[0] == ".":
+        return None
+    remote, merge, tracking = upstream
+    try:
+        result = run_git(["ls-remote", "--exit-code", remote, merge], repo_path, timeout)
+    except OSError:
+        return None  # git missing, or the repository vanished under us
+    if result is None or result[0] != 0:
+        return None
+    for line in result[1].splitlines():
+        sha, _, ref = line.partition('\t')
+        if ref == merge:
+            return sha == tracking == head
+    return None
+
+
+def update_error(output):
+    """The status line for a git command that failed with `output`."""
+    if "error:" in output:
+        return f"Error during update: {output.split('error:')[1].strip()}"
+    if "fatal:" in output:
+        return f"Fatal error during update: {output.split('fatal:')[1].strip()}"
+    return f"Error during update: {output.strip() or 'git failed'}"
+
+
+def fast_forward(repo_path, timeout=None):
+    """
+    `git fetch`, then move HEAD to its upstream with `git merge --ff-only`,
+    each step limited to `timeout` seconds. Returns the update status line:
+    "Already up to date.", "Repository updated successfully." or an error.
+    A branch with local commits the upstream lacks is never merged; it is
+    reported as diverged and left for a manual merge.
+    """
+    result = run_git(["fetch"], repo_path, timeout)
+    if result is None:
+        return f"Error during update: timed out after {timeout}s"
+    if result[0] != 0:
+        return update_error(result[1] + result[2])
+    result = run_git(["rev-list", "--left-right", "--count", "HEAD...@{u}"], repo_path, timeout)
+    if result is None:
+        return f"Error during update: timed out after {timeout}s"
+    if result[0] != 0:
+        return update_error(result[1] + result[2])
+    ahead, behind = (int(count) for count in result[1].split())
+    if not behind:
+        return "Already up to date."
+    if ahead:
+        return (f"Error during update: diverged from upstream ({ahead} local, {behind} upstream commits); "
+                f"merge by hand.")
+    result = run_git(["merge", "--ff-only", "-q", "@{u}"], repo_path, timeout)
+    if result is None:
+        return f"Error during update: timed out after {timeout}s"
+    if result[0] != 0:
+        return update_error(result[1] + result[2])
+    return "Repository updated successfully."
+
+
+# -- in-process metadata ----------------------------------------------------
+# Enough of git's on-disk format (refs, packed-refs, config, loose and
+# packed objects) to answer HEAD, upstream and `git describe --tags`
+# without spawning git. Anything unusual raises MetadataUnavailable so
+# callers can fall back to the git CLI.
+
+OBJECT_TYPES = {1: "commit", 2: "tree", 3: "blob", 4: "tag"}
+OFS_DELTA = 6
+REF_DELTA = 7
+# git's default abbreviation for small repositories.
+MIN_ABBREV = 7
+# Give up on in-process describe after this many commits and ask git.
+DESCRIBE_LIMIT = 10000
+
+CONFIG_SECTION = re.compile(r'\s*\[\s*([A-Za-z0-9.-]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]')
+
+
+class MetadataUnavailable(Exception):
+    """The repository uses something the in-process reader does not handle."""
+
+
+class NoTags(Exception):
+    """`git describe --tags` would fail: no tag is reachable from HEAD."""
+
+
+def parse_config(path):
+    """{(section, subsection, key): value} from a git config file (last one wins)."""
+    values = {}
+    section = subsection = None
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as fh:
+            lines = fh.read().splitlines()
+    except FileNotFoundError:
+        return values
+    for line in lines:
+        header = CONFIG_SECTION.match(line)
+        if header:
+            section, subsection = header.group(1).lower(), header.group(2)
+            continue
+        line = line.strip()
+        if not line or line[0] in '#;' or section is None:
+            continue
+        key, _, value = line.partition('=')
+        value = value.strip()
+        if len(value) >= 2 and value[0] == value[-1] == '"':
+            value = value[1:-1]
+        values[(section, subsection, key.strip().lower())] = value
+    if any(key[0] in ('include', 'includeif') for key in values):
+        raise MetadataUnavailable(f"{path} uses include")
+    return values
+
+
+def varint_size(data, pos):
+    """Size varint at the start of a delta: (value, new position)."""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, pos
+
+
+def apply_delta(base, delta):
+    _, pos = varint_size(delta, 0)
+    size, pos = varint_size(delta, pos)
+    out = bytearray()
+    end = len(delta)
+    while pos < end:
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            offset = length = 0
+            for i in range(4):
+                if op & (1 << i):
+                    offset |= delta[pos] << (8 * i)
+                    pos += 1
+            for i in range(3):
+                if op & (0x10 << i):
+                    length |= delta[pos] << (8 * i)
+                    pos += 1
+            out += base[offset:offset + (length or 0x10000)]
+        elif op:
+            out += delta[pos:pos + op]
+            pos += op
+        else:
+            raise MetadataUnavailable("invalid delta opcode")
+    if len(out) != size:
+        raise MetadataUnavailable("delta size mismatch")
+    return bytes(out)
+
+
+class PackFile:
+    """A pack and its version 2 .idx, memory mapped."""
+
+    def __init__(self, idx_path):
+        with open(idx_path, 'rb') as fh:
+            self.idx = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.idx[:8] != b'\xfftOc\x00\x00\x00\x02':
+            raise MetadataUnavailable(f"unsupported pack index {idx_path}")
+        self.fanout = struct.unpack('>256I', self.idx[8:8 + 1024])
+        self.count = self.fanout[255]
+        self.names = 8 + 1024
+        self.offsets = self.names + self.count * 24
+        self.large = self.offsets + self.count * 4
+        with open(idx_path[:-4] + '.pack', 'rb') as fh:
+            self.pack = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def position(self, sha):
+        """Index of a binary sha in the .idx, or None."""
+        first = sha[0]
+        low = self.fanout[first - 1] if first else 0
+        high = self.fanout[first]
+        while low < high:
+            mid = (low + high) // 2
+            name = self.idx[self.names + mid * 20:self.names + mid * 20 + 20]
+            if name < sha:
+                low = mid + 1
+            elif name > sha:
+                high = mid
+            else:
+                return mid
+        return None
+
+    def offset(self, index):
+        value = struct.unpack('>I', self.idx[self.offsets + index * 4:self.offsets + index * 4 + 4])[0]
+        if value & 0x80000000:
+            large = self.large + (value & 0x7fffffff) * 8
+            value = struct.unpack('>Q', self.idx[large:large + 8])[0]
+        return value
+
+    def inflate(self, pos, size):
+        decompressor = zlib.decompressobj()
+        out = []
+        while not decompressor.eof:
+            piece = self.pack[pos:pos + 65536]
+            if not piece:
+                raise MetadataUnavailable("truncated pack")
+            out.append(decompressor.decompress(piece))
+            pos += len(piece)
+        data = b''.join(out)
+        if len(data) != size:
+            raise MetadataUnavailable("pack object size mismatch")
+        return data
+
+    def read_at(self, offset, repo):
+        pack = self.pack
+        byte = pack[offset]
+        kind = (byte >> 4) & 7
+        size = byte & 0x0f
+        shift = 4
+        pos = offset + 1
+        while byte & 0x80:
+            byte = pack[pos]
+            pos += 1
+            size |= (byte & 0x7f) << shift
+            shift += 7
+        if kind == OFS_DELTA:
+            byte = pack[pos]
+            pos += 1
+            distance = byte & 0x7f
+            while byte & 0x80:
+                byte = pack[pos]
+                pos += 1
+                distance = ((distance + 1) << 7) | (byte & 0x7f)
+            base_type, base = self.read_at(offset - distance, repo)
+            return base_type, apply_delta(base, self.inflate(pos, size))
+        if kind == REF_DELTA:
+            base_type, base = repo.read_object(pack[pos:pos + 20].hex())
+            return base_type, apply_delta(base, self.inflate(pos + 20, size))
+        if kind not in OBJECT_TYPES:
+            raise MetadataUnavailable(f"unknown pack object type {kind}")
+        return OBJECT_TYPES[kind], self.inflate(pos, size)
+
+
+class GitRepo:
+    """Read-only view of one repository's refs, config and objects."""
+
+    def __init__(self, path):
+        self.path = path
+        git_dir = os.path.join(path, ".git")
+        if os.path.isfile(git_dir):
+            with open(git_dir, 'r') as fh:
+                line = fh.read().strip()
+            if not line.startswith("gitdir:"):
+                raise MetadataUnavailable(f"unreadable {git_dir}")
+            git_dir = os.path.join(path, line[len("gitdir:"):].strip())
+        if not os.path.isdir(git_dir):
+            raise MetadataUnavailable(f"{path} is not a git repository")
+        self.git_dir = git_dir
+        self.common_dir = git_dir
+        commondir = os.path.join(git_dir, "commondir")
+        if os.path.exists(commondir):
+            with open(commondir, 'r') as fh:
+                self.common_dir = os.path.normpath(os.path.join(git_dir, fh.read().strip()))
+        self._packed = None
+        self._config = None
+        self._packs = None
+        self._object_dirs = None
+        self._shallow = None
+        # Set by packed_refs(): whether every annotated tag there has a ^peeled line.
+        self.fully_peeled = False
+
+    # refs
+
+    @property
+    def config(self):
+        if self._config is None:
+            self._config = parse_config(os.path.join(self.common_dir, "config"))
+        return self._config
+
+    def packed_refs(self):
+        """({ref: sha}, {ref: peeled sha}) from packed-refs."""
+        if self._packed is None:
+            refs, peeled = {}, {}
+            last = None
+            try:
+                with open(os.path.join(self.common_dir, "packed-refs"), 'r') as fh:
+                    for line in fh:
+                        line = line.rstrip('\n')
+                        if line.startswith('# pack-refs with:'):
+                            self.fully_peeled = 'fully-peeled' in line.split()
+                            continue
+                        if not line or line.startswith('#'):
+                            continue
+                        if line.startswith('^'):
+                            if last:
+                                peeled[last] = line[1:]
+                            continue
+                        sha, _, name = line.partition(' ')
+                        refs[name] = sha
+                        last = name
+            except FileNotFoundError:
+                pass
+            self._packed = refs, peeled
+        return self._packed
+
+    def read_ref(self, name, depth=0):
+        """Resolve a ref name (following symbolic refs) to a sha, or None."""
+        if depth > 5:
+            raise MetadataUnavailable(f"symbolic ref loop at {name}")
+        base = self.git_dir if name == "HEAD" or "/" not in name else self.common_dir
+        try:
+            with open(os.path.join(base, name), 'r') as fh:
+                value = fh.read().strip()
+        except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+            return self.packed_refs()[0].get(name)
+        if value.startswith("ref:"):
+            return self.read_ref(value[4:].strip(), depth + 1)
+        return value or None
+
+    def head(self):
+        return self.read_ref("HEAD")
+
+    def branch(self):
+        """Short name of the checked out branch, or None when HEAD is detached."""
+        with open(os.path.join(self.git_dir, "HEAD"), 'r') as fh:
+            value = fh.read().strip()
+        if value.startswith("ref: refs/heads/"):
+            return value[len("ref: refs/heads/"):]
+        return None
+
+    def upstream(self):
+        """(remote, remote branch ref, local tracking sha) for the current branch, or None."""
+        branch = self.branch()
+        if branch is None:
+            return None
+        remote = self.config.get(("branch", branch, "remote"))
+        merge = self.config.get(("branch", branch, "merge"))
+        if not remote or not merge:
+            return None
+        if remote == ".":
+            return remote, merge, self.read_ref(merge)
+        fetch = self.config.get(("remote", remote, "fetch"), f"+refs/heads/*:refs/remotes/{remote}/*")
+        source, _, destination = fetch.lstrip('+').partition(':')
+        if not (source.endswith('*') and destination.endswith('*') and merge.startswith(source[:-1])):
+            raise MetadataUnavailable(f"unusual fetch refspec {fetch}")
+        return remote, merge, self.read_ref(destination[:-1] + merge[len(source) - 1:])
+
+    def loose_tag_refs(self):
+        """{tag ref name: sha} for tags stored as files under refs/tags."""
+        tags = {}
+        tags_dir = os.path.join(self.common_dir, "refs", "tags")
+        for root, _, files in os.walk(tags_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                ref = "refs/tags/" + os.path.relpath(path, tags_dir).replace(os.sep, "/")
+                with open(path, 'r') as fh:
+                    tags[ref] = fh.read().strip()
+        return tags
+
+    def tag_refs(self):
+        """{tag ref name: sha} from packed-refs, overridden by loose refs."""
+        tags = {name: sha for name, sha in self.packed_refs()[0].items() if name.startswith("refs/tags/")}
+        tags.update(self.loose_tag_refs())
+        return tags
+
+    # objects
+
+    def object_dirs(self):
+        if self._object_dirs is None:
+            objects = os.path.join(self.common_dir, "objects")
+            dirs = [objects]
+            alternates = os.path.join(objects, "info", "alternates")
+            if os.path.exists(alternates):
+                with open(alternates, 'r') as fh:
+                    dirs += [os.path.join(objects, line.strip()) for line in fh
+                             if line.strip() and not line.startswith('#')]
+            self._object_dirs = dirs
+        return self._object_dirs
+
+    def packs(self):
+        if self._packs is None:
+            self._packs = []
+            for objects in self.object_dirs():
+                pack_dir = os.path.join(objects, "pack")
+                if os.path.isdir(pack_dir):
+                    for name in sorted(os.listdir(pack_dir)):
+                        if name.endswith(".idx") and os.path.exists(os.path.join(pack_dir, name[:-4] + ".pack")):
+                            self._packs.append(PackFile(os.path.join(pack_dir, name)))
+        return self._packs
+
+    def read_object(self, sha):
+        """(type, body) of an object, from loose files or packs."""
+        for objects in self.object_dirs():
+            try:
+                with open(os.path.join(objects, sha[:2], sha[2:]), 'rb') as fh:
+                    raw = zlib.decompress(fh.read())
+            except FileNotFoundError:
+                continue
+            header, _, body = raw.partition(b'\0')
+            kind, _, _ = header.partition(b' ')
+            return kind.decode(), body
+        binary = bytes.fromhex(sha)
+        for pack in self.packs():
+            index = pack.position(binary)
+            if index is not None:
+                return pack.read_at(pack.offset(index), self)
+        raise MetadataUnavailable(f"object {sha} not found")
+
+    def shallow(self):
+        if self._shallow is None:
+            try:
+                with open(os.path.join(self.common_dir, "shallow"), 'r') as fh:
+                    self._shallow = {line.strip() for line in fh if line.strip()}
+            except FileNotFoundError:
+                self._shallow = set()
+        return self._shallow
+
+    def parents(self, sha):
+        kind, body = self.read_object(sha)
+        if kind != "commit":
+            raise MetadataUnavailable(f"{sha} is a {kind}, not a commit")
+        if sha in self.shallow():
+            return []
+        parents = []
+        for line in body.split(b'\n'):
+            if not line:
+                break
+            if line.startswith(b'parent '):
+                parents.append(line[7:].decode())
+        return parents
+
+    def peel(self, sha):
+        """Follow annotated tags down to (commit sha or None, name stored in the outermost tag or None)."""
+        stored_name = None
+        for _ in range(10):
+            kind, body = self.read_object(sha)
+            if kind != "tag":
+                return (sha if kind == "commit" else None), stored_name
+            fields = dict(line.split(b' ', 1) for line in body.split(b'\n\n', 1)[0].split(b'\n') if b' ' in line)
+            if stored_name is None:
+                stored_name = fields.get(b'tag', b'').decode()
+            sha = fields[b'object'].decode()
+        raise MetadataUnavailable("tag chain too long")
+
+    def abbrev_length(self):
+        configured = self.config.get(("core", None, "abbrev"))
+        if configured and configured != "auto":
+            if not configured.isdigit():
+                raise MetadataUnavailable(f"core.abbrev = {configured}")
+            return max(4, int(configured))
+        # git sizes the default from the number of packed objects only.
+        count = sum(pack.count for pack in self.packs())
+        return max(MIN_ABBREV, (count.bit_length() + 1) // 2)
+
+    def abbreviate(self, sha):
+        """Shortest unique abbreviation, the way git's find_unique_abbrev() picks it."""
+        length = self.abbrev_length()
+        while length < len(sha) and self.is_ambiguous(sha[:length], sha):
+            length += 1
+        return sha[:length]
+
+    def is_ambiguous(self, prefix, sha):
+        """True if any object other than `sha` starts with `prefix`."""
+        for objects in self.object_dirs():
+            try:
+                if any((sha[:2] + name).startswith(prefix) and sha[:2] + name != sha
+                       for name in os.listdir(os.path.join(objects, sha[:2]))):
+                    return True
+            except FileNotFoundError:
+                pass
+        first = int(sha[:2], 16)
+        for pack in self.packs():
+            low = pack.fanout[first - 1] if first else 0
+            for i in range(low, pack.fanout[first]):
+                name = pack.idx[pack.names + i * 20:pack.names + i * 20 + 20].hex()
+                if name != sha and name.startswith(prefix):
+                    return True
+        return False
+
+    def describe(self):
+        """
+        `git describe --tags` for HEAD. Linear history only: a merge on the
+        way to the nearest tag, or a commit with several tags, raises
+        MetadataUnavailable because git's tie-breaking would be needed.
+        """
+        head = self.head()
+        if head is None:
+            raise NoTags("no commits")
+        tagged = {}
+        peeled = self.packed_refs()[1]
+        loose = self.loose_tag_refs()
+        for ref, sha in self.tag_refs().items():
+            if ref in loose or not self.fully_peeled:
+                commit = self.peel(sha)[0]
+            else:
+                # packed-refs records the peeled commit of annotated tags,
+                # so only the tag that wins has to be read.
+                commit = peeled.get(ref, sha)
+            if commit is not None:
+                tagged.setdefault(commit, []).append((ref, sha))
+        if not tagged:
+            raise NoTags("no tags")
+
+        commit, depth = head, 0
+        while depth <= DESCRIBE_LIMIT:
+            names = tagged.get(commit)
+            if names:
+                if len(names) > 1:
+                    raise MetadataUnavailable("several tags on one commit")
+                ref, sha = names[0]
+                # Annotated tags are shown by the name stored in the tag object.
+                name = (self.peel(sha)[1] if sha != commit else None) or ref[len("refs/tags/"):]
+                return name if depth == 0 else f"{name}-{depth}-g{self.abbreviate(head)}"
+            parents = self.parents(commit)
+            if not parents:
+                raise NoTags("no tag reachable from HEAD")
+            if len(parents) > 1:
+                raise MetadataUnavailable("merge commit before the nearest tag")
+            commit = parents[0]
+            depth += 1
+        raise MetadataUnavailable("nearest tag is too far back")
+
+
+def describe_tags(repo_path):
+    """
+    `git describe --tags` read in-process: the description, or None where
+    git would find no tag. Raises MetadataUnavailable when git itself has
+    to be asked.
+    """
+    try:
+        return GitRepo(repo_path).describe()
+    except NoTags:
+        return None
+    except (OSError, ValueError, KeyError, IndexError, struct.error, zlib.error) as e:
+        raise MetadataUnavailable(str(e)) from e
+
+
+def head_commit(repo_path):
+    """HEAD's sha read in-process (None on an unborn branch); raises MetadataUnavailable."""
+    try:
+        return GitRepo(repo_path).head()
+    except (OSError, ValueError) as e:
+        raise MetadataUnavailable(str(e)) from e
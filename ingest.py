@@ -0,0 +1,616 @@
+#!/usr/bin/env python3
+"""
+Ingest scan results from a task folder laid out by initiate.py.
+
+Files under nmap/, sslscan/, Burp/ and ferox/ are tracked by size and
+mtime in a sidecar SQLite next to the writeup (writeup/<task>.ingest.db),
+so a re-run only parses what is new or changed and drops what was deleted.
+Parsed rows are written in batched transactions, then the result nodes
+under each host in the task's CherryTree writeup are refreshed:
+
+    python3 initiate.py ~/engagements acme app.acme.test:443
+    nmap -oX ~/engagements/acme/nmap/app.xml ...
+    python3 ingest.py ~/engagements/acme
+
+Understood formats: nmap -oX/-oG/-oN, sslscan --xml and text, Burp "Save
+items" XML and feroxbuster --json and text output.
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+import xml.etree.ElementTree as ET
+from urllib.parse import urlsplit
+
+from extract_params import burp_endpoint, burp_item_params, iter_burp_items, sniff_format, split_http_message
+from initiate import SCOPE_NODE, first_free_node_id, placeholder_text, populate_ctb, rich_text
+import profiling
+
+INGEST_FOLDERS = ['nmap', 'sslscan', 'Burp', 'ferox']
+# Files parsed per transaction.
+DEFAULT_BATCH = 200
+# Longest list written into a single writeup node.
+MAX_NODE_LINES = 500
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    folder TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    ingested REAL NOT NULL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS aliases (
+    file TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    host TEXT NOT NULL,
+    alias TEXT NOT NULL,
+    PRIMARY KEY (file, host, alias)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS services (
+    file TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    host TEXT NOT NULL,
+    port INTEGER NOT NULL,
+    proto TEXT NOT NULL,
+    state TEXT NOT NULL,
+    service TEXT NOT NULL,
+    version TEXT NOT NULL,
+    PRIMARY KEY (file, host, port, proto)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS tls (
+    file TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    host TEXT NOT NULL,
+    port INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    detail TEXT NOT NULL,
+    PRIMARY KEY (file, host, port, kind, name)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS web (
+    file TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    host TEXT NOT NULL,
+    tool TEXT NOT NULL,
+    method TEXT NOT NULL,
+    path TEXT NOT NULL,
+    status TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (file, host, tool, method, path, status)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS params (
+    file TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    host TEXT NOT NULL,
+    name TEXT NOT NULL,
+    location TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (file, host, name, location)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS aliases_host ON aliases (host);
+CREATE INDEX IF NOT EXISTS services_host ON services (host);
+CREATE INDEX IF NOT EXISTS tls_host ON tls (host);
+CREATE INDEX IF NOT EXISTS web_host ON web (host);
+CREATE INDEX IF NOT EXISTS params_host ON params (host);
+"""
+
+# Result tables and their columns after (file, ...).
+TABLES = {
+    'aliases': ('host', 'alias'),
+    'services': ('host', 'port', 'proto', 'state', 'service', 'version'),
+    'tls': ('host', 'port', 'kind', 'name', 'detail'),
+    'web': ('host', 'tool', 'method', 'path', 'status', 'count'),
+    'params': ('host', 'name', 'location', 'count'),
+}
+
+ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;]*m')
+NMAP_REPORT = re.compile(r'^Nmap scan report for (\S+)(?: \(([^)]+)\))?')
+NMAP_PORT = re.compile(r'^(\d+)/(tcp|udp|sctp)\s+(\S+)\s+(\S+)(?:\s+(.*))?$')
+SSLSCAN_TARGET = re.compile(r'Testing SSL server (\S+) on port (\d+)')
+SSLSCAN_PROTOCOL = re.compile(r'^(SSLv[23]|TLSv1\.[0-3])\s+(enabled|disabled)')
+SSLSCAN_CIPHER = re.compile(r'^(Preferred|Accepted)\s+(\S+)\s+(\d+) bits\s+(\S+)')
+SSLSCAN_CERT = re.compile(r'^(Subject|Altnames|Issuer|Not valid before|Not valid after):\s+(.*)')
+FEROX_LINE = re.compile(r'^(\d{3})\s+(?:([A-Z]+)\s+)?\S+l\s+\S+w\s+\S+c\s+(\S+)')
+
+
+def parse_nmap(file_path):
+    if file_path.endswith('.xml'):
+        return 'nmap-xml', parse_nmap_xml(file_path)
+    if file_path.endswith('.gnmap'):
+        return 'nmap-grepable', parse_nmap_grepable(file_path)
+    return 'nmap-normal', parse_nmap_normal(file_path)
+
+
+def parse_nmap_xml(file_path):
+    rows = defaultdict(list)
+    root = None
+    # Hosts are cleared once read, so large sweeps parse in constant memory.
+    for event, elem in ET.iterparse(file_path, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            continue
+        if elem.tag != 'host':
+            continue
+        addresses = [a.get('addr') for a in elem.findall('address') if a.get('addrtype') in ('ipv4', 'ipv6')]
+        hostnames = elem.findall('hostnames/hostname')
+        names = [h.get('name') for h in hostnames if h.get('type') == 'user']
+        names += [h.get('name') for h in hostnames if h.get('name') not in names]
+        host = (names or addresses or [None])[0]
+        if host is not None:
+            rows['aliases'] += [(host, alias) for alias in names + addresses if alias != host]
+            for port in elem.findall('ports/port'):
+                if not (port.get('portid') or '').isdigit():
+                    continue
+                state = port.find('state')
+                service = port.find('service')
+                version = ''
+                if service is not None:
+                    version = ' '.join(service.get(field) for field in ('product', 'version', 'extrainfo')
+                                       if service.get(field))
+                rows['services'].append((host, int(port.get('portid')), port.get('protocol'),
+                                         state.get('state') if state is not None else '',
+                                         service.get('name', '') if service is not None else '', version))
+        elem.clear()
+        root.clear()
+    return rows
+
+
+def parse_nmap_grepable(file_path):
+    rows = defaultdict(list)
+    with open(file_path, 'r', errors='replace') as fh:
+        for line in fh:
+            fields = dict(field.split(': ', 1) for field in line.rstrip('\n').split('\t') if ': ' in field)
+            if 'Ports' not in fields or 'Host' not in fields:
+                continue
+            address, _, name = fields['Host'].partition(' ')
+            name = name.strip('()')
+            host = name or address
+            if name:
+                rows['aliases'].append((host, address))
+            for entry in fields['Ports'].split(', '):
+                parts = entry.split('/')
+                if len(parts) >= 7 and parts[0].isdigit():
+                    rows['services'].append((host, int(parts[0]), parts[2], parts[1], parts[4], parts[6]))
+    return rows
+
+
+def parse_nmap_normal(file_path):
+    rows = defaultdict(list)
+    host = None
+    with open(file_path, 'r', errors='replace') as fh:
+        for line in fh:
+            line = line.rstrip('\n')
+            match = NMAP_REPORT.match(line)
+            if match:
+                host = match.group(1)
+                if match.group(2):
+                    rows['aliases'].append((host, match.group(2)))
+                continue
+            match = NMAP_PORT.match(line)
+            if match and host is not None:
+                port, proto, state, service, version = match.groups()
+                rows['services'].append((host, int(port), proto, state, service, version or ''))
+    return rows
+
+
+def parse_sslscan(file_path):
+    with open(file_path, 'rb') as fh:
+        head = fh.read(256).lstrip()
+    if head.startswith(b'<?xml') or head.startswith(b'<document'):
+        return 'sslscan-xml', parse_sslscan_xml(file_path)
+    return 'sslscan-text', parse_sslscan_text(file_path)
+
+
+def parse_sslscan_xml(file_path):
+    rows = defaultdict(list)
+    for test in ET.parse(file_path).getroot().iter('ssltest'):
+        host, port = test.get('sniname') or test.get('host'), int(test.get('port', 443))
+        if not host:
+            continue
+        if test.get('host') and test.get('host') != host:
+            rows['aliases'].append((host, test.get('host')))
+        for protocol in test.findall('protocol'):
+            name = f"{protocol.get('type', '').upper().replace('TLS', 'TLSv')}{protocol.get('version')}"
+            enabled = 'enabled' if protocol.get('enabled') == '1' else 'disabled'
+            rows['tls'].append((host, port, 'protocol', name, enabled))
+        for cipher in test.findall('cipher'):
+            rows['tls'].append((host, port, 'cipher', f"{cipher.get('sslversion')} {cipher.get('cipher')}",
+                                f"{cipher.get('bits')} bits {cipher.get('status')}"))
+        for certificate in test.iter('certificate'):
+            for field in ('subject', 'altnames', 'issuer', 'not-valid-before', 'not-valid-after'):
+                value = certificate.findtext(field)
+                if value:
+                    rows['tls'].append((host, port, 'certificate', field.replace('-', ' '), value.strip()))
+    return rows
+
+
+def parse_sslscan_text(file_path):
+    rows = defaultdict(list)
+    host = port = None
+    with open(file_path, 'r', errors='replace') as fh:
+        for line in fh:
+            line = ANSI_ESCAPE.sub('', line).strip()
+            match = SSLSCAN_TARGET.search(line)
+            if match:
+                host, port = match.group(1), int(match.group(2))
+                continue
+            if host is None:
+                continue
+            match = SSLSCAN_PROTOCOL.match(line)
+            if match:
+                rows['tls'].append((host, port, 'protocol', match.group(1), match.group(2)))
+                continue
+            match = SSLSCAN_CIPHER.match(line)
+            if match:
+                status, version, bits, cipher = match.groups()
+                rows['tls'].append((host, port, 'cipher', f'{version} {cipher}', f'{bits} bits {status.lower()}'))
+                continue
+            match = SSLSCAN_CERT.match(line)
+            if match:
+                rows['tls'].append((host, port, 'certificate', match.group(1).lower(), match.group(2)))
+    return rows
+
+
+def parse_burp(file_path):
+    if sniff_format(file_path) != 'burp':
+        return 'unsupported', {}
+    requests, params = Counter(), Counter()
+    for url, request, response in iter_burp_items(file_path):
+        host = urlsplit(url).hostname or ''
+        method = split_http_message(request)[0].split(' ')[0] if request else ''
+        status = split_http_message(response)[0].split(' ')[1:2] if response else []
+        requests[host, 'burp', method, burp_endpoint(url, request), ''.join(status)] += 1
+        for location, name in burp_item_params(url, request, response):
+            params[host, name, location] += 1
+    return 'burp-xml', {'web': [key + (count,) for key, count in requests.items()],
+                        'params': [key + (count,) for key, count in params.items()]}
+
+
+def parse_ferox(file_path):
+    hits = Counter()
+    kind = 'ferox-text'
+    with open(file_path, 'r', errors='replace') as fh:
+        for line in fh:
+            line = ANSI_ESCAPE.sub('', line).strip()
+            if line.startswith('{'):
+                kind = 'ferox-json'
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get('type') != 'response' or not record.get('url'):
+                    continue
+                status, method, url = str(record.get('status', '')), record.get('method', 'GET'), record['url']
+            else:
+                match = FEROX_LINE.match(line)
+                if not match:
+                    continue
+                status, method, url = match.group(1), match.group(2) or 'GET', match.group(3)
+            parts = urlsplit(url)
+            hits[parts.hostname or '', 'ferox', method, parts.path or '/', status] += 1
+    return kind, {'web': [key + (count,) for key, count in hits.items()]}
+
+
+PARSERS = {
+    'nmap': parse_nmap,
+    'sslscan': parse_sslscan,
+    'Burp': parse_burp,
+    'ferox': parse_ferox,
+}
+
+
+def parse_file(task_dir, folder, path):
+    """(kind, {table: rows}, error) for one result file; errors never escape a worker."""
+    try:
+        kind, rows = PARSERS[folder](os.path.join(task_dir, path))
+        return kind, rows, None
+    except (OSError, ET.ParseError, ValueError, UnicodeDecodeError) as e:
+        return 'error', {}, str(e)
+    except Exception as e:
+        # Odd files trip the parsers in other ways (missing attributes and
+        # the like); record them like any other unreadable file.
+        return 'error', {}, f"{type(e).__name__}: {e}"
+
+
+def scan_task(task_dir):
+    """{relative path: (folder, size, mtime_ns)} for every file in the result folders."""
+    found = {}
+    for folder in INGEST_FOLDERS:
+        for dirpath, dirnames, filenames in os.walk(os.path.join(task_dir, folder)):
+            dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+            for filename in filenames:
+                if filename.startswith('.'):
+                    continue
+                full = os.path.join(dirpath, filename)
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    continue
+                found[os.path.relpath(full, task_dir)] = (folder, st.st_size, st.st_mtime_ns)
+    return found
+
+
+class IngestDB:
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.execute("PRAGMA journal_mode = WAL")
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            raise RuntimeError(f"Ingest database '{path}' has schema version {version}, expected {SCHEMA_VERSION}.")
+        with self.db:
+            self.db.executescript(SCHEMA)
+            self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def known_files(self):
+        return {path: (size, mtime_ns) for path, size, mtime_ns in
+                self.db.execute("SELECT path, size, mtime_ns FROM files")}
+
+    def hosts_of(self, paths):
+        hosts = set()
+        for path in paths:
+            for table in TABLES:
+                hosts.update(row[0] for row in self.db.execute(f"SELECT DISTINCT host FROM {table} WHERE file = ?",
+                                                               (path,)))
+        return hosts
+
+    def forget(self, paths):
+        with self.db:
+            self.db.executemany("DELETE FROM files WHERE path = ?", ((path,) for path in paths))
+
+    def replace_files(self, results):
+        """Swap in the rows of a batch of (path, folder, size, mtime_ns, kind, rows, error) in one transaction."""
+        now = time.time()
+        with self.db:
+            self.db.executemany("DELETE FROM files WHERE path = ?", ((result[0],) for result in results))
+            self.db.executemany("INSERT INTO files (path, folder, kind, size, mtime_ns, ingested, error) "
+                                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                ((path, folder, kind, size, mtime_ns, now, error)
+                                 for path, folder, size, mtime_ns, kind, _, error in results))
+            for table, columns in TABLES.items():
+                placeholders = ', '.join('?' * (len(columns) + 1))
+                self.db.executemany(f"INSERT OR REPLACE INTO {table} (file, {', '.join(columns)}) "
+                                    f"VALUES ({placeholders})",
+                                    ((path,) + tuple(row) for path, _, _, _, _, rows, _ in results
+                                     for row in rows.get(table, ())))
+
+    def all_hosts(self):
+        hosts = set()
+        for table in ('services', 'tls', 'web', 'params'):
+            hosts.update(row[0] for row in self.db.execute(f"SELECT DISTINCT host FROM {table}"))
+        hosts.discard('')
+        return hosts
+
+    def alias_map(self):
+        """Other names of each host, in both directions: a scan by address still finds the hostname."""
+        aliases = defaultdict(set)
+        for host, alias in self.db.execute("SELECT DISTINCT host, alias FROM aliases"):
+            aliases[host].add(alias)
+            aliases[alias].add(host)
+        return aliases
+
+    def latest(self, sql, hosts, params=()):
+        """Rows of sql for the given hosts; renderers order by file mtime so later rows override earlier ones."""
+        marks = ', '.join('?' * len(hosts))
+        return self.db.execute(sql.format(hosts=marks), list(params) + sorted(hosts)).fetchall()
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def render_nmap(index, hosts):
+    services = {}
+    for port, proto, state, service, version in index.latest(
+            "SELECT s.port, s.proto, s.state, s.service, s.version FROM services s "
+            "JOIN files f ON f.path = s.file WHERE s.host IN ({hosts}) ORDER BY f.mtime_ns", hosts):
+        services[proto, port] = f'{f"{port}/{proto}":<10} {state:<10} {service:<14} {version}'.rstrip()
+    return [line for _, line in sorted(services.items())]
+
+
+def render_sslscan(index, hosts):
+    findings = {}
+    for port, kind, name, detail in index.latest(
+            "SELECT t.port, t.kind, t.name, t.detail FROM tls t "
+            "JOIN files f ON f.path = t.file WHERE t.host IN ({hosts}) ORDER BY f.mtime_ns", hosts):
+        findings[port, kind, name] = detail
+    lines, current = [], None
+    order = {'protocol': 0, 'cipher': 1, 'certificate': 2}
+    for (port, kind, name), detail in sorted(findings.items(), key=lambda item: (item[0][0], order[item[0][1]])):
+        if port != current:
+            lines.append(f'Port {port}')
+            current = port
+        lines.append(f'  {kind:<12} {name:<48} {detail}')
+    return lines
+
+
+def render_web(index, hosts, tool):
+    lines = [f'{status or "-":<4} {method or "-":<7} {path}  ({count})' for method, path, status, count in
+             index.latest("SELECT method, path, status, SUM(count) FROM web WHERE tool = ? "
+                          "AND host IN ({hosts}) GROUP BY method, path, status ORDER BY path, method", hosts, (tool,))]
+    if tool == 'burp':
+        params = index.latest("SELECT name, GROUP_CONCAT(DISTINCT location) FROM params "
+                              "WHERE host IN ({hosts}) GROUP BY name ORDER BY name", hosts)
+        if params:
+            lines += ['', 'Parameters:'] + [f'  {name} ({locations})' for name, locations in params]
+    return lines
+
+
+RENDERERS = {
+    'nmap': render_nmap,
+    'sslscan': render_sslscan,
+    'Burp': lambda index, hosts: render_web(index, hosts, 'burp'),
+    'ferox': lambda index, hosts: render_web(index, hosts, 'ferox'),
+}
+
+
+def node_text(index, folder, hosts):
+    lines = RENDERERS[folder](index, hosts)
+    if not lines:
+        return None
+    if len(lines) > MAX_NODE_LINES:
+        lines = lines[:MAX_NODE_LINES] + [f'... {len(lines) - MAX_NODE_LINES} more in the ingest database']
+    return '\n'.join(lines) + '\n'
+
+
+def group_hosts(index, scope_names, touched):
+    """
+    {writeup node name: parsed host names} for the touched hosts. A host
+    scanned by address lands on the node named after one of its aliases
+    when there is one, otherwise it gets a node of its own.
+    """
+    aliases = index.alias_map()
+    present = index.all_hosts()
+    groups = defaultdict(set)
+    for host in present | touched:
+        names = [host] + sorted(aliases.get(host, ()))
+        groups[next((name for name in names if name in scope_names), host)].add(host)
+    # Hosts whose results were all deleted only need existing nodes reset.
+    return {node: hosts for node, hosts in groups.items()
+            if hosts & touched and (hosts & present or node in scope_names)}
+
+
+def scope_children(db):
+    row = db.execute("SELECT node_id FROM node WHERE name = ? ORDER BY node_id LIMIT 1", (SCOPE_NODE,)).fetchone()
+    if row is None:
+        return None, {}
+    return row[0], {name: node_id for node_id, name in db.execute(
+        "SELECT n.node_id, n.name FROM node n JOIN children c ON c.node_id = n.node_id WHERE c.father_id = ?",
+        (row[0],))}
+
+
+def update_writeup(ctb_path, index, touched):
+    """Refresh the result nodes of every host touched by this run; returns how many hosts were updated."""
+    db = sqlite3.connect(ctb_path)
+    try:
+        _, existing = scope_children(db)
+        groups = group_hosts(index, set(existing), touched)
+        missing = sorted(node for node in groups if node not in existing)
+        if missing:
+            db.close()
+            populate_ctb(ctb_path, [(node, []) for node in missing])
+            db = sqlite3.connect(ctb_path)
+            _, existing = scope_children(db)
+
+        with db:
+            now = int(time.time())
+            next_id = first_free_node_id(db)
+            for node, hosts in sorted(groups.items()):
+                host_id = existing[node]
+                children = {name: node_id for node_id, name in db.execute(
+                    "SELECT n.node_id, n.name FROM node n JOIN children c ON c.node_id = n.node_id "
+                    "WHERE c.father_id = ?", (host_id,))}
+                sequence = db.execute("SELECT COALESCE(MAX(sequence), 0) FROM children WHERE father_id = ?",
+                                      (host_id,)).fetchone()[0]
+                for folder in INGEST_FOLDERS:
+                    text = node_text(index, folder, hosts)
+                    if text is None:
+                        if folder in children:
+                            db.execute("UPDATE node SET txt = ?, ts_lastsave = ? WHERE node_id = ?",
+                                       (rich_text(placeholder_text(folder, node)), now, children[folder]))
+                        continue
+                    if folder in children:
+                        db.execute("UPDATE node SET txt = ?, ts_lastsave = ? WHERE node_id = ?",
+                                   (rich_text(text), now, children[folder]))
+                        continue
+                    sequence += 1
+                    db.execute("INSERT INTO node (node_id, name, txt, syntax, tags, is_ro, is_richtxt, has_codebox, "
+                               "has_table, has_image, level, ts_creation, ts_lastsave) "
+                               "VALUES (?, ?, ?, 'custom-colors', '', 0, 1, 0, 0, 0, 0, ?, ?)",
+                               (next_id, folder, rich_text(text), now, now))
+                    db.execute("INSERT INTO children (node_id, father_id, sequence) VALUES (?, ?, ?)",
+                               (next_id, host_id, sequence))
+                    next_id += 1
+    finally:
+        db.close()
+    return len(groups)
+
+
+def ingest(task_dir, db_path, ctb_path=None, jobs=None, batch=DEFAULT_BATCH, full=False):
+    found = scan_task(task_dir)
+    with IngestDB(db_path) as index:
+        known = {} if full else index.known_files()
+        removed = sorted(set(index.known_files()) - set(found))
+        pending = sorted(path for path, (_, size, mtime_ns) in found.items() if known.get(path) != (size, mtime_ns))
+
+        # Hosts whose results may change: those in the files being dropped or replaced, plus the new ones.
+        touched = index.hosts_of(removed + pending)
+        index.forget(removed)
+
+        errors = 0
+        executor = ProcessPoolExecutor(jobs) if (jobs or os.cpu_count() or 1) > 1 and len(pending) > 1 else None
+        try:
+            for start in range(0, len(pending), batch):
+                paths = pending[start:start + batch]
+                folders = [found[path][0] for path in paths]
+                if executor is not None:
+                    parsed = list(executor.map(parse_file, [task_dir] * len(paths), folders, paths))
+                else:
+                    parsed = [parse_file(task_dir, folder, path) for folder, path in zip(folders, paths)]
+                results = []
+                for path, folder, (kind, rows, error) in zip(paths, folders, parsed):
+                    if error:
+                        errors += 1
+                        print(f"Failed to parse {path}. Reason: {error}", file=sys.stderr)
+                    for table in ('services', 'tls', 'web', 'params'):
+                        touched.update(row[0] for row in rows.get(table, ()))
+                    results.append((path, folder, found[path][1], found[path][2], kind, rows, error))
+                index.replace_files(results)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        touched.discard('')
+        updated = 0
+        if ctb_path and touched:
+            if os.path.exists(ctb_path):
+                updated = update_writeup(ctb_path, index, touched)
+            else:
+                print(f"No writeup at {ctb_path}; results are only in {db_path}")
+
+    print(f"Ingested {len(pending)} new or changed file(s), {len(found) - len(pending)} unchanged, "
+          f"{len(removed)} removed, {errors} failed; {updated} host(s) updated in the writeup")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest nmap, sslscan, Burp and ferox results into a task's writeup")
+    parser.add_argument('task_dir', help="Task folder created by initiate.py")
+    parser.add_argument('--db', help="Sidecar database (default: writeup/<task>.ingest.db)")
+    parser.add_argument('--ctb', help="CherryTree writeup to update (default: writeup/<task>.ctb)")
+    parser.add_argument('--no-writeup', action='store_true', help="Only update the sidecar database (a later --full run brings the writeup up to date)")
+    parser.add_argument('-j', '--jobs', type=int, help="Parser processes (default: CPU count)")
+    parser.add_argument('--batch', type=int, default=DEFAULT_BATCH,
+                        help=f"Files per transaction (default: {DEFAULT_BATCH})")
+    parser.add_argument('--full', action='store_true', help="Re-parse every file, not only new or changed ones")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.start(args)
+
+    task_dir = os.path.abspath(os.path.expanduser(args.task_dir))
+    if not os.path.isdir(task_dir):
+        parser.error(f"task folder '{args.task_dir}' does not exist")
+    task_name = os.path.basename(task_dir)
+    writeup_dir = os.path.join(task_dir, 'writeup')
+    os.makedirs(writeup_dir, exist_ok=True)
+    db_path = args.db or os.path.join(writeup_dir, f'{task_name}.ingest.db')
+    ctb_path = None if args.no_writeup else (args.ctb or os.path.join(writeup_dir, f'{task_name}.ctb'))
+    errors = ingest(task_dir, db_path, ctb_path, args.jobs, max(1, args.batch), args.full)
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
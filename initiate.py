@@ -1,8 +1,18 @@
 #!/usr/bin/env python3
 
 import os
+import re
 import shutil
+import sqlite3
+import time
 import argparse
+from xml.sax.saxutils import escape
+import profiling
+
+# Result folders that get a placeholder node under every target.
+RESULT_FOLDERS = ['nmap', 'sslscan', 'Burp', 'ferox']
+SCOPE_NODE = 'Scope'
+NODE_LINK = re.compile(r'link="node (\d+)')
 
 def create_folders(base_dir, task_name):
     task_dir = os.path.join(base_dir, task_name)
@@ -25,25 +35,149 @@ def create_folders(base_dir, task_name):
         except Exception as e:
             print(f"Failed to create {folder}. Reason: {str(e)}")
 
-def copy_template_file(base_dir, task_name):
+def copy_template_file(base_dir, task_name, overwrite=True):
     # Construct the path to bb-template.ctb relative to the script's location
     source_file = os.path.join(os.path.dirname(__file__), 'bb-template.ctb')
     dest_file = os.path.expanduser(os.path.join(base_dir, task_name, 'writeup', f'{task_name}.ctb'))
 
+    if not overwrite and os.path.exists(dest_file):
+        print(f"Keeping existing {dest_file}")
+        return dest_file
     try:
         shutil.copy2(source_file, dest_file)
         print(f"Successfully copied to {dest_file}")
+        return dest_file
     except Exception as e:
         print(f"Failed to copy template file. Reason: {str(e)}")
+        return None
+
+def parse_target(spec):
+    """'host' or 'host:80,443' -> (host, [ports])."""
+    host, _, ports = spec.partition(':')
+    return host, [port for port in ports.split(',') if port]
+
+def load_tasks(path):
+    """
+    Read a tasks file: one task per line, the task name followed by its
+    targets ('host' or 'host:port,port'), '#' starting a comment.
+    """
+    tasks = []
+    with open(path, 'r') as fh:
+        for line in fh:
+            fields = line.split('#', 1)[0].split()
+            if fields:
+                tasks.append((fields[0], [parse_target(spec) for spec in fields[1:]]))
+    return tasks
+
+def rich_text(text):
+    """CherryTree node body holding plain text."""
+    body = f'<rich_text>{escape(text)}</rich_text>' if text else ''
+    return f'<?xml version="1.0" encoding="UTF-8"?>\n<node>{body}</node>\n'
+
+def placeholder_text(folder, host):
+    return f'Results: {folder}/ files for {host}\n'
+
+def target_nodes(host, ports):
+    """(name, text, children) tree for one target."""
+    children = [(f'{port}/tcp', f'{host} port {port}\n', []) for port in ports]
+    children += [(folder, placeholder_text(folder, host), []) for folder in RESULT_FOLDERS]
+    summary = f'Host: {host}\nPorts: {", ".join(ports) if ports else "to be enumerated"}\n'
+    return host, summary, children
+
+def first_free_node_id(db):
+    """One past the highest node id in use or referenced by a link, so dangling template links stay dangling."""
+    highest = db.execute("SELECT COALESCE(MAX(node_id), 0) FROM node").fetchone()[0]
+    for (txt,) in db.execute("SELECT txt FROM node WHERE txt LIKE '%link=\"node %'"):
+        highest = max([highest] + [int(node_id) for node_id in NODE_LINK.findall(txt)])
+    return highest + 1
+
+def populate_ctb(ctb_path, targets):
+    """
+    Add a node tree per target under the template's Scope node, all in
+    one transaction. Targets that already have a node there are skipped,
+    so a task can be re-provisioned with a longer list.
+    """
+    db = sqlite3.connect(ctb_path)
+    try:
+        with db:
+            row = db.execute("SELECT node_id FROM node WHERE name = ? ORDER BY node_id LIMIT 1",
+                             (SCOPE_NODE,)).fetchone()
+            next_id = first_free_node_id(db)
+            if row is None:
+                scope_id = next_id
+                next_id += 1
+                top_sequence = db.execute("SELECT COALESCE(MAX(sequence), 0) FROM children WHERE father_id = 0").fetchone()[0]
+                pending = [(scope_id, SCOPE_NODE, '', 0, top_sequence + 1)]
+            else:
+                scope_id = row[0]
+                pending = []
+            existing = {name for (name,) in db.execute(
+                "SELECT n.name FROM node n JOIN children c ON c.node_id = n.node_id WHERE c.father_id = ?",
+                (scope_id,))}
+            sequence = db.execute("SELECT COALESCE(MAX(sequence), 0) FROM children WHERE father_id = ?",
+                                  (scope_id,)).fetchone()[0]
+
+            added = 0
+            for host, ports in targets:
+                if host in existing:
+                    continue
+                existing.add(host)
+                name, text, children = target_nodes(host, ports)
+                sequence += 1
+                host_id = next_id
+                next_id += 1
+                pending.append((host_id, name, text, scope_id, sequence))
+                for child_sequence, (child_name, child_text, _) in enumerate(children, 1):
+                    pending.append((next_id, child_name, child_text, host_id, child_sequence))
+                    next_id += 1
+                added += 1
+
+            now = int(time.time())
+            db.executemany(
+                "INSERT INTO node (node_id, name, txt, syntax, tags, is_ro, is_richtxt, has_codebox, has_table, "
+                "has_image, level, ts_creation, ts_lastsave) VALUES (?, ?, ?, 'custom-colors', '', 0, 1, 0, 0, 0, 0, ?, ?)",
+                [(node_id, name, rich_text(text), now, now) for node_id, name, text, _, _ in pending])
+            db.executemany("INSERT INTO children (node_id, father_id, sequence) VALUES (?, ?, ?)",
+                           [(node_id, father_id, seq) for node_id, _, _, father_id, seq in pending])
+    finally:
+        db.close()
+    return added
+
+def provision(base_dir, task_name, targets, overwrite=True):
+    create_folders(base_dir, task_name)
+    ctb_path = copy_template_file(base_dir, task_name, overwrite)
+    if ctb_path and targets:
+        try:
+            added = populate_ctb(ctb_path, targets)
+            print(f"Added {added} target node(s) to {ctb_path}")
+        except sqlite3.Error as e:
+            print(f"Failed to add target nodes to {ctb_path}. Reason: {str(e)}")
 
 def main():
     parser = argparse.ArgumentParser(description="Initialize Bug Bounty Task Folders")
     parser.add_argument('base_dir', help="Base directory where the task folder will be created")
-    parser.add_argument('task_name', help="Task name")
+    parser.add_argument('task_name', nargs='?', help="Task name")
+    parser.add_argument('targets', nargs='*',
+                        help="Targets to add to the writeup, as host or host:port,port")
+    parser.add_argument('--tasks', metavar='FILE',
+                        help="Provision every task in FILE (one per line: task_name target...)")
+    profiling.add_arguments(parser)
     args = parser.parse_args()
+    profiling.start(args)
 
-    create_folders(os.path.expanduser(args.base_dir), args.task_name)
-    copy_template_file(os.path.expanduser(args.base_dir), args.task_name)
+    base_dir = os.path.expanduser(args.base_dir)
+    if args.tasks:
+        if args.task_name:
+            parser.error("give either task_name or --tasks, not both")
+        tasks = load_tasks(args.tasks)
+        for task_name, targets in tasks:
+            # Existing writeups are kept in batch mode; only missing targets are added.
+            provision(base_dir, task_name, targets, overwrite=False)
+        print(f"Provisioned {len(tasks)} task(s)")
+    elif args.task_name:
+        provision(base_dir, args.task_name, [parse_target(spec) for spec in args.targets])
+    else:
+        parser.error("task_name or --tasks is required")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Persistent SQLite index of the parameters extract_params.py has seen.
+
+Every scanned capture contributes one row per (name, endpoint, location)
+with the number of times it was seen there. Files are keyed by absolute
+path together with their size and mtime, so re-running over a growing
+capture folder only re-reads files that are new or have changed, and
+files that were deleted or moved away are dropped from the index.
+
+Queries are answered from the index alone:
+
+    python3 paramindex.py params.db --endpoint '/api/*' --never-in query
+    python3 paramindex.py params.db --name 'user*' --details
+    python3 paramindex.py params.db --prune
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+import profiling
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    format TEXT NOT NULL,
+    scanned REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS params (
+    name TEXT NOT NULL,
+    file TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    endpoint TEXT NOT NULL,
+    location TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (name, file, endpoint, location)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS params_file ON params (file);
+CREATE INDEX IF NOT EXISTS params_endpoint ON params (endpoint);
+"""
+
+
+class ParamIndex:
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.execute("PRAGMA journal_mode = WAL")
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            raise RuntimeError(f"Index '{path}' has schema version {version}, expected {SCHEMA_VERSION}.")
+        with self.db:
+            self.db.executescript(SCHEMA)
+            self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def is_current(self, file_path):
+        """True when file_path is indexed and its size and mtime have not changed since."""
+        st = os.stat(file_path)
+        row = self.db.execute("SELECT size, mtime_ns FROM files WHERE path = ?",
+                              (os.path.abspath(file_path),)).fetchone()
+        return row is not None and row == (st.st_size, st.st_mtime_ns)
+
+    def replace_file(self, file_path, file_format, counts, st=None):
+        """Swap in the (endpoint, location, name) -> count records of one file in a single transaction."""
+        path = os.path.abspath(file_path)
+        st = st or os.stat(file_path)
+        with self.db:
+            self.db.execute("DELETE FROM params WHERE file = ?", (path,))
+            self.db.execute("INSERT OR REPLACE INTO files (path, size, mtime_ns, format, scanned) "
+                            "VALUES (?, ?, ?, ?, ?)",
+                            (path, st.st_size, st.st_mtime_ns, file_format, time.time()))
+            self.db.executemany("INSERT INTO params (name, file, endpoint, location, count) VALUES (?, ?, ?, ?, ?)",
+                                ((name, path, endpoint, location, count)
+                                 for (endpoint, location, name), count in counts.items()))
+
+    def forget(self, file_path):
+        with self.db:
+            self.db.execute("DELETE FROM files WHERE path = ?", (os.path.abspath(file_path),))
+
+    def prune(self):
+        """Drop files that no longer exist at their indexed path; returns the paths dropped."""
+        gone = [path for (path,) in self.db.execute("SELECT path FROM files") if not os.path.exists(path)]
+        with self.db:
+            self.db.executemany("DELETE FROM files WHERE path = ?", ((path,) for path in gone))
+        return gone
+
+    def names(self, file_paths):
+        """Every parameter name recorded for the given files."""
+        names = set()
+        for file_path in file_paths:
+            names.update(row[0] for row in self.db.execute(
+                "SELECT DISTINCT name FROM params WHERE file = ?", (os.path.abspath(file_path),)))
+        return names
+
+    def query(self, name=None, endpoint=None, location=None, never_in=None, file=None):
+        """
+        Return (name, total count, locations, endpoints) rows, filtered by
+        GLOB patterns on name, endpoint and file and by location. never_in
+        drops names that were seen in that location anywhere within the
+        same filters (e.g. seen on /api/* but never in a query string).
+        """
+        where, params = [], []
+        for column, value in (("name", name), ("endpoint", endpoint), ("file", file)):
+            if value is not None:
+                where.append(f"{column} GLOB ?")
+                params.append(value)
+        having = ""
+        if never_in is not None:
+            having = "HAVING SUM(location = ?) = 0"
+        if location is not None:
+            # Applied after grouping so never_in still sees every location.
+            having += (" AND " if having else "HAVING ") + "SUM(location = ?) > 0"
+        sql = ("SELECT name, SUM(count), GROUP_CONCAT(DISTINCT location), COUNT(DISTINCT endpoint) "
+               "FROM params" + (" WHERE " + " AND ".join(where) if where else "") +
+               f" GROUP BY name {having} ORDER BY name")
+        params += [value for value in (never_in, location) if value is not None]
+        return self.db.execute(sql, params).fetchall()
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the parameter index written by extract_params.py --index.")
+    parser.add_argument("index", help="SQLite index file.")
+    parser.add_argument("--name", help="Only names matching this glob.")
+    parser.add_argument("--endpoint", help="Only parameters seen on endpoints matching this glob, e.g. '/api/*'.")
+    parser.add_argument("--file", help="Only parameters from capture files matching this glob.")
+    parser.add_argument("--location", choices=["query", "body", "json", "cookie", "header", "path", "text"],
+                        help="Only names seen in this location.")
+    parser.add_argument("--never-in", choices=["query", "body", "json", "cookie", "header", "path", "text"],
+                        help="Drop names seen in this location (within the other filters).")
+    parser.add_argument("--details", action="store_true", help="Also print counts, locations and endpoint counts.")
+    parser.add_argument("--prune", action="store_true",
+                        help="First drop capture files that no longer exist from the index.")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.start(args)
+
+    if not os.path.exists(args.index):
+        parser.error(f"index '{args.index}' does not exist")
+    with ParamIndex(args.index) as index:
+        if args.prune:
+            for path in index.prune():
+                print(f"Dropped missing file '{path}' from the index.", file=sys.stderr)
+        for name, count, locations, endpoints in index.query(args.name, args.endpoint, args.location,
+                                                             args.never_in, args.file):
+            if args.details:
+                print(f"{name}\t{count}\t{locations}\t{endpoints}")
+            else:
+                print(name)
+
+
+if __name__ == "__main__":
+    main()
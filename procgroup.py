@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Child processes that are always taken down as a whole.
+
+run() starts a command in a session of its own, so it and everything it
+forks (openssl under testssl.sh, ssh and remote helpers under git) share
+one process group. A run past its timeout has that whole group killed,
+and kill_all() does the same for every group still in flight, which is
+what the thread-pool scripts call when Ctrl-C interrupts them.
+"""
+
+import os
+import signal
+import subprocess
+import threading
+
+# Process groups still running, so Ctrl-C can take them all down.
+running = set()
+running_lock = threading.Lock()
+
+
+def kill_group(proc):
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def kill_all():
+    with running_lock:
+        for proc in list(running):
+            kill_group(proc)
+
+
+def run(cmd, timeout=None, **popen_args):
+    """
+    Run `cmd` in its own process group and return (returncode, stdout,
+    stderr), or None if it ran past `timeout` seconds. Output is captured
+    as text; extra keyword arguments go to Popen (cwd, env, stderr=STDOUT...).
+    """
+    popen_args.setdefault("stderr", subprocess.PIPE)
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True, start_new_session=True, **popen_args)
+    with running_lock:
+        running.add(proc)
+    try:
+        stdout, stderr = proc.communicate(timeout=timeout)
+        return proc.returncode, stdout, stderr
+    except subprocess.TimeoutExpired:
+        kill_group(proc)
+        proc.communicate()
+        return None
+    finally:
+        with running_lock:
+            running.discard(proc)
+
+
+def interrupt(pool):
+    """Abandon a ThreadPoolExecutor's queued work and kill every running group."""
+    pool.shutdown(wait=False, cancel_futures=True)
+    kill_all()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Opt-in --profile support shared by the command-line scripts.
+
+A script adds the options with add_arguments(parser) and calls
+start(args) right after parsing. With --profile FILE the whole run is
+recorded with cProfile, in the main thread and in every thread started
+afterwards, such as the thread pools of bulk-CA-check.py and
+update-stuff1.py. At exit the merged profile is written to FILE, ready
+for pstats or snakeviz, and a summary to FILE.txt.
+
+The summary splits time spent blocked in subprocesses, on the network
+and on locks or sleeps from Python CPU time, and then lists the top
+functions by own and by cumulative time. Waits on any file descriptor
+(poll, select, read) are put down to the code that called them, so a
+requests socket wait counts as network and a communicate() as a
+subprocess:
+
+    python3 extract_params.py big.har --profile /tmp/extract.prof
+    python3 update-stuff1.py ~/tools --profile /tmp/update.prof --profile-top 50
+
+Worker processes (extract_params.py -j, ingest.py, gen_string.py -j)
+are not profiled; their work shows up as time waiting on them and as
+child CPU time.
+
+From Python 3.12 on cProfile is built on sys.monitoring, which allows
+one profiler per interpreter and records every thread, so only the main
+profiler runs there. Its call graph interleaves the threads' stacks, so
+time in calls that overlap across threads is only roughly attributed.
+"""
+
+import atexit
+import cProfile
+import io
+import os
+import pstats
+import resource
+import sys
+import threading
+import time
+from collections import Counter
+
+DEFAULT_TOP = 30
+# sys.monitoring based cProfile: one profiler per interpreter sees all threads.
+INTERPRETER_WIDE = sys.version_info >= (3, 12)
+
+# Where blocked time goes, recognised by the C functions it is spent in.
+WAIT_CATEGORIES = [
+    ("subprocesses", ("posix.waitpid", "posix.wait4", "_posixsubprocess.fork_exec")),
+    ("network", ("_socket.", "_ssl.")),
+    ("locks and sleeps", ("'acquire' of '_thread.", "time.sleep")),
+]
+# Calls that block on any file descriptor. Their time goes to the first
+# caller up the stack that lives in one of CALLER_CATEGORIES' modules.
+FD_WAITS = ("posix.read", "'poll' of 'select.poll'", "'poll' of 'select.epoll'", "select.select")
+CALLER_CATEGORIES = [
+    ("subprocesses", ("/subprocess.py", "/multiprocessing/", "/concurrent/futures/process.py")),
+    ("network", ("/socket.py", "/ssl.py", "/http/", "/urllib3/", "/requests/", "/socketserver.py")),
+]
+OTHER_WAITS = "other I/O waits"
+# Callers followed up from a file descriptor wait before giving up.
+MAX_CALLER_DEPTH = 8
+
+active = None
+
+
+def add_arguments(parser):
+    parser.add_argument('--profile', metavar='FILE',
+                        help='Profile the run with cProfile; writes FILE and a hotspot summary to FILE.txt')
+    parser.add_argument('--profile-top', metavar='N', type=int, default=DEFAULT_TOP,
+                        help=f'Functions listed in the profile summary (default: {DEFAULT_TOP})')
+
+
+def start(args):
+    """Begin profiling if --profile was given; the results are written at exit."""
+    global active
+    if not getattr(args, 'profile', None) or active is not None:
+        return None
+    active = Profiler(args.profile, args.profile_top)
+    active.start()
+    atexit.register(active.finish)
+    return active
+
+
+def wait_category(func_name):
+    for category, markers in WAIT_CATEGORIES:
+        if any(marker in func_name for marker in markers):
+            return category
+    if any(marker in func_name for marker in FD_WAITS):
+        return OTHER_WAITS
+    return None
+
+
+def caller_shares(stats, func, memo, seen=frozenset()):
+    """
+    {category: fraction} of func's time, split over its callers by their
+    cumulative time until a caller in CALLER_CATEGORIES decides it.
+    """
+    if func in memo:
+        return memo[func]
+    for category, markers in CALLER_CATEGORIES:
+        if any(marker in func[0] for marker in markers):
+            return {category: 1.0}
+    callers = {caller: edge for caller, edge in stats.stats.get(func, (0, 0, 0, 0, {}))[4].items()
+               if caller not in seen}
+    if len(seen) >= MAX_CALLER_DEPTH or not callers:
+        return {OTHER_WAITS: 1.0}
+    # Cumulative time per call edge; own time or call counts where that is
+    # missing, as with the interleaved stacks of an interpreter-wide profile.
+    for field in (3, 2, 0):
+        weights = {caller: edge[field] for caller, edge in callers.items()}
+        total = sum(weights.values())
+        if total > 0:
+            break
+    else:
+        return {OTHER_WAITS: 1.0}
+    shares = Counter()
+    for caller, weight in weights.items():
+        for category, fraction in caller_shares(stats, caller, memo, seen | {func}).items():
+            shares[category] += fraction * weight / total
+    memo[func] = shares
+    return shares
+
+
+def time_by_kind(stats):
+    """({kind: seconds} of profiled own time, total); kinds are Python/C code and the wait categories."""
+    kinds = Counter({"Python and C code": 0.0})
+    kinds.update({category: 0.0 for category, _ in WAIT_CATEGORIES + CALLER_CATEGORIES})
+    kinds[OTHER_WAITS] = 0.0
+    memo = {}
+    total = 0.0
+    for func, (_, _, own_time, _, _) in stats.stats.items():
+        total += own_time
+        category = wait_category(func[2]) if func[0] == '~' else None
+        if category == OTHER_WAITS:
+            for kind, fraction in caller_shares(stats, func, memo).items():
+                kinds[kind] += own_time * fraction
+        else:
+            kinds[category or "Python and C code"] += own_time
+    return kinds, total
+
+
+class Profiler:
+    def __init__(self, path, top=DEFAULT_TOP):
+        self.path = path
+        self.top = top
+        self.profiles = []
+        self.lock = threading.Lock()
+        self.running = False
+
+    def start(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        self.children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        main = cProfile.Profile()
+        self.profiles.append(main)
+        self.running = True
+        if not INTERPRETER_WIDE:
+            threading.setprofile(self.thread_started)
+        main.enable()
+
+    def thread_started(self, frame, event, arg):
+        # Installed by threading for each new thread: swap in a cProfile of its own.
+        sys.setprofile(None)
+        if not self.running:
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return  # another profiler already owns this interpreter
+        with self.lock:
+            self.profiles.append(profile)
+
+    def stop(self):
+        self.running = False
+        if not INTERPRETER_WIDE:
+            threading.setprofile(None)
+        self.profiles[0].disable()
+
+    def finish(self):
+        if not self.running:
+            return
+        self.stop()
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        child_cpu = (children.ru_utime - self.children.ru_utime) + (children.ru_stime - self.children.ru_stime)
+
+        with self.lock:
+            profiles = list(self.profiles)
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(self.path)
+        with open(f"{self.path}.txt", 'w') as fh:
+            fh.write(self.summary(stats, wall, cpu, child_cpu, len(profiles)))
+        print(f"Profile written to {self.path} (summary in {self.path}.txt)", file=sys.stderr)
+
+    def summary(self, stats, wall, cpu, child_cpu, threads):
+        kinds, total = time_by_kind(stats)
+
+        out = io.StringIO()
+        out.write(f"Command  : {' '.join(sys.argv)}\n")
+        out.write(f"Wall time: {wall:.3f}s\n")
+        out.write(f"CPU time : {cpu:.3f}s in this process, {child_cpu:.3f}s in child processes\n")
+        if INTERPRETER_WIDE:
+            out.write("Threads  : all, through one interpreter-wide profiler\n\n")
+        else:
+            out.write(f"Threads  : {threads} profiled\n\n")
+        out.write("Profiled time by kind (summed over threads):\n")
+        for name, seconds in kinds.items():
+            share = 100 * seconds / total if total else 0.0
+            out.write(f"  {name:<20} {seconds:>10.3f}s {share:>6.1f}%\n")
+
+        for order, title in (("tottime", "own time"), ("cumulative", "cumulative time")):
+            out.write(f"\nTop {self.top} functions by {title}:\n")
+            stats.stream = out
+            stats.sort_stats(order).print_stats(self.top)
+        return out.getvalue()
+
+
+def _forget_in_child():
+    # Forked workers inherit the forking thread's profiler but never write it out.
+    global active
+    if active is not None:
+        active.running = False
+        # The inherited profiler would keep recording (for every thread
+        # from 3.12 on) into a profile nobody writes out.
+        try:
+            active.profiles[0].disable()
+        except ValueError:
+            pass
+        active = None
+        sys.setprofile(None)
+        threading.setprofile(None)
+
+
+os.register_at_fork(after_in_child=_forget_in_child)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Opt-in instrumentation for the bulk scanning scripts.
+
+Each script keeps a module-level ScanStats that stays disabled unless
+--stats or --trace is given, so the normal code path only pays for a
+boolean check. Work is wrapped in stage() blocks, counters and error
+categories are bumped as they happen, and at the end report() prints a
+summary to stderr while dump_trace() writes the raw records as JSON.
+"""
+
+import json
+import math
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+TRACE_VERSION = 1
+
+# Upper bounds (seconds) of the per-target latency histogram buckets.
+HISTOGRAM_BUCKETS = [0.1, 0.5, 1, 2, 5, 10, 30, 60, 120, 300]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    rank = math.ceil(pct / 100.0 * len(values))
+    return values[max(0, min(len(values), rank) - 1)]
+
+
+def format_seconds(seconds):
+    if seconds < 1:
+        return f"{seconds * 1000:.1f}ms"
+    return f"{seconds:.2f}s"
+
+
+class ScanStats:
+    def __init__(self, tool, enabled=False):
+        self.tool = tool
+        self.enabled = enabled
+        self.started = time.time()
+        self.clock_start = time.perf_counter()
+        self.records = []
+        self.counters = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name, target=None):
+        """Time the enclosed block as one `name` stage for `target`."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, target, time.perf_counter() - start)
+
+    def target(self, target):
+        """Time the complete handling of one target."""
+        return self.stage("total", target)
+
+    def record(self, name, target, seconds):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.records.append((name, target, seconds))
+
+    def count(self, name, amount=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] += amount
+
+    def hit(self, cache, amount=1):
+        self.count(f"{cache} hit", amount)
+
+    def miss(self, cache, amount=1):
+        self.count(f"{cache} miss", amount)
+
+    def error(self, category):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.errors[category] += 1
+
+    def stage_summary(self):
+        durations = defaultdict(list)
+        for name, _, seconds in self.records:
+            durations[name].append(seconds)
+        summary = {}
+        for name, values in durations.items():
+            values.sort()
+            summary[name] = {
+                "count": len(values),
+                "total": sum(values),
+                "mean": sum(values) / len(values),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "max": values[-1],
+            }
+        return summary
+
+    def target_times(self):
+        return sorted(seconds for name, _, seconds in self.records if name == "total")
+
+    def histogram(self):
+        buckets = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        for seconds in self.target_times():
+            for i, bound in enumerate(HISTOGRAM_BUCKETS):
+                if seconds <= bound:
+                    buckets[i] += 1
+                    break
+            else:
+                buckets[-1] += 1
+        return buckets
+
+    def report(self, stream=None):
+        """Print the stage table, counters, errors and latency histogram."""
+        if not self.enabled:
+            return
+        stream = stream or sys.stderr
+        elapsed = time.perf_counter() - self.clock_start
+        targets = self.target_times()
+
+        print(f"\n{self.tool} statistics", file=stream)
+        print("-" * 78, file=stream)
+        print(f"Wall time: {format_seconds(elapsed)}", file=stream)
+        if targets:
+            rate = len(targets) / elapsed if elapsed else 0.0
+            print(f"Targets  : {len(targets)} ({rate:.2f}/s)", file=stream)
+
+        summary = self.stage_summary()
+        if summary:
+            print(f"\n{'Stage':<16} {'Count':>7} {'Total':>10} {'Mean':>10} {'p50':>10} {'p95':>10} {'Max':>10}", file=stream)
+            for name, row in sorted(summary.items(), key=lambda item: -item[1]["total"]):
+                print(f"{name:<16} {row['count']:>7} {format_seconds(row['total']):>10} "
+                      f"{format_seconds(row['mean']):>10} {format_seconds(row['p50']):>10} "
+                      f"{format_seconds(row['p95']):>10} {format_seconds(row['max']):>10}", file=stream)
+
+        if self.counters:
+            print("\nCounters:", file=stream)
+            for name, value in sorted(self.counters.items()):
+                print(f"  {name:<34} {value}", file=stream)
+
+        if self.errors:
+            print("\nErrors:", file=stream)
+            for name, value in sorted(self.errors.items(), key=lambda item: -item[1]):
+                print(f"  {name:<34} {value}", file=stream)
+
+        if targets:
+            print("\nPer-target latency:", file=stream)
+            buckets = self.histogram()
+            widest = max(buckets)
+            lower = 0
+            for bound, amount in zip(HISTOGRAM_BUCKETS + [None], buckets):
+                label = f"{lower:g}-{bound:g}s" if bound is not None else f">{lower:g}s"
+                bar = '#' * (int(40 * amount / widest) if widest else 0)
+                print(f"  {label:>10} {amount:>6} {bar}", file=stream)
+                if bound is not None:
+                    lower = bound
+
+    def dump_trace(self, path):
+        """Write every record plus the summary as JSON for cross-version diffs."""
+        if not self.enabled:
+            return
+        trace = {
+            "version": TRACE_VERSION,
+            "tool": self.tool,
+            "argv": sys.argv,
+            "started": self.started,
+            "elapsed": time.perf_counter() - self.clock_start,
+            "stages": self.stage_summary(),
+            "counters": dict(self.counters),
+            "errors": dict(self.errors),
+            "histogram": dict(zip([str(b) for b in HISTOGRAM_BUCKETS] + ["inf"], self.histogram())),
+            "records": [{"stage": name, "target": target, "seconds": seconds}
+                        for name, target, seconds in self.records],
+        }
+        with open(path, 'w') as fh:
+            json.dump(trace, fh, indent=2)
+
+    def finish(self, trace_path=None):
+        self.report()
+        if trace_path:
+            self.dump_trace(trace_path)
@@ -0,0 +1,308 @@
+"""
+Shared test fixtures: the repository root on sys.path (the scripts are
+flat modules, some with dashes in their names and loaded through
+importlib), a throwaway PKI made with the openssl CLI, local TLS
+servers on 127.0.0.1 and a tree of git clones with local bare remotes.
+"""
+
+import os
+import shutil
+import socket
+import ssl
+import stat
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+OPENSSL_CONFIG = """\
+[ca]
+default_ca = test_ca
+
+[test_ca]
+dir = {dir}
+database = $dir/index.txt
+new_certs_dir = $dir/issued
+serial = $dir/serial
+default_md = sha256
+policy = any_name
+unique_subject = no
+email_in_dn = no
+
+[any_name]
+countryName = optional
+organizationName = optional
+commonName = supplied
+
+[ca_ext]
+basicConstraints = critical, CA:true
+keyUsage = critical, keyCertSign, cRLSign
+subjectKeyIdentifier = hash
+authorityKeyIdentifier = keyid:always
+
+[server_ext]
+basicConstraints = CA:false
+keyUsage = critical, digitalSignature, keyEncipherment
+extendedKeyUsage = serverAuth
+subjectAltName = IP:127.0.0.1
+authorityKeyIdentifier = keyid:always
+
+[client_ext]
+basicConstraints = CA:false
+keyUsage = critical, digitalSignature
+extendedKeyUsage = clientAuth
+authorityKeyIdentifier = keyid:always
+
+[self_signed_ext]
+basicConstraints = CA:false
+extendedKeyUsage = serverAuth
+subjectAltName = IP:127.0.0.1
+"""
+
+KEY_OPTIONS = {
+    "rsa": ["-algorithm", "RSA", "-pkeyopt", "rsa_keygen_bits:2048"],
+    "P-256": ["-algorithm", "EC", "-pkeyopt", "ec_paramgen_curve:P-256"],
+    "P-384": ["-algorithm", "EC", "-pkeyopt", "ec_paramgen_curve:P-384"],
+}
+
+
+class PKI:
+    """Keys and certificates issued with `openssl ca` in one directory."""
+
+    def __init__(self, directory):
+        self.dir = directory
+        os.makedirs(os.path.join(directory, "issued"))
+        open(os.path.join(directory, "index.txt"), "w").close()
+        with open(os.path.join(directory, "serial"), "w") as fh:
+            fh.write("1000\n")
+        self.config = os.path.join(directory, "openssl.cnf")
+        with open(self.config, "w") as fh:
+            fh.write(OPENSSL_CONFIG.format(dir=directory))
+
+    def path(self, name, suffix):
+        return os.path.join(self.dir, f"{name}.{suffix}")
+
+    def openssl(self, *args):
+        subprocess.run(["openssl", *args], check=True, capture_output=True)
+
+    def issue(self, name, issuer=None, key="rsa", ext="server_ext", start=None, end=None, days=365):
+        """
+        Certificate `name` signed by the certificate named `issuer` (self
+        signed without one), with its own key of type `key`. start and end
+        (YYYYMMDDHHMMSSZ) override the validity period. Returns the PEM path.
+        """
+        keyfile, csr, cert = self.path(name, "key"), self.path(name, "csr"), self.path(name, "pem")
+        self.openssl("genpkey", *KEY_OPTIONS[key], "-out", keyfile)
+        self.openssl("req", "-new", "-key", keyfile, "-subj", f"/C=DE/O=Test Org/CN={name}", "-out", csr)
+        args = ["ca", "-batch", "-notext", "-config", self.config, "-extensions", ext, "-in", csr, "-out", cert]
+        if issuer is None:
+            args += ["-selfsign", "-keyfile", keyfile]
+        else:
+            args += ["-cert", self.path(issuer, "pem"), "-keyfile", self.path(issuer, "key")]
+        if key == "P-384":
+            args += ["-md", "sha384"]
+        if start or end:
+            args += ["-startdate", start, "-enddate", end]
+        else:
+            args += ["-days", str(days)]
+        self.openssl(*args)
+        return cert
+
+    def der(self, name):
+        with open(self.path(name, "pem")) as fh:
+            return ssl.PEM_cert_to_DER_cert(fh.read())
+
+    def chain_file(self, name, *pem_paths):
+        """PEM bundle `name` holding the certificates in pem_paths, in that order."""
+        path = self.path(name, "chain")
+        with open(path, "w") as fh:
+            for pem_path in pem_paths:
+                with open(pem_path) as src:
+                    fh.write(src.read())
+        return path
+
+
+class TLSServer:
+    """Completes a TLS handshake with every client, one connection at a time."""
+
+    def __init__(self, certfile, keyfile):
+        self.context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self.context.load_cert_chain(certfile, keyfile)
+        self.sock = socket.create_server(("127.0.0.1", 0))
+        self.port = self.sock.getsockname()[1]
+        self.target = f"127.0.0.1:{self.port}"
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+
+    def serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            conn.settimeout(5)
+            try:
+                with self.context.wrap_socket(conn, server_side=True):
+                    pass
+            except (OSError, ssl.SSLError):
+                conn.close()
+
+    def close(self):
+        # shutdown() is what wakes a thread blocked in accept().
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+        self.thread.join(5)
+
+
+@pytest.fixture(scope="session")
+def pki(tmp_path_factory):
+    """
+    A test CA with an intermediate, and the server certificates the TLS
+    tests need: a good leaf, an expired one, one only allowed for client
+    authentication and a self-signed one. P-256 and P-384 intermediates
+    each sign a leaf with a key on their curve.
+    """
+    if shutil.which("openssl") is None:
+        pytest.skip("the openssl command line tool is needed to build test certificates")
+    pki = PKI(str(tmp_path_factory.mktemp("pki")))
+    pki.issue("Test Root", ext="ca_ext", days=3650)
+    pki.issue("Test Intermediate", "Test Root", ext="ca_ext", days=3000)
+    pki.issue("leaf", "Test Intermediate")
+    pki.issue("expired", "Test Intermediate", start="20200101000000Z", end="20210101000000Z")
+    pki.issue("client only", "Test Intermediate", ext="client_ext")
+    pki.issue("self signed", ext="self_signed_ext")
+    for curve in ("P-256", "P-384"):
+        pki.issue(f"Test {curve} Intermediate", "Test Root", key=curve, ext="ca_ext", days=3000)
+        pki.issue(f"{curve} leaf", f"Test {curve} Intermediate", key=curve)
+    return pki
+
+
+@pytest.fixture(scope="session")
+def rogue_pki(tmp_path_factory, pki):
+    """A "Test Intermediate" with the real one's name but its own key, and a leaf it signed."""
+    rogue = PKI(str(tmp_path_factory.mktemp("rogue")))
+    rogue.issue("Test Intermediate", ext="ca_ext", days=3000)
+    rogue.issue("leaf", "Test Intermediate")
+    return rogue
+
+
+@pytest.fixture
+def tls_server(pki):
+    """
+    Factory: tls_server(leaf, *intermediates) starts a server presenting
+    that chain. The leaf comes from leaf_pki when given.
+    """
+    servers = []
+
+    def start(leaf, *intermediates, leaf_pki=None):
+        leaf_pki = leaf_pki or pki
+        certfile = pki.chain_file(f"{leaf} served", leaf_pki.path(leaf, "pem"),
+                                  *(pki.path(name, "pem") for name in intermediates))
+        server = TLSServer(certfile, leaf_pki.path(leaf, "key"))
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+@pytest.fixture
+def closed_port():
+    """127.0.0.1:<port> with nothing listening."""
+    sock = socket.create_server(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return f"127.0.0.1:{port}"
+
+
+GIT_IDENTITY = {
+    "GIT_AUTHOR_NAME": "Test", "GIT_AUTHOR_EMAIL": "test@example.com",
+    "GIT_COMMITTER_NAME": "Test", "GIT_COMMITTER_EMAIL": "test@example.com",
+}
+
+# Stands in for ssh: records its pid and never answers.
+HANGING_SSH = """#!/bin/sh
+echo $$ > "{pidfile}"
+exec sleep 60
+"""
+
+
+class ToolTree:
+    """
+    root/{current,behind,hanging}: clones of bare remotes tagged v1.0.
+    "behind"'s remote has one more commit; "hanging"'s remote is an ssh
+    URL whose ssh never answers.
+    """
+
+    def __init__(self, directory):
+        self.dir = directory
+        self.root = directory / "tools"
+        self.root.mkdir()
+        for name in ("current", "behind", "hanging"):
+            remote = str(directory / f"{name}.git")
+            self.git("init", "-q", "--bare", "-b", "main", remote)
+            seed = self.seed(name)
+            self.git("clone", "-q", remote, seed)
+            self.commit(seed, "README")
+            self.git("tag", "v1.0", cwd=seed)
+            self.git("push", "-q", "origin", "v1.0", cwd=seed)
+            self.git("clone", "-q", remote, str(self.root / name))
+            if name == "behind":
+                self.commit(seed, "NEWS")
+
+        hanging = str(self.root / "hanging")
+        ssh = directory / "hanging-ssh"
+        self.pidfile = directory / "ssh.pid"
+        ssh.write_text(HANGING_SSH.format(pidfile=self.pidfile))
+        ssh.chmod(ssh.stat().st_mode | stat.S_IXUSR)
+        self.git("config", "core.sshCommand", str(ssh), cwd=hanging)
+        self.git("remote", "set-url", "origin", "ssh://git@unreachable.invalid/hanging.git", cwd=hanging)
+
+    def git(self, *args, cwd=None):
+        env = dict(os.environ, **GIT_IDENTITY)
+        return subprocess.run(["git", *args], cwd=cwd, env=env, check=True, capture_output=True, text=True).stdout
+
+    def seed(self, name):
+        """The clone used to push to `name`'s remote."""
+        return str(self.dir / f"{name}-seed")
+
+    def commit(self, clone, name, push=True):
+        with open(os.path.join(clone, name), "w") as fh:
+            fh.write(name + "\n")
+        self.git("add", name, cwd=clone)
+        self.git("commit", "-q", "-m", f"Add {name}", cwd=clone)
+        if push:
+            self.git("push", "-q", "origin", "HEAD", cwd=clone)
+
+    def ssh_alive(self, wait=2.0):
+        """
+        Whether the last hanging ssh stand-in is still running after up to
+        `wait` seconds; SIGKILL is not instant. Zombies count as gone.
+        """
+        deadline = time.monotonic() + wait
+        while True:
+            try:
+                with open(f"/proc/{int(self.pidfile.read_text())}/stat") as fh:
+                    running = fh.read().rsplit(")", 1)[1].split()[0] != "Z"
+            except FileNotFoundError:
+                running = False
+            if not running or time.monotonic() > deadline:
+                return running
+            time.sleep(0.05)
+
+
+@pytest.fixture
+def tools(tmp_path):
+    if shutil.which("git") is None:
+        pytest.skip("git is needed")
+    return ToolTree(tmp_path)
@@ -0,0 +1,110 @@
+import json
+import ssl
+import time
+
+import pytest
+
+import tlschain
+from chaincache import ChainCache
+
+
+def inspect(server, cache, cafile):
+    return tlschain.inspect("127.0.0.1", server.port, cafile, 5, cache)
+
+
+@pytest.mark.parametrize("leaf, intermediate", [
+    ("leaf", "Test Intermediate"),
+    ("P-256 leaf", "Test P-256 Intermediate"),
+    ("P-384 leaf", "Test P-384 Intermediate"),
+])
+def test_cached_path_is_reused(pki, tls_server, tmp_path, leaf, intermediate):
+    server = tls_server(leaf, intermediate)
+    cafile = pki.path("Test Root", "pem")
+    path = str(tmp_path / "chains.json")
+
+    first = ChainCache(path, cafile=cafile)
+    assert inspect(server, first, cafile)[0] == "Ok"
+    assert (first.hits, first.misses) == (0, 1)
+    first.save()
+
+    second = ChainCache(path, cafile=cafile)
+    chain_of_trust, chain, negotiated = inspect(server, second, cafile)
+    assert chain_of_trust == "Ok"
+    assert tlschain.der_chain(chain) == [pki.der(leaf), pki.der(intermediate)]
+    assert negotiated["version"].startswith("TLSv1")
+    assert (second.hits, second.misses) == (1, 0)
+
+
+def test_leaf_signed_by_another_key_is_not_vouched_for(pki, rogue_pki, tls_server, tmp_path):
+    # Same issuer name as the cached intermediate, different signing key.
+    cafile = pki.path("Test Root", "pem")
+    cache = ChainCache(str(tmp_path / "chains.json"), cafile=cafile)
+    assert inspect(tls_server("leaf", "Test Intermediate"), cache, cafile)[0] == "Ok"
+
+    forged = tls_server("leaf", "Test Intermediate", leaf_pki=rogue_pki)
+    assert inspect(forged, cache, cafile)[0] == "NOT ok (chain incomplete)"
+    assert cache.hits == 0
+
+    # The forged leaf's verdict must not stick to the shared path.
+    assert inspect(tls_server("leaf", "Test Intermediate"), cache, cafile)[0] == "Ok"
+    assert cache.hits == 1
+
+
+def test_expired_leaf_under_cached_intermediate_is_fully_verified(pki, tls_server, tmp_path):
+    cafile = pki.path("Test Root", "pem")
+    cache = ChainCache(str(tmp_path / "chains.json"), cafile=cafile)
+    assert inspect(tls_server("leaf", "Test Intermediate"), cache, cafile)[0] == "Ok"
+
+    assert inspect(tls_server("expired", "Test Intermediate"), cache, cafile)[0] == "NOT ok (expired)"
+    assert cache.hits == 0
+
+
+def test_wrong_purpose_under_cached_intermediate_is_fully_verified(pki, tls_server, tmp_path):
+    cafile = pki.path("Test Root", "pem")
+    cache = ChainCache(str(tmp_path / "chains.json"), cafile=cafile)
+    assert inspect(tls_server("leaf", "Test Intermediate"), cache, cafile)[0] == "Ok"
+
+    assert inspect(tls_server("client only", "Test Intermediate"), cache, cafile)[0] is None
+    assert cache.hits == 0
+
+
+def test_incomplete_chain_verdict_is_cached(pki, tls_server, tmp_path):
+    # Trusting an unrelated CA leaves the test intermediate without a root.
+    cafile = pki.path("self signed", "pem")
+    cache = ChainCache(str(tmp_path / "chains.json"), cafile=cafile)
+    server = tls_server("leaf", "Test Intermediate")
+    assert inspect(server, cache, cafile)[0] == "NOT ok (chain incomplete)"
+    assert inspect(server, cache, cafile)[0] == "NOT ok (chain incomplete)"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lookup_needs_the_presented_intermediate_as_anchor(pki, tmp_path):
+    cache = ChainCache(str(tmp_path / "chains.json"))
+    chain = [pki.der("leaf"), pki.der("Test Intermediate")]
+    cache.store(chain, [{"notAfter": "Jan  1 00:00:00 2099 GMT"}], "Ok")
+    assert cache.lookup(chain, chain) == "Ok"
+    assert cache.lookup(chain, [pki.der("leaf"), pki.der("Test P-256 Intermediate")]) is None
+    assert cache.lookup(chain, []) is None
+    assert cache.lookup([], []) is None
+
+
+def test_malformed_certificates_are_not_stored(tmp_path):
+    cache = ChainCache(str(tmp_path / "chains.json"))
+    cache.store([b"not a certificate", b"\x30\x03\x02\x01"], [{"notAfter": "Jan  1 00:00:00 2099 GMT"}], "Ok")
+    assert not cache.entries
+    assert cache.context() is None
+
+
+def test_load_drops_unusable_entries(pki, tmp_path):
+    path = tmp_path / "chains.json"
+    anchor = ssl.DER_cert_to_PEM_cert(pki.der("Test Intermediate"))
+    future = time.time() + 3600
+    path.write_text(json.dumps({
+        "good": {"verdict": "Ok", "expires": future, "anchor": anchor},
+        "expired": {"verdict": "Ok", "expires": time.time() - 1, "anchor": anchor},
+        "no anchor": {"verdict": "Ok", "expires": future},
+        "garbage anchor": {"verdict": "Ok", "expires": future, "anchor": "-----BEGIN CERTIFICATE-----\nAAAA\n"},
+    }))
+    cache = ChainCache(str(path))
+    assert cache.context() is not None
+    assert list(cache.entries) == ["good"]
@@ -0,0 +1,108 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import checkpoint
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TESTSSL = os.path.join(REPO, "bench_fixtures", "bin", "testssl.sh")
+
+
+def bulk_ca_check(target_file, *args):
+    env = dict(os.environ, FAKE_TESTSSL_DELAY="0")
+    return subprocess.run([sys.executable, os.path.join(REPO, "bulk-CA-check.py"), "--testssl", TESTSSL,
+                           "--stats", str(target_file), *args],
+                          capture_output=True, text=True, env=env, timeout=60)
+
+
+@pytest.fixture
+def target_file(tmp_path):
+    path = tmp_path / "targets.txt"
+    path.write_text("one.test\nrefused.test\n")
+    return path
+
+
+def unfinished(path, tool="bulk-CA-check"):
+    """Leave a journal behind the way a run that died after one target would."""
+    journal = checkpoint.Journal(str(path), tool).open()
+    journal.record("one.test", {"chain_of_trust": "Ok", "certificate_validity": "Ok", "issuer": "Journal CA"})
+    journal.close()
+
+
+def test_torn_tail_is_dropped_on_resume(tmp_path):
+    path = tmp_path / "run.journal"
+    unfinished(path)
+    with open(path, "a") as fh:
+        fh.write('{"target": "refused.te')
+    journal = checkpoint.Journal(str(path), "bulk-CA-check")
+    assert list(journal.load()) == ["one.test"]
+    with journal.open(resume=True):
+        journal.record("refused.test", {"error": "Connection refused"})
+    assert list(checkpoint.Journal(str(path), "bulk-CA-check").load()) == ["one.test", "refused.test"]
+
+
+def test_journal_from_another_tool_is_refused(tmp_path):
+    path = tmp_path / "run.journal"
+    unfinished(path, tool="bulk-cert-nmap-check")
+    with pytest.raises(SystemExit, match="written by bulk-cert-nmap-check"):
+        checkpoint.Journal(str(path), "bulk-CA-check").load()
+
+
+def test_default_journal_is_removed_after_a_completed_run(target_file):
+    run = bulk_ca_check(target_file)
+    assert run.returncode == 0, run.stderr
+    assert "Total targets checked: 2" in run.stdout
+    assert not os.path.exists(f"{target_file}.journal")
+
+
+def test_failed_run_leaves_the_default_journal(tmp_path):
+    journal = checkpoint.Journal(str(tmp_path / "run.journal"), "bulk-CA-check", keep=False)
+    with pytest.raises(KeyboardInterrupt):
+        with journal.open():
+            journal.record("one.test", {"chain_of_trust": "Ok"})
+            raise KeyboardInterrupt
+    assert list(checkpoint.Journal(journal.path, "bulk-CA-check").load()) == ["one.test"]
+
+
+def test_unfinished_journal_is_not_overwritten(target_file):
+    journal = f"{target_file}.journal"
+    unfinished(journal)
+    before = open(journal).read()
+    run = bulk_ca_check(target_file)
+    assert run.returncode == 1
+    assert "already holds results; pass --resume to continue that run or --restart to discard it" in run.stderr
+    assert open(journal).read() == before
+
+
+def test_resume_replays_the_default_journal(target_file):
+    unfinished(f"{target_file}.journal")
+    run = bulk_ca_check(target_file, "--resume")
+    assert run.returncode == 0, run.stderr
+    assert "Journal CA" in run.stdout
+    assert "resumed from journal" in run.stderr
+    assert not os.path.exists(f"{target_file}.journal")
+
+
+def test_restart_discards_the_unfinished_journal(target_file):
+    unfinished(f"{target_file}.journal")
+    run = bulk_ca_check(target_file, "--restart")
+    assert run.returncode == 0, run.stderr
+    assert "Journal CA" not in run.stdout
+    assert "resumed from journal" not in run.stderr
+
+
+def test_explicit_journal_is_kept(target_file, tmp_path):
+    journal = tmp_path / "kept.journal"
+    run = bulk_ca_check(target_file, "--journal", str(journal))
+    assert run.returncode == 0, run.stderr
+    assert set(checkpoint.Journal(str(journal), "bulk-CA-check").load()) == {"one.test", "refused.test"}
+    assert not os.path.exists(f"{target_file}.journal")
+
+
+def test_no_journal(target_file):
+    unfinished(f"{target_file}.journal")
+    run = bulk_ca_check(target_file, "--no-journal")
+    assert run.returncode == 0, run.stderr
+    assert "Journal CA" not in run.stdout
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+import extract_params
+
+DOCUMENTS = {
+    "encoded body": json.dumps(json.dumps({"alpha": 1, "beta": {"gamma": [{"delta": 2}]}})),
+    "blank lines first": "\n\n  " + json.dumps('{"token": "x"}') + "\n",
+    "plain string": '"user=admin&debug=1"',
+    "object": '{"outer": {"inner": "a=b"}}',
+    "text": 'GET /?q=1 HTTP/1.1\nCookie: session=abc\n\n{"login": "me"}\n',
+}
+
+
+@pytest.mark.parametrize("content", DOCUMENTS.values(), ids=DOCUMENTS.keys())
+@pytest.mark.parametrize("chunk_size", [1, 7, 65536])
+def test_stream_matches_whole_file(tmp_path, content, chunk_size):
+    path = tmp_path / "capture.txt"
+    path.write_text(content)
+    expected = extract_params.collect_unique_parameters(str(path))
+    assert expected
+    assert extract_params.stream_unique_parameters(str(path), chunk_size) == expected
+    _, counts = extract_params.parameter_counts(str(path), chunk_size)
+    assert {name for _, _, name in counts} == expected
+
+
+def test_document_string_keys(tmp_path):
+    path = tmp_path / "body.json"
+    path.write_text(DOCUMENTS["encoded body"])
+    assert extract_params.stream_unique_parameters(str(path), 4) == {"alpha", "beta", "gamma", "delta"}
+
+
+def test_oversized_document_string_is_skipped(tmp_path):
+    path = tmp_path / "body.json"
+    path.write_text(DOCUMENTS["encoded body"])
+    assert extract_params.stream_unique_parameters(str(path), 4, max_fragment=16) == set()
@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import gen_string
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def generate(*args):
+    return subprocess.run([sys.executable, os.path.join(REPO, "gen_string.py"), *args],
+                          capture_output=True, timeout=60)
+
+
+@pytest.mark.parametrize("domain", [2, 3, 100, 1000, 4096, 10 ** 5 + 7])
+def test_permutation_is_a_bijection(domain):
+    permute = gen_string.Permutation(domain)
+    assert sorted(permute(n) for n in range(domain)) == list(range(domain))
+
+
+def test_wide_permutation():
+    # 62 ** 400 needs halves of 1191 bits, far past a single blake2b digest.
+    domain = 62 ** 400
+    permute = gen_string.Permutation(domain, key=b"k" * 16)
+    assert permute.half_bytes > gen_string.BLOCK_BYTES
+    values = [permute(n) for n in range(200)]
+    assert len(set(values)) == 200
+    assert all(0 <= value < domain for value in values)
+    assert values == [gen_string.Permutation(domain, key=b"k" * 16)(n) for n in range(200)]
+
+
+@pytest.mark.parametrize("length", [200, 1000])
+def test_unique_long_strings(length):
+    run = generate(str(length), "-n", "50", "--unique")
+    assert run.returncode == 0, run.stderr
+    lines = run.stdout.decode().splitlines()
+    assert len(lines) == 50 == len(set(lines))
+    assert all(len(line) == length and line.isalnum() for line in lines)
+
+
+def test_unique_exhausts_the_domain():
+    run = generate("2", "--charset", "a-c", "-n", "9", "--unique")
+    assert sorted(run.stdout.decode().split()) == [a + b for a in "abc" for b in "abc"]
+    run = generate("2", "--charset", "a-c", "-n", "10", "--unique")
+    assert run.returncode == 2
+    assert b"only 9 distinct strings of length 2 exist" in run.stderr
+
+
+def test_unique_jobs_keep_order():
+    charset = gen_string.expand_charset("a-f0-9")
+    key = os.urandom(16)
+    single = gen_string.unique_block(8, charset, key, 0, 3000)
+    parts = [gen_string.unique_block(8, charset, key, start, start + 1000) for start in (0, 1000, 2000)]
+    assert b"".join(parts) == single
+    run = generate("8", "--charset", "a-f0-9", "-n", "3000", "--unique", "-j", "2", "--batch", "256")
+    lines = run.stdout.split()
+    assert len(lines) == 3000 == len(set(lines))
@@ -0,0 +1,60 @@
+import sqlite3
+
+import pytest
+
+import ingest
+
+NMAP_XML = """<?xml version="1.0"?>
+<nmaprun>
+<host><address addr="10.0.0.5" addrtype="ipv4"/>
+<hostnames><hostname name="app.acme.test" type="user"/></hostnames>
+<ports>
+<port protocol="tcp"><state state="open"/></port>
+<port protocol="tcp" portid="443"><state state="open"/><service name="https" product="nginx"/></port>
+</ports>
+</host>
+</nmaprun>
+"""
+
+SSLSCAN_XML = """<?xml version="1.0"?>
+<document><ssltest port="443"><protocol type="tls" version="1.2" enabled="1"/></ssltest></document>
+"""
+
+FEROX_JSON = '{"type": "response", "url": 12345, "status": 200}\n'
+
+
+@pytest.fixture
+def task(tmp_path):
+    for folder, name, content in (("nmap", "odd.xml", NMAP_XML), ("sslscan", "nohost.xml", SSLSCAN_XML),
+                                  ("ferox", "odd.json", FEROX_JSON)):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / name).write_text(content)
+    return tmp_path
+
+
+def test_port_without_portid_is_skipped(task):
+    kind, rows, error = ingest.parse_file(str(task), "nmap", "nmap/odd.xml")
+    assert (kind, error) == ("nmap-xml", None)
+    assert rows["services"] == [("app.acme.test", 443, "tcp", "open", "https", "nginx")]
+
+
+def test_sslscan_test_without_host_is_skipped(task):
+    assert ingest.parse_file(str(task), "sslscan", "sslscan/nohost.xml")[1:] == ({}, None)
+
+
+def test_unexpected_parser_errors_are_recorded(task):
+    kind, rows, error = ingest.parse_file(str(task), "ferox", "ferox/odd.json")
+    assert (kind, rows) == ("error", {})
+    assert error.startswith(("TypeError: ", "AttributeError: "))
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_bad_file_does_not_abort_the_batch(task, tmp_path, capsys, jobs):
+    db_path = str(tmp_path / "ingest.db")
+    assert ingest.ingest(str(task), db_path, jobs=jobs) == 1
+    assert "Failed to parse ferox/odd.json" in capsys.readouterr().err
+    with sqlite3.connect(db_path) as db:
+        files = dict(db.execute("SELECT path, kind FROM files"))
+        services = db.execute("SELECT host, port FROM services").fetchall()
+    assert files == {"ferox/odd.json": "error", "nmap/odd.xml": "nmap-xml", "sslscan/nohost.xml": "sslscan-xml"}
+    assert services == [("app.acme.test", 443)]
@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+
+import extract_params
+from paramindex import ParamIndex
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def capture(directory, name, content):
+    path = directory / name
+    path.write_text(content)
+    return str(path)
+
+
+def query(index_path, *args):
+    return subprocess.run([sys.executable, os.path.join(REPO, "paramindex.py"), index_path, *args],
+                          capture_output=True, text=True, timeout=60)
+
+
+def test_index_run_drops_deleted_and_moved_files(tmp_path):
+    captures = tmp_path / "captures"
+    captures.mkdir()
+    kept = capture(captures, "kept.txt", "GET /?kept=1 HTTP/1.1\n")
+    deleted = capture(captures, "deleted.txt", "GET /?deleted=1 HTTP/1.1\n")
+    moved = capture(captures, "moved.txt", "GET /?moved=1 HTTP/1.1\n")
+    db = str(tmp_path / "params.db")
+    files = extract_params.expand_inputs([str(captures)])
+    assert extract_params.indexed_unique_parameters(files, db, jobs=1) == {"kept", "deleted", "moved"}
+
+    os.remove(deleted)
+    os.rename(moved, tmp_path / "moved.txt")
+    files = extract_params.expand_inputs([str(captures)])
+    assert extract_params.indexed_unique_parameters(files, db, jobs=1) == {"kept"}
+    with ParamIndex(db) as index:
+        assert [row[0] for row in index.query()] == ["kept"]
+        assert index.is_current(kept)
+
+
+def test_prune_flag(tmp_path):
+    db = str(tmp_path / "params.db")
+    gone = capture(tmp_path, "gone.txt", "a=1\n")
+    capture(tmp_path, "here.txt", "b=2\n")
+    extract_params.indexed_unique_parameters(extract_params.expand_inputs([str(tmp_path / "*.txt")]), db, jobs=1)
+    os.remove(gone)
+
+    assert query(db).stdout.split() == ["a", "b"]
+    run = query(db, "--prune")
+    assert run.stdout.split() == ["b"]
+    assert f"Dropped missing file '{gone}' from the index." in run.stderr
+    assert query(db, "--prune").stderr == ""
@@ -0,0 +1,54 @@
+import os
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import procgroup
+
+
+def alive(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as fh:
+            return fh.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+def test_output_and_exit_code():
+    assert procgroup.run(["sh", "-c", "echo out; echo err >&2; exit 3"]) == (3, "out\n", "err\n")
+    assert procgroup.run(["sh", "-c", "echo out; echo err >&2"], stderr=subprocess.STDOUT) == (0, "out\nerr\n", None)
+
+
+def test_timeout_kills_the_whole_group(tmp_path):
+    pidfile = tmp_path / "grandchild.pid"
+    started = time.monotonic()
+    # The grandchild keeps the pipe open, so only a group kill ends the run.
+    assert procgroup.run(["sh", "-c", f"sleep 60 & echo $! > {pidfile}; wait"], timeout=0.5) is None
+    assert time.monotonic() - started < 5
+    grandchild = int(pidfile.read_text())
+    deadline = time.monotonic() + 2
+    while alive(grandchild) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not alive(grandchild)
+    assert not procgroup.running
+
+
+def test_interrupt_kills_running_groups():
+    pool = ThreadPoolExecutor(max_workers=2)
+    futures = [pool.submit(procgroup.run, ["sleep", "60"]) for _ in range(4)]
+    deadline = time.monotonic() + 5
+    while len(procgroup.running) < 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    started = time.monotonic()
+    procgroup.interrupt(pool)
+    assert [future.result(timeout=5)[0] for future in futures[:2]] == [-9, -9]
+    assert all(future.cancelled() for future in futures[2:])
+    assert time.monotonic() - started < 5
+    assert not procgroup.running
+
+
+def test_missing_command_raises():
+    with pytest.raises(OSError):
+        procgroup.run([os.path.join("/nonexistent", "testssl.sh")])
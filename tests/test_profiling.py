@@ -0,0 +1,85 @@
+import argparse
+import pstats
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import profiling
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    """A profiling.start()ed Profiler writing to tmp_path/run.prof, stopped again afterwards."""
+    args = argparse.Namespace(profile=str(tmp_path / "run.prof"), profile_top=10)
+    active = profiling.start(args)
+    try:
+        yield active
+    finally:
+        if active.running:
+            active.stop()
+        profiling.active = None
+
+
+def busy(n):
+    return sum(i * i for i in range(n))
+
+
+def test_thread_pool_under_profile(profiler):
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = [pool.submit(busy, 20000) for _ in range(4)]
+        # A worker that failed to start its profiler never runs its tasks.
+        assert [future.result(timeout=10) for future in futures] == [19999 * 20000 * 39999 // 6] * 4
+    profiler.finish()
+
+    stats = pstats.Stats(profiler.path)
+    calls = {func[2]: values[1] for func, values in stats.stats.items()}
+    assert calls["busy"] == 4
+    with open(f"{profiler.path}.txt") as fh:
+        summary = fh.read()
+    assert "Threads  : " in summary
+    assert "Top 10 functions by own time:" in summary
+
+
+def test_subprocess_waits_are_not_cpu(profiler):
+    subprocess.run(["sleep", "0.2"], check=True)
+    # communicate() blocks in poll(); its caller decides the category.
+    subprocess.run(["sh", "-c", "sleep 0.2; echo done"], check=True, capture_output=True)
+    time.sleep(0.1)
+    profiler.stop()
+
+    kinds, total = profiling.time_by_kind(pstats.Stats(profiler.profiles[0]))
+    assert kinds["subprocesses"] > 0.3
+    assert 0.05 < kinds["locks and sleeps"] < 0.2
+    assert kinds["network"] < 0.05
+    assert kinds["other I/O waits"] < 0.05
+    assert sum(kinds.values()) == pytest.approx(total)
+
+
+class FakeStats:
+    def __init__(self, stats):
+        self.stats = stats
+
+
+def test_fd_waits_go_to_their_callers():
+    poll = ("~", 0, "<method 'poll' of 'select.poll' objects>")
+    read = ("~", 0, "<built-in method posix.read>")
+    selectors = ("/usr/lib/python3/selectors.py", 402, "select")
+    communicate = ("/usr/lib/python3/subprocess.py", 2055, "_communicate")
+    urllib3 = ("/site-packages/urllib3/util/wait.py", 80, "poll_wait_for_socket")
+    script = ("/root/package/ingest.py", 10, "main")
+    stats = FakeStats({
+        poll: (4, 4, 3.0, 3.0, {selectors: (1, 1, 1.0, 1.0), urllib3: (3, 3, 2.0, 2.0)}),
+        selectors: (1, 1, 0.0, 1.0, {communicate: (1, 1, 0.0, 1.0)}),
+        communicate: (1, 1, 0.0, 1.0, {}),
+        urllib3: (3, 3, 0.0, 2.0, {}),
+        read: (1, 1, 0.5, 0.5, {script: (1, 1, 0.5, 0.5)}),
+        script: (1, 1, 0.25, 3.75, {}),
+    })
+    kinds, total = profiling.time_by_kind(stats)
+    assert total == 3.75
+    assert kinds["subprocesses"] == pytest.approx(1.0)
+    assert kinds["network"] == pytest.approx(2.0)
+    assert kinds["other I/O waits"] == pytest.approx(0.5)
+    assert kinds["Python and C code"] == pytest.approx(0.25)
@@ -0,0 +1,143 @@
+import importlib
+import json
+import os
+import subprocess
+import sys
+import time
+import types
+
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_BIN = os.path.join(REPO, "bench_fixtures", "bin")
+
+tls_assess = importlib.import_module("tls-assess")
+
+
+def run_assess(tmp_path, targets, *args, extra_env=None):
+    target_file = tmp_path / "targets.txt"
+    target_file.write_text("\n".join(targets) + "\n")
+    env = dict(os.environ, FAKE_TESTSSL_DELAY="0")
+    env.update(extra_env or {})
+    return subprocess.run([sys.executable, os.path.join(REPO, "tls-assess.py"), str(target_file),
+                           "--testssl", os.path.join(FAKE_BIN, "testssl.sh"),
+                           "--chain-cache", str(tmp_path / "chains.json"), *args],
+                          capture_output=True, text=True, env=env, timeout=120)
+
+
+@pytest.fixture
+def endpoints(pki, tls_server, closed_port):
+    """[chained, self signed, closed] as host:port targets, plus the root to trust."""
+    return [tls_server("leaf", "Test Intermediate").target, tls_server("self signed").target,
+            closed_port], pki.path("Test Root", "pem")
+
+
+def test_reports(endpoints, tmp_path):
+    targets, root = endpoints
+    run = run_assess(tmp_path, targets, "--ca-bundle", root, "--json", str(tmp_path / "tls.jsonl"), "--stats")
+    assert run.returncode == 0, run.stderr
+    ca, nmap = run.stdout.split("\nSummary", 1)[0], run.stdout.split("Total targets with errors: ", 1)[1]
+
+    # The ca report, block per target in input order.
+    blocks = ca.split("-" * 40 + "\n")
+    assert [block.splitlines()[0] for block in blocks[:3]] == [f"Target: {target}" for target in targets]
+    assert "Chain of trust: Ok" in blocks[0]
+    assert "Issuer: Test Intermediate (Test Org from DE)" in blocks[0]
+    assert "Chain of trust: NOT ok (self signed)" in blocks[1]
+    assert "Error: Connection refused." in blocks[2]
+    assert "Total targets checked: 3" in run.stdout
+
+    # The nmap report, one label per target.
+    labels = [line.split(" ->")[0] for line in nmap.splitlines() if " ->" in line]
+    assert labels == targets
+    assert "Subject   : countryName=DE | organizationName=Test Org | commonName=leaf" in nmap
+    assert "Issuer    : countryName=DE | organizationName=Test Org | commonName=Test Intermediate" in nmap
+    assert f"{targets[2]} -> Error     : Connection refused" in nmap
+
+    records = [json.loads(line) for line in (tmp_path / "tls.jsonl").read_text().splitlines()]
+    assert [record["target"] for record in records] == targets
+    assert records[0]["chain_length"] == 2
+    assert records[0]["negotiated"]["version"].startswith("TLSv1")
+    assert "negotiated" not in records[2]
+
+    # A refused connection is not a chain decided in-process.
+    assert "decided in-process                 2" in run.stderr
+    assert "Connection refused                 1" in run.stderr
+
+
+def test_output_dir(endpoints, tmp_path):
+    targets, root = endpoints
+    run = run_assess(tmp_path, targets, "--ca-bundle", root, "--report", "nmap", "--output-dir",
+                     str(tmp_path / "reports"))
+    assert run.returncode == 0, run.stderr
+    assert run.stdout == ""
+    assert sorted(os.listdir(tmp_path / "reports")) == ["nmap.txt"]
+    report = (tmp_path / "reports" / "nmap.txt").read_text()
+    assert "Subject   : countryName=DE | organizationName=Test Org | commonName=leaf" in report
+
+
+def test_undecided_chain_falls_back_to_testssl(pki, tls_server, tmp_path):
+    server = tls_server("client only", "Test Intermediate")
+    run = run_assess(tmp_path, [server.target], "--ca-bundle", pki.path("Test Root", "pem"), "--report", "ca")
+    assert run.returncode == 0, run.stderr
+    # The recorded testssl.sh -S run, not anything seen in the handshake.
+    assert "Chain of trust: Ok" in run.stdout
+    assert "Issuer: R3 (Let's Encrypt from US)" in run.stdout
+
+    run = run_assess(tmp_path, [server.target], "--ca-bundle", pki.path("Test Root", "pem"), "--report", "ca",
+                     "--no-fallback")
+    assert f"Chain of trust for {server.target} undecided; testssl.sh fallback disabled" in run.stdout
+
+
+def test_scan_ciphers(monkeypatch):
+    monkeypatch.setenv("FAKE_TESTSSL_DELAY", "0")
+    scan = tls_assess.scan_ciphers("example", "127.0.0.1", 443, FAKE_BIN, timeout=10)
+    assert "TLS_AES_256_GCM_SHA384" in scan["output"]
+    assert tls_assess.scan_ciphers("example", "127.0.0.1", 443, "/nonexistent", timeout=10)["error"].startswith(
+        "Failed to run testssl.sh: ")
+
+    monkeypatch.setenv("FAKE_TESTSSL_DELAY", "30")
+    started = time.monotonic()
+    assert tls_assess.scan_ciphers("example", "127.0.0.1", 443, FAKE_BIN, timeout=1) == {
+        "error": "testssl.sh -P timed out on 127.0.0.1:443 after 1s"}
+    assert time.monotonic() - started < 5
+
+
+def test_cipher_report_keeps_target_order(capsys):
+    targets = [("b", "b.test", 443), ("a", "a.test", 443), ("c", "c.test", 443)]
+    scans = {"a": {"output": "TLSv1.3\n x1302 TLS_AES_256_GCM_SHA384\n"}, "c": {"error": "timed out"}}
+    printed = []
+    ciphers = types.SimpleNamespace(print_ciphers=lambda lines, *args, **kwargs: printed.append(lines) or
+                                    print(f"{len(lines)} lines"))
+    args = types.SimpleNamespace(light=False, noinfo=False)
+    tls_assess.report_ciphers(targets, scans, ciphers, {"TLS_AES_256_GCM_SHA384": {}}, args)
+    assert capsys.readouterr().out.splitlines() == [
+        "Skipping b.test:443: no TLS handshake", "2 lines", "timed out"]
+    assert printed == [["TLSv1.3", " x1302 TLS_AES_256_GCM_SHA384"]]
+
+    tls_assess.report_ciphers(targets, scans, ciphers, {}, args)
+    assert capsys.readouterr().out == "Failed to fetch or parse IANA TLS parameters.\n"
+
+
+def test_ciphers_run_on_the_pool(endpoints, tmp_path):
+    pytest.importorskip("requests")
+    pytest.importorskip("bs4")
+    bench_scanners = importlib.import_module("bench_scanners")
+    server = bench_scanners.start_fixture_server(0)
+    targets, root = endpoints
+    second = targets[:1] + [targets[0].replace("127.0.0.1", "localhost")]
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    env = {"CIPHERS_IANA_URL": base + bench_scanners.IANA_PATH, "CIPHERS_CIPHERSUITE_URL": base,
+           "NO_PROXY": "127.0.0.1,localhost", "FAKE_TESTSSL_DELAY": "2"}
+    try:
+        started = time.monotonic()
+        run = run_assess(tmp_path, second + targets[2:], "--ca-bundle", root, "--report", "ca", "--ciphers",
+                         "--testssl-dir", FAKE_BIN, extra_env=env)
+        # Both enumerations overlap on the pool instead of running back to back.
+        assert time.monotonic() - started < 3.9
+    finally:
+        server.shutdown()
+    assert run.returncode == 0, run.stderr
+    report = run.stdout.split("Total targets with errors: ", 1)[1]
+    assert report.count("TLSv1.2 (server order)") == 2
+    assert report.rstrip().endswith(f"Skipping {targets[2]}: no TLS handshake")
@@ -0,0 +1,112 @@
+import importlib
+import os
+
+import _ssl
+import pytest
+
+import tlschain
+
+bulk_ca = importlib.import_module("bulk-CA-check")
+
+ISSUER = "Test Intermediate (Test Org from DE)"
+
+
+def test_chained_leaf_under_test_ca(pki, tls_server):
+    server = tls_server("leaf", "Test Intermediate")
+    result = tlschain.check_chain(server.target, cafile=pki.path("Test Root", "pem"))
+    assert result["chain_of_trust"] == "Ok"
+    assert result["certificate_validity"].startswith("(UTC) 36")
+    assert "days (" in result["certificate_validity"]
+    assert result["issuer"] == ISSUER
+
+
+def test_missing_intermediate_is_incomplete(pki, tls_server):
+    server = tls_server("leaf")
+    result = tlschain.check_chain(server.target, cafile=pki.path("Test Root", "pem"))
+    assert result["chain_of_trust"] == "NOT ok (chain incomplete)"
+    assert result["issuer"] == ISSUER
+
+
+def test_self_signed(pki, tls_server):
+    server = tls_server("self signed")
+    result = tlschain.check_chain(server.target, cafile=pki.path("Test Root", "pem"))
+    assert result["chain_of_trust"] == "NOT ok (self signed)"
+    assert result["issuer"] == "self signed (Test Org from DE)"
+
+
+def test_expired_leaf(pki, tls_server):
+    server = tls_server("expired", "Test Intermediate")
+    result = tlschain.check_chain(server.target, cafile=pki.path("Test Root", "pem"))
+    assert result == {
+        "chain_of_trust": "NOT ok (expired)",
+        "certificate_validity": "(UTC) expired (2020-01-01 00:00 --> 2021-01-01 00:00)",
+        "issuer": ISSUER,
+    }
+
+
+def test_unclassified_verify_error_is_undecided(pki, tls_server):
+    # "unsupported certificate purpose" has no testssl.sh wording here.
+    server = tls_server("client only", "Test Intermediate")
+    assert tlschain.check_chain(server.target, cafile=pki.path("Test Root", "pem")) is None
+
+
+def test_connection_refused(closed_port):
+    assert tlschain.check_chain(closed_port) == {"error": "Connection refused."}
+
+
+def test_presented_chain_reads_the_unverified_chain(pki, tls_server):
+    # _sslobj.get_unverified_chain() is private before Python 3.13.
+    server = tls_server("leaf", "Test Intermediate")
+    chain, negotiated = tlschain.connect("127.0.0.1", server.port, tlschain.make_context(verify=False), 5)
+    assert all(isinstance(cert, _ssl.Certificate) for cert in chain)
+    assert tlschain.der_chain(chain) == [pki.der("leaf"), pki.der("Test Intermediate")]
+    assert chain[0].get_info()["subject"] == ((("countryName", "DE"),), (("organizationName", "Test Org"),),
+                                              (("commonName", "leaf"),))
+    assert negotiated["version"].startswith("TLSv1")
+    assert negotiated["cipher"] and negotiated["bits"]
+
+
+def test_verify_returns_the_chain_even_when_it_fails(pki, tls_server):
+    server = tls_server("expired", "Test Intermediate")
+    chain_of_trust, chain, _ = tlschain.verify("127.0.0.1", server.port, pki.path("Test Root", "pem"), 5)
+    assert chain_of_trust == "NOT ok (expired)"
+    assert tlschain.der_chain(chain) == [pki.der("expired"), pki.der("Test Intermediate")]
+
+
+def test_fast_check_decides_in_process(pki, tls_server):
+    server = tls_server("leaf", "Test Intermediate")
+    result = bulk_ca.fast_check(server.target, testssl="/nonexistent/testssl.sh",
+                                cafile=pki.path("Test Root", "pem"), connect_timeout=5)
+    assert set(result) == {"chain_of_trust", "certificate_validity", "issuer"}
+    assert result["chain_of_trust"] == "Ok"
+
+
+def test_fast_check_falls_back_to_testssl(pki, tls_server, monkeypatch):
+    monkeypatch.setenv("FAKE_TESTSSL_DELAY", "0")
+    server = tls_server("client only", "Test Intermediate")
+    testssl = os.path.join(os.path.dirname(tlschain.__file__), "bench_fixtures", "bin", "testssl.sh")
+    result = bulk_ca.fast_check(server.target, testssl=testssl, timeout=30,
+                                cafile=pki.path("Test Root", "pem"), connect_timeout=5)
+    # The recorded testssl.sh -S run, not anything seen in the handshake.
+    assert result == {
+        "chain_of_trust": "Ok",
+        "certificate_validity": "(UTC)   3711 >= 60 days (2024-04-01 00:00 --> 2034-06-30 23:59)",
+        "issuer": "R3 (Let's Encrypt from US)",
+    }
+
+
+@pytest.mark.parametrize("target, expected", [
+    ("example.com", ("example.com", 443)),
+    ("example.com:8443", ("example.com", 8443)),
+    ("https://example.com:444/path", ("example.com", 444)),
+    ("[::1]:8443", ("::1", 8443)),
+])
+def test_parse_target(target, expected):
+    assert tlschain.parse_target(target) == expected
+
+
+def test_format_validity_and_issuer():
+    info = {"notBefore": "Jan  1 00:00:00 2020 GMT", "notAfter": "Jan  1 00:00:00 2021 GMT",
+            "issuer": ((("commonName", "CA"),), (("organizationName", "Org"),))}
+    assert tlschain.format_validity(info).startswith("(UTC) expired (2020-01-01")
+    assert tlschain.format_issuer(info) == "CA (Org)"
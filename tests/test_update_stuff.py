@@ -0,0 +1,77 @@
+import importlib
+import time
+
+import gitrepos
+
+update_stuff = importlib.import_module("update-stuff")
+
+
+def test_remote_unchanged(tools):
+    assert gitrepos.remote_unchanged(str(tools.root / "behind"), timeout=1) is False
+    assert gitrepos.remote_unchanged(str(tools.root / "current"), timeout=1) is True
+    started = time.monotonic()
+    assert gitrepos.remote_unchanged(str(tools.root / "hanging"), timeout=1) is None  # timed out: just update
+    assert time.monotonic() - started < 5
+    assert not tools.ssh_alive()
+
+
+def test_remote_unchanged_without_git(tools, monkeypatch):
+    monkeypatch.setattr(gitrepos, "GIT_ENV", dict(gitrepos.GIT_ENV, PATH="/nonexistent"))
+    assert gitrepos.remote_unchanged(str(tools.root / "current")) is None
+
+
+def test_fast_forward(tools):
+    behind = str(tools.root / "behind")
+    assert gitrepos.fast_forward(behind, timeout=10) == "Repository updated successfully."
+    assert tools.git("log", "-1", "--format=%s", cwd=behind).strip() == "Add NEWS"
+    assert gitrepos.fast_forward(behind, timeout=10) == "Already up to date."
+
+
+def test_local_commits_are_not_merged(tools):
+    behind = str(tools.root / "behind")
+    tools.commit(behind, "LOCAL", push=False)
+    head = tools.git("rev-parse", "HEAD", cwd=behind)
+    assert gitrepos.fast_forward(behind, timeout=10) == (
+        "Error during update: diverged from upstream (1 local, 1 upstream commits); merge by hand.")
+    assert tools.git("rev-parse", "HEAD", cwd=behind) == head
+    assert tools.git("status", "--porcelain", cwd=behind) == ""
+
+    # Ahead only: nothing to bring in.
+    current = str(tools.root / "current")
+    tools.commit(current, "LOCAL", push=False)
+    assert gitrepos.fast_forward(current, timeout=10) == "Already up to date."
+
+
+def test_fast_forward_without_upstream(tools):
+    current = str(tools.root / "current")
+    tools.git("branch", "--unset-upstream", cwd=current)
+    assert gitrepos.fast_forward(current, timeout=10).startswith("Fatal error during update: no upstream")
+
+
+def test_main_updates_on_the_pool(tools, capsys):
+    started = time.monotonic()
+    update_stuff.main(str(tools.root), cache_path=None, jobs=3, timeout=1)
+    # One timed-out ls-remote, then one timed-out fetch, on their own worker.
+    assert time.monotonic() - started < 8
+    out = capsys.readouterr().out
+    blocks = out.split("\nChecking repository: ")[1:]
+    assert [block.splitlines()[0] for block in blocks] == [str(tools.root / name)
+                                                          for name in ("behind", "current", "hanging")]
+    assert "Update Status: Repository updated successfully." in blocks[0]
+    assert "Update Status: Already up to date." in blocks[1]
+    assert "Update Status: Error during update: timed out after 1s" in blocks[2]
+    assert not tools.ssh_alive()
+
+
+def test_main_runs_repositories_concurrently(tools, capsys):
+    hanging = str(tools.root / "hanging")
+    for name in ("hanging2", "hanging3"):
+        clone = str(tools.root / name)
+        tools.git("clone", "-q", hanging, clone)
+        for key in ("core.sshCommand", "remote.origin.url"):
+            tools.git("config", key, tools.git("config", key, cwd=hanging).strip(), cwd=clone)
+    started = time.monotonic()
+    update_stuff.main(str(tools.root), cache_path=None, jobs=8, timeout=1)
+    # Three hanging remotes cost two timeouts in total, not six.
+    assert time.monotonic() - started < 4
+    assert capsys.readouterr().out.count("timed out after 1s") == 3
@@ -0,0 +1,56 @@
+import importlib
+import time
+
+import procgroup
+
+update_stuff1 = importlib.import_module("update-stuff1")
+
+
+def test_check_repositories(tools, capsys):
+    root = tools.root
+    started = time.monotonic()
+    summary = update_stuff1.check_repositories(str(root), jobs=3, timeout=2, cache_path=None)
+    elapsed = time.monotonic() - started
+
+    repos = [str(root / name) for name in ("behind", "current", "hanging")]
+    assert summary == [
+        (repos[0], "v1.0", "Repository updated successfully."),
+        (repos[1], "v1.0", "Already up to date."),
+        (repos[2], "v1.0", "Error during update: timed out after 2s"),
+    ]
+    # ls-remote and pull each time out once on the hanging remote.
+    assert elapsed < 10
+    assert tools.git("log", "-1", "--format=%s", cwd=repos[0]).strip() == "Add NEWS"
+
+    # Progress is printed as repositories finish, one block each.
+    progress = capsys.readouterr().out
+    for done in (1, 2, 3):
+        assert f"\n[{done}/3] Checking repository: " in progress
+    assert progress.count("Update Status: ") == 3
+
+    # The timeout killed the whole process group, ssh stand-in included.
+    assert not procgroup.running
+    assert not tools.ssh_alive()
+
+    update_stuff1.display_summary(summary)
+    out = capsys.readouterr().out
+    assert out.splitlines()[-4:] == [
+        "Total repositories identified:  3",
+        "Total repositories already up to date:  1",
+        "Total repositories updated successfully:  1",
+        "Total repositories not updated due to errors:  1",
+    ]
+    rows = out.splitlines()[5:8]
+    assert rows == [
+        f"{repos[0]:<60} {'v1.0':<20} {'Repository updated successfully.':<50}",
+        f"{repos[1]:<60} {'v1.0':<20} {'Already up to date.':<50}",
+        f"{repos[2]:<60} {'v1.0':<20} {'Not updated':<50}",
+    ]
+
+
+def test_setup_files_are_flagged(tools):
+    behind = str(tools.root / "behind")
+    tools.commit(tools.seed("behind"), "requirements.txt")
+    assert update_stuff1.update_repository(behind, timeout=10) == (
+        behind, "v1.0", "Repository updated successfully. Additional setup may be required.")
+    assert update_stuff1.update_repository(behind, timeout=10)[2] == "Already up to date."
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+One TLS pass per target for the reports bulk-CA-check.py,
+bulk-cert-nmap-check.py and ciphers-new.py produce separately.
+
+Each endpoint gets a single handshake (tlschain.inspect) that yields the
+chain of trust verdict, the presented chain and the negotiated protocol
+and cipher. The "ca" and "nmap" reports are rendered from it in each
+tool's own format. Only chains the handshake cannot classify fall back
+to testssl.sh -S, as bulk-CA-check.py --fast does. Cipher enumeration
+(testssl.sh -P, classified by ciphers-new.py) is the expensive part and
+runs only with --ciphers, on the same pool and under the same --timeout,
+and is reported in target order.
+
+    python3 tls-assess.py targets.txt
+    python3 tls-assess.py targets.txt --report nmap -p 443,8443 --json tls.jsonl
+    python3 tls-assess.py targets.txt --ciphers --light --output-dir reports/
+"""
+
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import ssl
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import tlschain
+from chaincache import ChainCache, DEFAULT_CACHE_PATH
+from scanstats import ScanStats
+import procgroup
+import profiling
+
+# The per-tool scripts have dashes in their names, so they are loaded by name.
+bulk_ca = importlib.import_module("bulk-CA-check")
+nmap_check = importlib.import_module("bulk-cert-nmap-check")
+
+stats = ScanStats("tls-assess")
+
+REPORTS = ["ca", "nmap"]
+NMAP_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+def load_targets(path, default_ports):
+    """[(label, host, port)] from a target file; lines without a port get every default port."""
+    targets = []
+    with open(path) as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            host, port = tlschain.parse_target(line, default_port=0)
+            if port:
+                targets.append((line, host, port))
+            elif len(default_ports) == 1:
+                targets.append((line, host, default_ports[0]))
+            else:
+                targets.extend((f"{host}:{p}", host, p) for p in default_ports)
+    return list(dict.fromkeys(targets))
+
+
+def nmap_info(chain):
+    """bulk-cert-nmap-check.py's result dict, built from the leaf nmap's ssl-cert script would print."""
+    info = chain[0].get_info()
+    try:
+        not_before = datetime.strptime(info["notBefore"], tlschain.CERT_TIME_FORMAT).strftime(NMAP_TIME_FORMAT)
+        not_after = datetime.strptime(info["notAfter"], tlschain.CERT_TIME_FORMAT).strftime(NMAP_TIME_FORMAT)
+    except (KeyError, ValueError):
+        return {"error": "Certificate information not found"}
+    status_text, expired = nmap_check.validity_status(not_after)
+    san = ", ".join(f"{kind}:{value}" for kind, value in info.get("subjectAltName", ()))
+    return {
+        "subject": [f"{key}={value}" for rdn in info.get("subject", ()) for key, value in rdn],
+        "san": san or None,
+        "issuer": [f"{key}={value}" for rdn in info.get("issuer", ()) for key, value in rdn],
+        "not_before": not_before,
+        "not_after": not_after,
+        "status_text": status_text,
+        "expired": expired,
+    }
+
+
+def nmap_error(exc):
+    """The error bulk-cert-nmap-check.py reads out of nmap's port state for the same failure."""
+    if isinstance(exc, ConnectionRefusedError):
+        return {"error": "Connection refused"}
+    if isinstance(exc, TimeoutError):
+        return {"error": "Connection timeout"}
+    if isinstance(exc, ssl.SSLError):
+        return {"error": "Certificate not found"}
+    return {"error": "Certificate information not found"}
+
+
+def assess(label, host, port, args, cache):
+    """Everything one endpoint contributes to the reports, from one handshake where possible."""
+    record = {"target": label, "host": host, "port": port}
+    try:
+        with stats.stage("handshake", label):
+            chain_of_trust, chain, negotiated = tlschain.inspect(host, port, args.ca_bundle,
+                                                                 args.connect_timeout, cache)
+            if not chain:
+                chain, negotiated = tlschain.connect(host, port, tlschain.make_context(verify=False),
+                                                     args.connect_timeout)
+    except (OSError, ssl.SSLError) as e:
+        record["ca"] = tlschain.connection_error(e)
+        record["nmap"] = nmap_error(e)
+    else:
+        record["ca"] = tlschain.chain_result(chain_of_trust, chain)
+        record["nmap"] = nmap_info(chain) if chain else {"error": "Certificate not found"}
+        record["negotiated"] = negotiated
+        record["chain_length"] = len(chain or ())
+
+    if "ca" in args.report and record["ca"] is None:
+        if args.no_fallback:
+            record["ca"] = {"failed": f"Chain of trust for {label} undecided; testssl.sh fallback disabled"}
+        else:
+            stats.count("fallback to testssl.sh")
+            with stats.stage("testssl", label):
+                record["ca"] = bulk_ca.check_target(label, args.testssl, args.timeout)
+    elif record["ca"] is not None and "negotiated" in record:
+        stats.count("decided in-process")
+    if "error" in record["nmap"]:
+        stats.error(record["nmap"]["error"])
+    return record
+
+
+def report_ca(targets, records):
+    results = {}
+    for label, _, _ in targets:
+        results[label] = records[label]["ca"]
+        bulk_ca.print_result(label, results[label])
+    bulk_ca.print_summary([label for label, _, _ in targets], results)
+
+
+def report_nmap(targets, records, wanted):
+    labels = [f"{host}:{port} ->" for _, host, port in targets]
+    max_lbl = max(len(lbl) for lbl in labels)
+    for (label, _, _), lbl in zip(targets, labels):
+        nmap_check.print_block(lbl, max_lbl, nmap_check.result_lines(records[label]["nmap"], wanted))
+
+
+def scan_ciphers(label, host, port, testssl_dir, timeout):
+    """
+    testssl.sh -P for one endpoint: {"output": ...}, or {"error": ...} when
+    it could not run or ran past `timeout` seconds and had its process
+    group killed.
+    """
+    cmd = [os.path.join(testssl_dir, "testssl.sh"), "--warnings", "off", "-P", f"{host}:{port}"]
+    try:
+        with stats.stage("ciphers", label):
+            result = procgroup.run(cmd, timeout)
+    except OSError as e:
+        stats.error("testssl.sh failed to run")
+        return {"error": f"Failed to run testssl.sh: {e}"}
+    if result is None:
+        stats.error("testssl.sh timed out")
+        return {"error": f"testssl.sh -P timed out on {host}:{port} after {timeout}s"}
+    return {"output": result[1]}
+
+
+def report_ciphers(targets, scans, ciphers, iana_cipher_mapping, args):
+    """ciphers-new.py -t for every endpoint that completed a handshake, in target order."""
+    if not iana_cipher_mapping:
+        print("Failed to fetch or parse IANA TLS parameters.")
+        return
+    for label, host, port in targets:
+        if label not in scans:
+            print(f"Skipping {host}:{port}: no TLS handshake")
+        elif "error" in scans[label]:
+            print(scans[label]["error"])
+        else:
+            ciphers.print_ciphers(scans[label]["output"].splitlines(), iana_cipher_mapping,
+                                  light_mode=args.light, noinfo=args.noinfo)
+
+
+@contextlib.contextmanager
+def report_output(output_dir, name):
+    if output_dir is None:
+        yield
+        return
+    with open(os.path.join(output_dir, f"{name}.txt"), "w") as fh, contextlib.redirect_stdout(fh):
+        yield
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Certificate, chain and cipher reports from one TLS pass per target.")
+    parser.add_argument("target_file", help="Targets, one per line (host, host:port or URL)")
+    parser.add_argument("-p", "--ports", default="443",
+                        help="Comma-separated ports for targets without one (default: 443)")
+    parser.add_argument("--report", default=",".join(REPORTS),
+                        help=f"Comma-separated reports to write: {', '.join(REPORTS)} (default: all)")
+    parser.add_argument("--ciphers", action="store_true",
+                        help="Also enumerate ciphers with testssl.sh -P (ciphers-new.py's report)")
+    parser.add_argument("-f", "--fields", help="Fields of the nmap report: status,subject,san,issuer")
+    parser.add_argument("--light", action="store_true", help="ciphers-new.py --light output")
+    parser.add_argument("--noinfo", action="store_true", help="ciphers-new.py --noinfo output")
+    parser.add_argument("--output-dir", metavar="DIR",
+                        help="Write each report to DIR/<report>.txt instead of stdout")
+    parser.add_argument("--json", metavar="FILE",
+                        help="Also write one JSON record per endpoint, including the negotiated parameters")
+    parser.add_argument("-j", "--jobs", type=int, default=32, help="Endpoints handled in parallel (default: 32)")
+    parser.add_argument("--connect-timeout", type=int, default=10, help="Seconds per TLS handshake (default: 10)")
+    parser.add_argument("--ca-bundle", metavar="FILE",
+                        help="Verify against this PEM bundle instead of the system trust store")
+    parser.add_argument("--chain-cache", metavar="FILE", default=DEFAULT_CACHE_PATH,
+                        help=f"Verified intermediate paths, shared with bulk-CA-check.py (default: {DEFAULT_CACHE_PATH})")
+    parser.add_argument("--no-chain-cache", action="store_true", help="Fully verify every chain")
+    parser.add_argument("--testssl", default=bulk_ca.TESTSSL_PATH,
+                        help=f"testssl.sh for undecided chains (default: {bulk_ca.TESTSSL_PATH})")
+    parser.add_argument("--testssl-dir",
+                        help="Directory of testssl.sh for --ciphers (default: the one ciphers-new.py remembers)")
+    parser.add_argument("--no-fallback", action="store_true",
+                        help="Never run testssl.sh -S for chains the handshake could not classify")
+    parser.add_argument("--timeout", type=int, default=600,
+                        help="Seconds before a hung testssl.sh run (-S fallback or --ciphers) is killed (default: 600)")
+    parser.add_argument("--stats", action="store_true", help="Print per-stage timing and error counts to stderr when done")
+    parser.add_argument("--trace", metavar="FILE", help="Write a JSON timing trace to FILE")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.start(args)
+
+    args.report = [name.strip() for name in args.report.split(",") if name.strip()]
+    unknown = set(args.report) - set(REPORTS)
+    if unknown:
+        parser.error(f"unknown report(s): {', '.join(sorted(unknown))}")
+    stats.enabled = args.stats or bool(args.trace)
+    wanted = {f.strip().lower() for f in args.fields.split(",")} if args.fields else None
+    ports = [int(p) for p in dict.fromkeys(args.ports.split(",")) if p.strip().isdigit()]
+    if not ports:
+        parser.error("no valid port in --ports")
+
+    try:
+        targets = load_targets(args.target_file, ports)
+    except FileNotFoundError:
+        print(f"File '{args.target_file}' not found.")
+        sys.exit(1)
+    if not targets:
+        return
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    cache = None if args.no_chain_cache else ChainCache(args.chain_cache, cafile=args.ca_bundle)
+    ciphers = iana_cipher_mapping = None
+    if args.ciphers:
+        # Needs requests and BeautifulSoup, so only loaded for --ciphers.
+        ciphers = importlib.import_module("ciphers-new")
+        ciphers.stats = stats
+        iana_cipher_mapping = ciphers.get_iana_cipher_mapping()
+        testssl_dir = args.testssl_dir or ciphers.load_testssl_path()
+
+    def timed_assess(target):
+        with stats.target(target[0]):
+            return assess(*target, args, cache)
+
+    records, scans = {}, {}
+    pool = ThreadPoolExecutor(max_workers=max(1, args.jobs))
+    try:
+        futures = [pool.submit(timed_assess, target) for target in targets]
+        cipher_futures = {}
+        for future in as_completed(futures):
+            record = future.result()
+            records[record["target"]] = record
+            # Cipher enumeration is the slow part; it starts on the same
+            # pool as soon as an endpoint has answered a handshake.
+            if iana_cipher_mapping and "negotiated" in record:
+                cipher_futures[record["target"]] = pool.submit(scan_ciphers, record["target"], record["host"],
+                                                               record["port"], testssl_dir, args.timeout)
+        for label, future in cipher_futures.items():
+            scans[label] = future.result()
+    except KeyboardInterrupt:
+        procgroup.interrupt(pool)
+        raise
+    pool.shutdown()
+
+    if cache is not None:
+        stats.hit("chain cache", cache.hits)
+        stats.miss("chain cache", cache.misses)
+        cache.save()
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            for label, _, _ in targets:
+                fh.write(json.dumps(records[label]) + "\n")
+    for name in args.report:
+        with report_output(args.output_dir, name):
+            if name == "ca":
+                report_ca(targets, records)
+            else:
+                report_nmap(targets, records, wanted)
+    if args.ciphers:
+        with report_output(args.output_dir, "ciphers"):
+            report_ciphers(targets, scans, ciphers, iana_cipher_mapping, args)
+    stats.finish(args.trace)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+In-process certificate chain checks for the bulk TLS scripts.
+
+check_chain() reports the same three fields bulk-CA-check.py takes from
+testssl.sh -S (Chain of trust, Certificate Validity, Issuer) using the
+ssl module: one verifying handshake against the system trust store or a
+custom CA bundle, and only when that fails an extra non-verifying
+handshake to read the certificate. Anything it cannot classify is
+returned as None so the caller can fall back to testssl.sh.
+
+With a ChainCache the first handshake verifies against the cached
+intermediates instead (see chaincache.py), and only chains that are not
+cached, or whose leaf does not pass, pay for the full verification.
+
+inspect() hands back the verdict together with the presented chain and
+the negotiated protocol and cipher, for callers that report more than
+those three fields (tls-assess.py).
+"""
+
+import socket
+import ssl
+import _ssl
+from datetime import datetime, timezone
+
+import chaincache
+
+# OpenSSL X509_V_ERR_* codes mapped to testssl.sh's "Chain of trust" wording.
+VERIFY_ERRORS = {
+    2: "NOT ok (chain incomplete)",    # unable to get issuer certificate
+    9: "NOT ok (not yet valid)",       # certificate is not yet valid
+    10: "NOT ok (expired)",            # certificate has expired
+    18: "NOT ok (self signed)",        # self-signed leaf
+    19: "NOT ok (self signed CA in chain)",
+    20: "NOT ok (chain incomplete)",   # unable to get local issuer certificate
+    21: "NOT ok (chain incomplete)",   # unable to verify the first certificate
+}
+
+CERT_TIME_FORMAT = "%b %d %H:%M:%S %Y %Z"
+
+
+def parse_target(target, default_port=443):
+    """Split a testssl.sh style target (host, host:port, URL, [v6]:port) into (host, port)."""
+    if "://" in target:
+        target = target.split("://", 1)[1]
+    target = target.split("/", 1)[0]
+    if target.startswith("["):
+        host, _, rest = target[1:].partition("]")
+        port = rest[1:] if rest.startswith(":") else ""
+    elif target.count(":") == 1:
+        host, port = target.split(":")
+    else:
+        host, port = target, ""
+    return host, int(port) if port.isdigit() else default_port
+
+
+def make_context(cafile=None, verify=True):
+    if verify:
+        context = ssl.create_default_context(cafile=cafile)
+        # testssl.sh's chain of trust ignores the hostname, so do we.
+        context.check_hostname = False
+    else:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+def presented_chain(tls_sock):
+    """The certificates the server sent, leaf first, as _ssl.Certificate objects."""
+    # Public from Python 3.13 on; the underlying _sslobj method exists since 3.10.
+    return tls_sock._sslobj.get_unverified_chain() or []
+
+
+def verified_chain(tls_sock):
+    """The chain OpenSSL built and verified, leaf first, down to the trust anchor it stopped at."""
+    return tls_sock._sslobj.get_verified_chain() or []
+
+
+def der_chain(chain):
+    return [cert.public_bytes(_ssl.ENCODING_DER) for cert in chain]
+
+
+def handshake(host, port, context, timeout):
+    """Connect and return the presented chain."""
+    return connect(host, port, context, timeout)[0]
+
+
+def connect(host, port, context, timeout, verified=False):
+    """
+    Connect and return (presented chain, negotiated protocol/cipher dict),
+    or (presented chain, verified chain, negotiated) with verified=True.
+    """
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        server_name = None if is_ip_address(host) else host
+        with context.wrap_socket(sock, server_hostname=server_name) as tls_sock:
+            cipher, _, bits = tls_sock.cipher() or (None, None, None)
+            negotiated = {"version": tls_sock.version(), "cipher": cipher, "bits": bits}
+            if verified:
+                return presented_chain(tls_sock), verified_chain(tls_sock), negotiated
+            return presented_chain(tls_sock), negotiated
+
+
+def is_ip_address(host):
+    for family in (socket.AF_INET, socket.AF_INET6):
+        try:
+            socket.inet_pton(family, host)
+            return True
+        except OSError:
+            pass
+    return False
+
+
+def name_field(name, field):
+    for rdn in name:
+        for key, value in rdn:
+            if key == field:
+                return value
+    return None
+
+
+def format_issuer(info):
+    """testssl.sh style issuer: 'CN (O from C)'."""
+    issuer = info.get("issuer", ())
+    common_name = name_field(issuer, "commonName")
+    organization = name_field(issuer, "organizationName")
+    country = name_field(issuer, "countryName")
+    if not common_name:
+        return organization or "Not found"
+    if organization and country:
+        return f"{common_name} ({organization} from {country})"
+    if organization:
+        return f"{common_name} ({organization})"
+    return common_name
+
+
+def format_validity(info, now=None):
+    """testssl.sh style validity: '(UTC) 242 >= 60 days (start --> end)'."""
+    not_before = datetime.strptime(info["notBefore"], CERT_TIME_FORMAT).replace(tzinfo=timezone.utc)
+    not_after = datetime.strptime(info["notAfter"], CERT_TIME_FORMAT).replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    days = (not_after - now).days
+    period = f"({not_before:%Y-%m-%d %H:%M} --> {not_after:%Y-%m-%d %H:%M})"
+    if not_after < now:
+        status = "expired"
+    elif days < 30:
+        status = f"expires < 30 days ({days})"
+    elif days < 60:
+        status = f"expires < 60 days ({days})"
+    else:
+        status = f"{days} >= 60 days"
+    return f"(UTC) {status} {period}"
+
+
+def connection_error(exc):
+    """Result dict for errors testssl.sh would report itself, else None."""
+    if isinstance(exc, ConnectionRefusedError):
+        return {"error": "Connection refused."}
+    if isinstance(exc, (socket.timeout, TimeoutError)):
+        return {"error": "Connection timed out."}
+    return None
+
+
+def verify(host, port, cafile, timeout):
+    """Full verifying handshake: (chain of trust verdict, presented chain, negotiated parameters)."""
+    try:
+        return ("Ok",) + connect(host, port, make_context(cafile), timeout)
+    except ssl.SSLCertVerificationError as e:
+        chain_of_trust = VERIFY_ERRORS.get(e.verify_code)
+        if chain_of_trust is None:
+            return None, None, None
+        return (chain_of_trust,) + connect(host, port, make_context(verify=False), timeout)
+
+
+def inspect(host, port, cafile=None, timeout=10, cache=None):
+    """
+    (chain of trust verdict, presented chain, negotiated parameters) for
+    one endpoint, in a single handshake whenever the chain verifies or is
+    cached. The verdict is None when it is not clear-cut; the chain is
+    None only when the verifying handshake failed in a way we cannot
+    classify. Connection errors are raised.
+    """
+    if cache is None:
+        return verify(host, port, cafile, timeout)
+    chain, verified = [], []
+    context = cache.context()
+    if context is not None:
+        try:
+            chain, verified, negotiated = connect(host, port, context, timeout, verified=True)
+        except ssl.SSLCertVerificationError:
+            pass  # No cached intermediate vouches for this leaf.
+    chain_of_trust = cache.lookup(der_chain(chain), der_chain(verified))
+    if chain_of_trust is not None:
+        return chain_of_trust, chain, negotiated
+    chain_of_trust, chain, negotiated = verify(host, port, cafile, timeout)
+    if chain and chain_of_trust is not None and cache.wants(der_chain(chain), chain_of_trust):
+        if leaf_anchored(host, port, der_chain(chain), timeout):
+            cache.store(der_chain(chain), [cert.get_info() for cert in chain[1:]], chain_of_trust)
+    return chain_of_trust, chain, negotiated
+
+
+def leaf_anchored(host, port, chain_der, timeout):
+    """
+    True if the endpoint still presents chain_der and its leaf verifies
+    with the first intermediate as the only trust anchor: signature,
+    validity period and serverAuth purpose, all checked by OpenSSL.
+    """
+    try:
+        context = chaincache.anchor_context(chain_der[1])
+        chain, verified, _ = connect(host, port, context, timeout, verified=True)
+    except (OSError, ssl.SSLError):
+        return False
+    return der_chain(chain)[:2] == chain_der[:2] and der_chain(verified)[:2] == chain_der[:2]
+
+
+def check_chain(target, cafile=None, timeout=10, cache=None):
+    """
+    Return bulk-CA-check.py's result dict for `target`, or None when the
+    answer is not clear-cut and testssl.sh should decide instead.
+    """
+    host, port = parse_target(target)
+    try:
+        chain_of_trust, chain, _ = inspect(host, port, cafile, timeout, cache)
+    except (OSError, ssl.SSLError) as e:
+        return connection_error(e)
+    return chain_result(chain_of_trust, chain)
+
+
+def chain_result(chain_of_trust, chain):
+    """bulk-CA-check.py's three fields from a verdict and presented chain, or None if undecided."""
+    if not chain_of_trust or not chain:
+        return None
+    info = chain[0].get_info()
+    try:
+        validity = format_validity(info)
+    except (KeyError, ValueError):
+        return None
+    return {
+        "chain_of_trust": chain_of_trust,
+        "certificate_validity": validity,
+        "issuer": format_issuer(info),
+    }
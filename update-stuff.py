@@ -1,8 +1,19 @@
 import subprocess
 import os
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+from gitrepos import DEFAULT_CACHE_PATH, MetadataUnavailable, describe_tags, discover, fast_forward, remote_unchanged
+import procgroup
+import profiling
+
+DEFAULT_JOBS = 16
+DEFAULT_TIMEOUT = 300
 
 def get_latest_tag(repo_path):
+    try:
+        return describe_tags(repo_path) or ""
+    except MetadataUnavailable:
+        pass
     try:
         result = subprocess.run(["git", "describe", "--tags"], cwd=repo_path, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
         return result.stdout.strip()
@@ -10,51 +21,60 @@ def get_latest_tag(repo_path):
         print(f"Error getting tag: {str(e)}")
         return None
 
-def git_pull(repo_path):
+def git_pull(repo_path, timeout=None):
     try:
-        result = subprocess.run(["git", "pull"], cwd=repo_path, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        all_output = result.stdout + result.stderr
-        if "Already up to date." in all_output:
-            return "Already up to date."
-        elif "error:" in all_output:
-            error_msg = all_output.split("error:")[1].strip()
-            return f"Error during update: {error_msg}"
-        elif "fatal:" in all_output:
-            fatal_msg = all_output.split("fatal:")[1].strip()
-            return f"Fatal error during update: {fatal_msg}"
-        elif "Updating" in all_output or "Fast-forward" in all_output:
-            return "Repository updated successfully."
-        else:
-            return "Unrecognized status. Manual check recommended."
+        return fast_forward(repo_path, timeout)
     except Exception as e:
         print(f"Error during pull: {str(e)}")
         return None
 
-def find_git_repos(path):
-    for root, dirs, files in os.walk(path):
-        if ".git" in dirs:
-            yield root
-
-def main(path):
-    for repo in find_git_repos(path):
-        print(f"\nChecking repository: {repo}")
-        current_version = get_latest_tag(repo)
-        print(f"Current Version: {current_version if current_version else 'Unknown'}")
-        
-        pull_result = git_pull(repo)
-        print(f"Update Status: {pull_result}")
-        
-        new_version = get_latest_tag(repo)
-        if current_version != new_version:
-            print(f"Updated Version: {new_version if new_version else 'Unknown'}")
+def update_repository(repo_path, timeout=None):
+    """Check one repository and fast-forward it if its upstream moved; returns its report lines."""
+    lines = [f"\nChecking repository: {repo_path}"]
+    current_version = get_latest_tag(repo_path)
+    lines.append(f"Current Version: {current_version if current_version else 'Unknown'}")
+
+    # One ls-remote round trip; unchanged repos skip the fetch.
+    if remote_unchanged(repo_path, timeout):
+        lines.append("Update Status: Already up to date.")
+        return lines
+
+    pull_result = git_pull(repo_path, timeout)
+    lines.append(f"Update Status: {pull_result}")
+
+    new_version = get_latest_tag(repo_path)
+    if current_version != new_version:
+        lines.append(f"Updated Version: {new_version if new_version else 'Unknown'}")
+    return lines
+
+def main(path, cache_path=DEFAULT_CACHE_PATH, jobs=DEFAULT_JOBS, timeout=DEFAULT_TIMEOUT):
+    repos = discover(path, cache_path)
+    pool = ThreadPoolExecutor(max_workers=max(1, jobs))
+    try:
+        # Remote checks and updates share the pool; reports keep discovery order.
+        for lines in pool.map(lambda repo: update_repository(repo, timeout), repos):
+            print("\n".join(lines), flush=True)
+    except KeyboardInterrupt:
+        procgroup.interrupt(pool)
+        raise
+    pool.shutdown()
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Update Git repositories in a given path.')
     parser.add_argument('path', help='The path to check for repositories')
+    parser.add_argument('--repo-cache', default=DEFAULT_CACHE_PATH,
+                        help=f'Where discovered repositories are cached (default: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--no-repo-cache', action='store_true', help='Walk the whole tree without the cache')
+    parser.add_argument('-j', '--jobs', type=int, default=DEFAULT_JOBS,
+                        help=f'Repositories checked and updated in parallel (default: {DEFAULT_JOBS})')
+    parser.add_argument('--timeout', type=int, default=DEFAULT_TIMEOUT,
+                        help=f'Seconds allowed per git command before it is killed (default: {DEFAULT_TIMEOUT})')
 
+    profiling.add_arguments(parser)
     args = parser.parse_args()
+    profiling.start(args)
     
     if not os.path.exists(args.path):
         print("Provided path does not exist.")
     else:
-        main(args.path)
+        main(args.path, None if args.no_repo_cache else args.repo_cache, args.jobs, args.timeout)
@@ -1,58 +1,114 @@
-import os
-import subprocess
 import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from gitrepos import (DEFAULT_CACHE_PATH, MetadataUnavailable, describe_tags, discover, fast_forward,
+                      head_commit, remote_unchanged, run_git)
+import procgroup
+import profiling
 
-def get_current_version(repo_path):
+DEFAULT_JOBS = 8
+DEFAULT_TIMEOUT = 300
+
+print_lock = threading.Lock()
+
+def get_current_version(repo_path, timeout=None):
     try:
-        result = subprocess.run(["git", "describe", "--tags"], cwd=repo_path, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        if result.returncode == 0:
-            return result.stdout.strip()
+        version = describe_tags(repo_path)
+        return version if version is not None else "Unknown"
+    except MetadataUnavailable:
+        pass
+    try:
+        result = run_git(["describe", "--tags"], repo_path, timeout)
+        if result is not None and result[0] == 0:
+            return result[1].strip()
         else:
             return "Unknown"
     except Exception as e:
         print(f"Error fetching version: {str(e)}")
         return "Unknown"
 
-def git_pull(repo_path):
+# Changed files that usually mean a tool has to be reinstalled or rebuilt.
+SETUP_FILES = {'setup.py', 'setup.cfg', 'pyproject.toml', 'go.mod', 'Makefile', 'makefile', 'GNUmakefile',
+               'Pipfile', 'Pipfile.lock', 'poetry.lock'}
+
+def needs_setup(changed):
+    """True if any changed path is a build/dependency file or lives under a build/ or requirements/ folder."""
+    for path in changed:
+        parts = path.split('/')
+        name = parts[-1]
+        if name in SETUP_FILES or (name.startswith('requirements') and name.endswith('.txt')):
+            return True
+        if 'build' in parts or 'requirements' in parts[:-1]:
+            return True
+    return False
+
+def get_head(repo_path, timeout=None):
     try:
-        result = subprocess.run(["git", "pull"], cwd=repo_path, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        all_output = result.stdout + result.stderr
-        if "Already up to date." in all_output:
-            return "Already up to date."
-        elif "error:" in all_output:
-            error_msg = all_output.split("error:")[1].strip()
-            return f"Error during update: {error_msg}"
-        elif "fatal:" in all_output:
-            fatal_msg = all_output.split("fatal:")[1].strip()
-            return f"Fatal error during update: {fatal_msg}"
-        elif "Updating" in all_output or "Fast-forward" in all_output:
-            # Check for setup indicators
-            setup_indicators = ['setup.py', 'setup.cfg', 'build']
-            for root, dirs, files in os.walk(repo_path):
-                if any(indicator in files + dirs for indicator in setup_indicators):
-                    return "Repository updated successfully. Additional setup may be required."
-            return "Repository updated successfully."
-        else:
-            return "Unrecognized status. Manual check recommended."
+        return head_commit(repo_path)
+    except MetadataUnavailable:
+        pass
+    result = run_git(["rev-parse", "--verify", "-q", "HEAD"], repo_path, timeout)
+    if result is None or result[0] != 0:
+        return None
+    return result[1].strip()
+
+def changed_files(repo_path, old_head, new_head, timeout=None):
+    """Paths touched between two commits, or None if git could not tell."""
+    if not old_head or not new_head:
+        return None
+    result = run_git(["diff", "--name-only", "--no-renames", "-z", old_head, new_head], repo_path, timeout)
+    if result is None or result[0] != 0:
+        return None
+    return [path for path in result[1].split('\0') if path]
+
+def git_pull(repo_path, timeout=None):
+    try:
+        old_head = get_head(repo_path, timeout)
+        status = fast_forward(repo_path, timeout)
+        if status == "Repository updated successfully.":
+            # Only what the update changed decides whether setup has to be rerun.
+            changed = changed_files(repo_path, old_head, get_head(repo_path, timeout), timeout)
+            if changed is None or needs_setup(changed):
+                return "Repository updated successfully. Additional setup may be required."
+        return status
     except Exception as e:
         print(f"Error during pull: {str(e)}")
         return None
 
-def is_git_repo(path):
-    git_folder = os.path.join(path, ".git")
-    return os.path.isdir(git_folder)
+def update_repository(repo_path, timeout=None):
+    """Return (repo, version before the pull, update status) for one repository."""
+    current_version = get_current_version(repo_path, timeout)
+    # One ls-remote round trip; only repos whose upstream moved pay for a fetch.
+    if remote_unchanged(repo_path, timeout):
+        return repo_path, current_version, "Already up to date."
+    update_status = git_pull(repo_path, timeout)
+    if update_status is None:
+        update_status = "Error during update: git could not be run"
+    return repo_path, current_version, update_status
 
-def check_repositories(root_path):
-    summary = []
-    for subdir, _, _ in os.walk(root_path):
-        if is_git_repo(subdir):
-            print(f"\nChecking repository: {subdir}")
-            current_version = get_current_version(subdir)
-            print(f"Current Version: {current_version}")
-            update_status = git_pull(subdir)
-            print(f"Update Status: {update_status}")
-            summary.append((subdir, current_version, update_status))
-    return summary
+def check_repositories(root_path, jobs=DEFAULT_JOBS, timeout=DEFAULT_TIMEOUT, cache_path=DEFAULT_CACHE_PATH):
+    """
+    Update every repository under root_path on a pool of `jobs` threads,
+    each git call limited to `timeout` seconds. A block is printed as each
+    repository finishes; the summary keeps discovery order.
+    """
+    repos = discover(root_path, cache_path)
+    results = {}
+    pool = ThreadPoolExecutor(max_workers=max(1, jobs))
+    try:
+        futures = {pool.submit(update_repository, repo, timeout): repo for repo in repos}
+        for done, future in enumerate(as_completed(futures), 1):
+            repo, current_version, update_status = future.result()
+            results[repo] = (repo, current_version, update_status)
+            with print_lock:
+                print(f"\n[{done}/{len(repos)}] Checking repository: {repo}")
+                print(f"Current Version: {current_version}")
+                print(f"Update Status: {update_status}", flush=True)
+    except KeyboardInterrupt:
+        procgroup.interrupt(pool)
+        raise
+    pool.shutdown()
+    return [results[repo] for repo in repos if repo in results]
 
 def display_summary(summary):
     print("\n\nSummary:")
@@ -80,12 +136,22 @@ def display_summary(summary):
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='A script to check and update GitHub repositories recursively from a given root path.')
     parser.add_argument('root_path', help='The root path to check for repositories')
+    parser.add_argument('-j', '--jobs', type=int, default=DEFAULT_JOBS,
+                        help=f'Repositories updated in parallel (default: {DEFAULT_JOBS})')
+    parser.add_argument('--timeout', type=int, default=DEFAULT_TIMEOUT,
+                        help=f'Seconds allowed per git command before it is killed (default: {DEFAULT_TIMEOUT})')
+    parser.add_argument('--repo-cache', default=DEFAULT_CACHE_PATH,
+                        help=f'Where discovered repositories are cached (default: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--no-repo-cache', action='store_true', help='Walk the whole tree without the cache')
 
+    profiling.add_arguments(parser)
     args = parser.parse_args()
+    profiling.start(args)
 
     if not args.root_path:
         parser.print_help()
         exit(1)
 
-    summary = check_repositories(args.root_path)
+    summary = check_repositories(args.root_path, args.jobs, args.timeout,
+                                 None if args.no_repo_cache else args.repo_cache)
     display_summary(summary)